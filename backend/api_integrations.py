@@ -4,33 +4,61 @@ Enhanced API integrations for reliable market data
 Replaces yfinance proxies with proper APIs
 """
 
-import requests
-import yfinance as yf
-from typing import Tuple, Optional
+import logging
+import os
+from outbound import http_get, yf_history
+from typing import Any, Dict, Tuple, Optional
+from resilience import hedged_call, AllSourcesFailed
 
-def get_gift_nifty() -> Tuple[Optional[float], Optional[float]]:
+log = logging.getLogger(__name__)
+
+# GIFT Nifty trades on NSE IFSC - common Yahoo symbols to probe
+GIFT_SYMBOLS = ["GIFTNIFTY.NS", "NIFTY_FUT.NS", "^NSEIFSC"]
+
+
+def _nifty_spot_proxy() -> Tuple[Optional[float], Optional[float]]:
+    """NIFTY spot (last, change_pct) used when a futures feed is unavailable."""
+    hist = yf_history("^NSEI", period="5d", interval="1d")
+    if len(hist) >= 2:
+        last = float(hist["Close"].iloc[-1])
+        prev = float(hist["Close"].iloc[-2])
+        return last, (last - prev) / prev * 100
+    return None, None
+
+
+def get_gift_nifty(
+    history: Optional[Dict[str, Any]] = None,
+    nifty_proxy: Optional[Tuple[Optional[float], Optional[float]]] = None
+) -> Tuple[Optional[float], Optional[float]]:
     """
     Fetch GIFT Nifty futures from NSE IFSC-SGX Connect
     Falls back to NIFTY spot if API unavailable
-    
+
+    history: daily OHLC frames already downloaded for GIFT_SYMBOLS (batched
+             by global_cues); probe symbols missing from it are skipped
+             instead of fetched one by one.
+    nifty_proxy: NIFTY spot (last, change_pct) already fetched by the
+                 caller, reused for the fallback.
+
     Returns: (last_price, change_pct)
     """
     try:
         # Try yfinance with GIFT Nifty symbol first
-        # GIFT Nifty trades on NSE IFSC - try common symbols
-        gift_symbols = ["GIFTNIFTY.NS", "NIFTY_FUT.NS", "^NSEIFSC"]
-        
-        for symbol in gift_symbols:
+        for symbol in GIFT_SYMBOLS:
             try:
-                ticker = yf.Ticker(symbol)
-                hist = ticker.history(period="5d", interval="1d")
+                if history is not None:
+                    hist = history.get(symbol)
+                    if hist is None:
+                        continue
+                else:
+                    hist = yf_history(symbol, period="5d", interval="1d")
                 if not hist.empty and len(hist) >= 2:
                     last = float(hist["Close"].iloc[-1])
                     prev = float(hist["Close"].iloc[-2])
                     change_pct = (last - prev) / prev * 100
                     # If we got valid data (not same as NIFTY), use it
                     if abs(last - 20000) > 1000:  # Reasonable check for futures vs spot
-                        print(f"✅ GIFT Nifty from yfinance ({symbol}): {last} ({change_pct:+.2f}%)")
+                        log.info("✅ GIFT Nifty from yfinance (%s): %s (%+.2f%%)", symbol, last, change_pct)
                         return last, change_pct
             except:
                 continue
@@ -42,7 +70,7 @@ def get_gift_nifty() -> Tuple[Optional[float], Optional[float]]:
             "Accept": "application/json"
         }
         
-        response = requests.get(url, headers=headers, timeout=5)
+        response = http_get(url, headers=headers, timeout=5)
         
         if response.status_code == 200:
             data = response.json()
@@ -50,34 +78,35 @@ def get_gift_nifty() -> Tuple[Optional[float], Optional[float]]:
             change_pct = data.get("change_pct")
             
             if last and change_pct is not None:
-                print(f"✅ GIFT Nifty from NSE IFSC: {last} ({change_pct:+.2f}%)")
+                log.info("✅ GIFT Nifty from NSE IFSC: %s (%+.2f%%)", last, change_pct)
                 return float(last), float(change_pct)
         
         raise Exception("GIFT Nifty API returned invalid data")
         
     except Exception as e:
-        print(f"⚠️ GIFT Nifty API failed: {e}, using NIFTY spot proxy")
+        log.warning("⚠️ GIFT Nifty API failed: %s, using NIFTY spot proxy", e)
         # Fallback to NIFTY spot
         try:
-            ticker = yf.Ticker("^NSEI")
-            hist = ticker.history(period="5d", interval="1d")
-            if len(hist) >= 2:
-                last = float(hist["Close"].iloc[-1])
-                prev = float(hist["Close"].iloc[-2])
-                change_pct = (last - prev) / prev * 100
-                print(f"📊 Using NIFTY spot as GIFT proxy: {last} ({change_pct:+.2f}%)")
+            last, change_pct = nifty_proxy if nifty_proxy is not None else _nifty_spot_proxy()
+            if last is not None and change_pct is not None:
+                log.info("📊 Using NIFTY spot as GIFT proxy: %s (%+.2f%%)", last, change_pct)
                 return last, change_pct
         except Exception as fallback_error:
-            print(f"❌ NIFTY spot fallback failed: {fallback_error}")
+            log.error("❌ NIFTY spot fallback failed: %s", fallback_error)
         
         return None, None
 
 
-def get_sgx_nifty() -> Tuple[Optional[float], Optional[float]]:
+def get_sgx_nifty(
+    nifty_proxy: Optional[Tuple[Optional[float], Optional[float]]] = None
+) -> Tuple[Optional[float], Optional[float]]:
     """
     Fetch SGX Nifty futures from Singapore Exchange
     Falls back to NIFTY spot if API unavailable
-    
+
+    nifty_proxy: NIFTY spot (last, change_pct) already fetched by the
+                 caller, reused for the fallback.
+
     Returns: (last_price, change_pct)
     """
     try:
@@ -90,7 +119,7 @@ def get_sgx_nifty() -> Tuple[Optional[float], Optional[float]]:
             "Accept": "application/json"
         }
         
-        response = requests.get(url, headers=headers, timeout=5)
+        response = http_get(url, headers=headers, timeout=5)
         
         if response.status_code == 200:
             data = response.json()
@@ -98,124 +127,116 @@ def get_sgx_nifty() -> Tuple[Optional[float], Optional[float]]:
             change_pct = data.get("change_pct")
             
             if last and change_pct is not None:
-                print(f"✅ SGX Nifty from SGX API: {last} ({change_pct:+.2f}%)")
+                log.info("✅ SGX Nifty from SGX API: %s (%+.2f%%)", last, change_pct)
                 return float(last), float(change_pct)
         
         raise Exception("SGX Nifty API returned invalid data")
         
     except Exception as e:
-        print(f"⚠️ SGX Nifty API failed: {e}, falling back to NIFTY spot")
+        log.warning("⚠️ SGX Nifty API failed: %s, falling back to NIFTY spot", e)
         # Fallback to NIFTY spot (same as GIFT)
         try:
-            ticker = yf.Ticker("^NSEI")
-            hist = ticker.history(period="5d", interval="1d")
-            if len(hist) >= 2:
-                last = float(hist["Close"].iloc[-1])
-                prev = float(hist["Close"].iloc[-2])
-                change_pct = (last - prev) / prev * 100
-                print(f"📊 Using NIFTY spot as SGX proxy: {last} ({change_pct:+.2f}%)")
+            last, change_pct = nifty_proxy if nifty_proxy is not None else _nifty_spot_proxy()
+            if last is not None and change_pct is not None:
+                log.info("📊 Using NIFTY spot as SGX proxy: %s (%+.2f%%)", last, change_pct)
                 return last, change_pct
         except Exception as fallback_error:
-            print(f"❌ NIFTY spot fallback failed: {fallback_error}")
+            log.error("❌ NIFTY spot fallback failed: %s", fallback_error)
         
         return None, None
 
 
+def _usdinr_from_twelve_data() -> Tuple[float, float]:
+    # Twelve Data API (free tier: 800 calls/day)
+    # For production: export TWELVE_DATA_API_KEY=your_key
+    api_key = os.environ.get("TWELVE_DATA_API_KEY", "demo")
+
+    url = f"https://api.twelvedata.com/time_series"
+    params = {
+        "symbol": "USD/INR",
+        "interval": "1day",
+        "outputsize": 2,
+        "apikey": api_key
+    }
+
+    response = http_get(url, params=params, timeout=5)
+    response.raise_for_status()
+    values = response.json().get("values", [])
+
+    if len(values) < 2:
+        raise ValueError("Twelve Data returned fewer than 2 closes")
+
+    last = float(values[0]["close"])
+    prev = float(values[1]["close"])
+    return last, (last - prev) / prev * 100
+
+
+def _usdinr_from_alpha_vantage() -> Tuple[float, float]:
+    # Alpha Vantage (free tier: 25 calls/day)
+    api_key = os.environ.get("ALPHA_VANTAGE_API_KEY", "demo")
+
+    url = "https://www.alphavantage.co/query"
+    params = {
+        "function": "FX_DAILY",
+        "from_symbol": "USD",
+        "to_symbol": "INR",
+        "apikey": api_key
+    }
+
+    response = http_get(url, params=params, timeout=5)
+    response.raise_for_status()
+    time_series = response.json().get("Time Series FX (Daily)", {})
+
+    dates = sorted(time_series.keys(), reverse=True)[:2]
+    if len(dates) < 2:
+        raise ValueError("Alpha Vantage returned fewer than 2 closes")
+
+    last = float(time_series[dates[0]]["4. close"])
+    prev = float(time_series[dates[1]]["4. close"])
+    return last, (last - prev) / prev * 100
+
+
+def _usdinr_from_yfinance() -> Tuple[float, float]:
+    hist = yf_history("USDINR=X", period="5d", interval="1d")
+
+    if len(hist) < 2:
+        raise ValueError("yfinance returned fewer than 2 closes")
+
+    last = float(hist["Close"].iloc[-1])
+    prev = float(hist["Close"].iloc[-2])
+    return last, (last - prev) / prev * 100
+
+
+def _usdinr_in_range(result) -> bool:
+    # Validate realistic range
+    return result is not None and 70 <= result[0] <= 95
+
+
 def get_usdinr_fx() -> Tuple[Optional[float], Optional[float]]:
     """
     Fetch USD/INR from reliable FX API
     Tries multiple sources: Twelve Data, Alpha Vantage, yfinance
-    
+
+    Sources run through a hedged fallback chain with a circuit breaker
+    per provider, so a known-broken provider is skipped and a slow one
+    is raced by the next.
+
     Returns: (last_rate, change_pct)
     """
-    # Try Twelve Data API first (free tier: 800 calls/day)
-    try:
-        # Get API key from environment variable or config
-        # For production: export TWELVE_DATA_API_KEY=your_key
-        import os
-        api_key = os.environ.get("TWELVE_DATA_API_KEY", "demo")
-        
-        url = f"https://api.twelvedata.com/time_series"
-        params = {
-            "symbol": "USD/INR",
-            "interval": "1day",
-            "outputsize": 2,
-            "apikey": api_key
-        }
-        
-        response = requests.get(url, params=params, timeout=5)
-        
-        if response.status_code == 200:
-            data = response.json()
-            values = data.get("values", [])
-            
-            if len(values) >= 2:
-                last = float(values[0]["close"])
-                prev = float(values[1]["close"])
-                change_pct = (last - prev) / prev * 100
-                
-                # Validate realistic range
-                if 70 <= last <= 95:
-                    print(f"✅ USD/INR from Twelve Data: {last:.2f} ({change_pct:+.2f}%)")
-                    return last, change_pct
-                else:
-                    print(f"⚠️ USD/INR {last} outside realistic range, trying fallback")
-    
-    except Exception as e:
-        print(f"⚠️ Twelve Data API failed: {e}")
-    
-    # Fallback to Alpha Vantage (free tier: 25 calls/day)
-    try:
-        api_key = os.environ.get("ALPHA_VANTAGE_API_KEY", "demo")
-        
-        url = "https://www.alphavantage.co/query"
-        params = {
-            "function": "FX_DAILY",
-            "from_symbol": "USD",
-            "to_symbol": "INR",
-            "apikey": api_key
-        }
-        
-        response = requests.get(url, params=params, timeout=5)
-        
-        if response.status_code == 200:
-            data = response.json()
-            time_series = data.get("Time Series FX (Daily)", {})
-            
-            if time_series:
-                dates = sorted(time_series.keys(), reverse=True)[:2]
-                if len(dates) >= 2:
-                    last = float(time_series[dates[0]]["4. close"])
-                    prev = float(time_series[dates[1]]["4. close"])
-                    change_pct = (last - prev) / prev * 100
-                    
-                    if 70 <= last <= 95:
-                        print(f"✅ USD/INR from Alpha Vantage: {last:.2f} ({change_pct:+.2f}%)")
-                        return last, change_pct
-    
-    except Exception as e:
-        print(f"⚠️ Alpha Vantage API failed: {e}")
-    
-    # Final fallback to yfinance
+    sources = [
+        ("twelve_data_fx", _usdinr_from_twelve_data),
+        ("alpha_vantage_fx", _usdinr_from_alpha_vantage),
+        ("yfinance_fx", _usdinr_from_yfinance),
+    ]
+
     try:
-        ticker = yf.Ticker("USDINR=X")
-        hist = ticker.history(period="5d", interval="1d")
-        
-        if len(hist) >= 2:
-            last = float(hist["Close"].iloc[-1])
-            prev = float(hist["Close"].iloc[-2])
-            change_pct = (last - prev) / prev * 100
-            
-            if 70 <= last <= 95:
-                print(f"📊 USD/INR from yfinance fallback: {last:.2f} ({change_pct:+.2f}%)")
-                return last, change_pct
-            else:
-                print(f"⚠️ USD/INR {last} from yfinance outside realistic range")
-    
-    except Exception as e:
-        print(f"❌ yfinance USD/INR fallback failed: {e}")
-    
-    return None, None
+        last, change_pct = hedged_call(sources, is_valid=_usdinr_in_range)
+    except AllSourcesFailed as e:
+        log.error("❌ All USD/INR sources failed: %s", e)
+        return None, None
+
+    log.info("✅ USD/INR: %.2f (%+.2f%%)", last, change_pct)
+    return last, change_pct
 
 
 def test_api_latency(api_name: str, api_func) -> dict:
@@ -0,0 +1,83 @@
+"""
+Helpers shared by the load benchmarks: start the app against the local
+market-data stand-in, and sample a process's CPU time and memory.
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+def start_server(port: int, latency_ms: float = 50, jitter_ms: float = 20, extra_env: dict = None) -> subprocess.Popen:
+    """uvicorn main:app on 127.0.0.1:port with MARKET_DATA_MODE=standin."""
+    env = {
+        **os.environ,
+        "MARKET_DATA_MODE": "standin",
+        "MARKET_DATA_LATENCY_MS": str(latency_ms),
+        "MARKET_DATA_JITTER_MS": str(jitter_ms),
+        "LOG_LEVEL": os.environ.get("LOG_LEVEL", "WARNING"),
+        **(extra_env or {}),
+    }
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env,
+    )
+    try:
+        wait_ready(f"http://127.0.0.1:{port}/api/health")
+    except Exception:
+        proc.terminate()
+        raise
+    return proc
+
+
+def wait_ready(url: str, timeout: float = 60.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=2) as r:
+                if r.status == 200:
+                    return
+        except OSError:
+            pass
+        time.sleep(0.5)
+    raise TimeoutError(f"server not ready: {url}")
+
+
+def stop_server(proc: subprocess.Popen):
+    proc.terminate()
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+def get_json(url: str, timeout: float = 10.0):
+    with urllib.request.urlopen(url, timeout=timeout) as r:
+        return json.loads(r.read())
+
+
+def proc_sample(pid: int) -> dict:
+    """CPU seconds (user+system) and RSS bytes of a process, from /proc (Linux only)."""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    cpu = (int(fields[11]) + int(fields[12])) / _CLK_TCK  # utime, stime
+    rss = 0
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                rss = int(line.split()[1]) * 1024
+    return {"t": time.monotonic(), "cpu_s": cpu, "rss": rss}
+
+
+def percentiles(values, points=(50, 95, 99)) -> dict:
+    if not values:
+        return {f"p{p}": None for p in points}
+    ordered = sorted(values)
+    return {f"p{p}": round(ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))], 2) for p in points}
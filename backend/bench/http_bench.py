@@ -0,0 +1,230 @@
+"""
+End-to-end HTTP benchmark with latency percentiles per endpoint.
+
+Each endpoint is driven by N closed-loop clients (one keep-alive
+connection each, next request as soon as the last one returns) for
+--duration seconds at every --concurrency level. The report has one row
+per endpoint and level: throughput, error count, p50/p95/p99 latency and
+mean response size.
+
+With --start-server the app runs against the local market-data stand-in
+(MARKET_DATA_MODE=standin) with a throwaway paper-trading directory, so
+results don't depend on the network or market hours. The paper-trading
+endpoints write state, so against an external server they only run with
+--allow-writes.
+
+--json-out writes the result with the commit it ran on; --compare reads
+an earlier result and adds the change in throughput and p95.
+
+Usage (from backend/):
+    python bench/http_bench.py --start-server --json-out before.json
+    python bench/http_bench.py --start-server --compare before.json --json-out after.json
+    python bench/http_bench.py --start-server --endpoints signal_live --concurrency 1,16,64 \\
+        --server-env SIGNAL_SNAPSHOTS=0
+    python bench/http_bench.py --base-url http://127.0.0.1:8000 --endpoints history,signal_live
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlencode, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_server import BACKEND_DIR, percentiles, start_server, stop_server  # noqa: E402
+
+SYMBOL = "NIFTY"
+
+# name -> function returning the (name, method, path) requests of one iteration
+ENDPOINTS = {
+    "signal_live": lambda: [
+        ("signal_live", "GET", "/api/signal_live?" + urlencode({"symbol": SYMBOL, "interval": 5, "limit": 50})),
+    ],
+    "history": lambda: [
+        ("history", "GET", "/api/history?" + urlencode({"symbol": SYMBOL, "interval": 5, "limit": 200})),
+    ],
+    "ohlc_live_indicators": lambda: [
+        ("ohlc_live_indicators", "GET",
+         "/api/ohlc_live_indicators?" + urlencode({"symbol": SYMBOL, "interval": 5, "limit": 50})),
+    ],
+    "paper_stats": lambda: [
+        ("paper_stats", "GET", "/api/paper/stats"),
+    ],
+    # open a position and close it on take-profit, so capital never runs out
+    "paper_trade": lambda: [
+        ("paper_open", "POST", "/api/paper/open?" + urlencode({
+            "symbol": SYMBOL, "action": "BUY", "entry_price": 100.0, "quantity": 1,
+            "stop_loss": 99.0, "take_profit": 101.0, "signal_confidence": 60,
+        })),
+        ("paper_update", "POST", "/api/paper/update?" + urlencode({"symbol": SYMBOL, "current_price": 101.0})),
+    ],
+}
+WRITE_ENDPOINTS = {"paper_trade"}
+
+
+class Results:
+    def __init__(self):
+        self.samples = {}  # request name -> [ms]
+        self.bytes = {}
+        self.errors = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, ms: float, size: int, ok: bool):
+        with self._lock:
+            if ok:
+                self.samples.setdefault(name, []).append(ms)
+                self.bytes[name] = self.bytes.get(name, 0) + size
+            else:
+                self.errors[name] = self.errors.get(name, 0) + 1
+
+
+def worker(host: str, port: int, iteration, results: Results, measure_from: float, stop_at: float, encoding: str):
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    headers = {"Accept-Encoding": encoding} if encoding else {}
+    while time.perf_counter() < stop_at:
+        for name, method, path in iteration():
+            started = time.perf_counter()
+            ok, size = False, 0
+            try:
+                conn.request(method, path, headers=headers)
+                response = conn.getresponse()
+                size = len(response.read())
+                ok = response.status < 400
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection(host, port, timeout=30)
+            if started >= measure_from:
+                results.add(name, (time.perf_counter() - started) * 1000, size, ok)
+    conn.close()
+
+
+def run_level(base_url: str, endpoint: str, concurrency: int, args) -> list:
+    parsed = urlparse(base_url)
+    results = Results()
+    measure_from = time.perf_counter() + args.warmup
+    stop_at = measure_from + args.duration
+    threads = [
+        threading.Thread(target=worker, daemon=True, args=(
+            parsed.hostname, parsed.port or 80, ENDPOINTS[endpoint], results, measure_from, stop_at, args.encoding,
+        ))
+        for _ in range(concurrency)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    rows = []
+    for name in sorted(set(results.samples) | set(results.errors)):
+        samples = results.samples.get(name, [])
+        rows.append({
+            "endpoint": name,
+            "concurrency": concurrency,
+            "requests": len(samples),
+            "errors": results.errors.get(name, 0),
+            "rps": round(len(samples) / args.duration, 1),
+            **{f"{k}_ms": v for k, v in percentiles(samples).items()},
+            "bytes": round(results.bytes.get(name, 0) / max(len(samples), 1)),
+        })
+    return rows
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _change(new, old):
+    if new is None or not old:
+        return ""
+    return f"{(new - old) / old * 100:+.0f}%"
+
+
+def print_report(result: dict, baseline: dict = None):
+    previous = {(r["endpoint"], r["concurrency"]): r for r in (baseline or {}).get("rows", [])}
+    header = "| Endpoint | Conc. | Req/s | p50 ms | p95 ms | p99 ms | Errors | Bytes |"
+    if baseline:
+        header += f" Req/s vs {baseline.get('commit')} | p95 vs {baseline.get('commit')} |"
+    print(header)
+    print("|" + "---|" * (header.count("|") - 1))
+    for row in result["rows"]:
+        line = (f"| {row['endpoint']} | {row['concurrency']} | {row['rps']} | {row['p50_ms']} | "
+                f"{row['p95_ms']} | {row['p99_ms']} | {row['errors']} | {row['bytes']} |")
+        if baseline:
+            old = previous.get((row["endpoint"], row["concurrency"]), {})
+            line += f" {_change(row['rps'], old.get('rps'))} | {_change(row['p95_ms'], old.get('p95_ms'))} |"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8766")
+    parser.add_argument("--start-server", action="store_true", help="run the app locally against the stand-in")
+    parser.add_argument("--upstream-latency-ms", type=float, default=50.0)
+    parser.add_argument("--server-env", action="append", default=[], metavar="KEY=VALUE",
+                        help="extra environment for the started server (repeatable)")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help=f"comma-separated, from {', '.join(ENDPOINTS)}")
+    parser.add_argument("--concurrency", default="1,8,32", help="comma-separated client counts")
+    parser.add_argument("--duration", type=float, default=10.0, help="measured seconds per endpoint and level")
+    parser.add_argument("--warmup", type=float, default=2.0, help="unmeasured seconds before each run")
+    parser.add_argument("--encoding", default="gzip, br", help="Accept-Encoding sent (empty for identity)")
+    parser.add_argument("--allow-writes", action="store_true", help="run paper-trading writes against --base-url")
+    parser.add_argument("--compare", help="earlier --json-out result to diff against")
+    parser.add_argument("--json-out", help="also write the result as JSON")
+    args = parser.parse_args()
+
+    endpoints = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+    unknown = [e for e in endpoints if e not in ENDPOINTS]
+    if unknown:
+        sys.exit(f"Unknown endpoints: {', '.join(unknown)}")
+    if not (args.start_server or args.allow_writes):
+        skipped = [e for e in endpoints if e in WRITE_ENDPOINTS]
+        if skipped:
+            print(f"Skipping {', '.join(skipped)} (writes paper-trading state); use --allow-writes")
+            endpoints = [e for e in endpoints if e not in WRITE_ENDPOINTS]
+    levels = [int(c) for c in args.concurrency.split(",")]
+
+    proc = None
+    if args.start_server:
+        extra_env = dict(item.split("=", 1) for item in args.server_env)
+        extra_env.setdefault("PAPER_TRADING_DIR", tempfile.mkdtemp(prefix="bench-paper-"))
+        proc = start_server(urlparse(args.base_url).port or 8766, latency_ms=args.upstream_latency_ms,
+                            extra_env=extra_env)
+    rows = []
+    try:
+        for endpoint in endpoints:
+            for level in levels:
+                rows.extend(run_level(args.base_url, endpoint, level, args))
+    finally:
+        if proc is not None:
+            stop_server(proc)
+
+    result = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("json_out", "compare")},
+        "rows": rows,
+    }
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""
+Micro-benchmarks for the analytic modules, with regression thresholds.
+
+Times one call of each pure-compute function on the bundled data/*.csv
+files and compares it with the stored baselines (bench/micro_baselines.json).
+The run fails (exit status 1) when a case is more than --threshold percent
+slower than its baseline, or when a measured case has no baseline at all. Timing follows timeit: each case is repeated
+until a round takes --min-time seconds, and the best of --repeat rounds is
+compared.
+
+Baselines are machine-specific; record them on the machine that runs the
+check (e.g. CI) and commit the file:
+    python bench/micro_bench.py --save
+
+Cases whose module can't be imported here (or ML without trained models)
+are reported as skipped, not failed.
+
+Usage (from backend/):
+    python bench/micro_bench.py
+    python bench/micro_bench.py --threshold 10 --only indicators,signal
+    python bench/micro_bench.py --json-out micro.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from typing import Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(os.path.dirname(BENCH_DIR), "data")
+BASELINE_FILE = os.path.join(BENCH_DIR, "micro_baselines.json")
+
+CANDLES = 200   # window the live endpoints compute indicators over
+ML_ROWS = 50    # rows the pipeline passes to predict_next
+
+HEADLINES = [
+    "Nifty ends higher as banks and IT stocks gain",
+    "Sensex, Nifty slip on profit booking in financial stocks",
+    "FII inflows support Indian equity market rally",
+    "Bank Nifty hits record as private lenders surge",
+    "Markets trade flat ahead of RBI policy decision",
+    "Rupee steadies; stock market awaits US inflation data",
+    "IT shares lead gains on strong earnings outlook",
+    "Metal stocks drag Nifty lower amid weak global cues",
+    "Auto stocks rise on robust monthly sales numbers",
+    "Investors book profits as Sensex falls from record high",
+]
+
+
+class Skip(Exception):
+    """A case that can't run in this environment."""
+
+
+def load_candles(name: str = "nifty_5m.csv") -> pd.DataFrame:
+    """Bundled 5-minute candles with numeric OHLCV columns (ticker row dropped)."""
+    df = pd.read_csv(os.path.join(DATA_DIR, name))
+    df.columns = [c.lower() for c in df.columns]
+    for col in ("open", "high", "low", "close", "volume"):
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    return df.dropna(subset=["close"]).reset_index(drop=True)
+
+
+# -----------------------------------------
+# Cases: setup() -> zero-argument callable
+# -----------------------------------------
+
+def case_indicators():
+    from technical import compute_all_indicators
+    window = load_candles().tail(CANDLES)[["open", "high", "low", "close", "volume"]].reset_index(drop=True)
+    return lambda: compute_all_indicators(window.copy())
+
+
+def case_signal():
+    from technical import compute_all_indicators
+    from signal_logic import decide_signal
+    row = compute_all_indicators(load_candles().tail(CANDLES).reset_index(drop=True)).iloc[-1].to_dict()
+    ml = {"enabled": True, "final_ml_score": 0.62}
+    return lambda: decide_signal(row, ml)
+
+
+def case_ml_predict():
+    try:
+        from ml.ml_model import load_models, predict_next
+    except ImportError as e:
+        raise Skip(f"ML dependencies missing: {e}")
+    load_models()
+    rows = pd.read_csv(os.path.join(DATA_DIR, "nifty_ml.csv")).tail(ML_ROWS)
+    if not predict_next(rows).get("enabled", True):
+        raise Skip("ML models not loaded")
+    return lambda: predict_next(rows)
+
+
+def case_greeks():
+    from greeks import bs_greeks
+    spot = float(load_candles()["close"].iloc[-1])
+    atm = round(spot / 50) * 50
+    chain = [(atm + k * 50, 12 + abs(k) * 0.4) for k in range(-20, 21)]  # strike, iv%
+
+    def run():
+        for strike, iv in chain:
+            bs_greeks(spot, strike, iv, 3, "CE")
+            bs_greeks(spot, strike, iv, 3, "PE")
+    return run
+
+
+def case_reversal():
+    from reversal_ai import reversal_probability
+    from technical import compute_all_indicators
+    df = compute_all_indicators(load_candles().tail(CANDLES).reset_index(drop=True))
+    return lambda: reversal_probability(df)
+
+
+def case_sentiment():
+    from news_sentiment import analyze_sentiment
+    headlines = [{"title": title, "link": ""} for title in HEADLINES * 2]
+    return lambda: analyze_sentiment(headlines)
+
+
+def case_features():
+    from ml.prepare_features import build_features
+    raw = load_candles()
+    return lambda: build_features(raw)
+
+
+CASES = {
+    "indicators": ("technical.compute_all_indicators, %d candles" % CANDLES, case_indicators),
+    "signal": ("signal_logic.decide_signal, one row", case_signal),
+    "ml_predict": ("ml.ml_model.predict_next, %d rows" % ML_ROWS, case_ml_predict),
+    "greeks": ("greeks.bs_greeks, 41-strike CE+PE chain", case_greeks),
+    "reversal": ("reversal_ai.reversal_probability, %d candles" % CANDLES, case_reversal),
+    "sentiment": ("news_sentiment.analyze_sentiment, 20 headlines", case_sentiment),
+    "features": ("prepare_features.build_features, full nifty_5m.csv", case_features),
+}
+
+
+def measure(fn, repeat: int, min_time: float) -> dict:
+    """Best and median seconds per call over `repeat` rounds of at least `min_time`."""
+    fn()  # warm caches and lazy imports
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            break
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9)))
+    rounds = [elapsed / number]
+    for _ in range(repeat - 1):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        rounds.append((time.perf_counter() - started) / number)
+    rounds.sort()
+    return {"best_us": round(rounds[0] * 1e6, 2), "median_us": round(rounds[len(rounds) // 2] * 1e6, 2),
+            "calls_per_round": number}
+
+
+def run(names, repeat: int, min_time: float) -> dict:
+    results = {}
+    for name in names:
+        label, setup = CASES[name]
+        try:
+            fn = setup()
+        except Skip as e:
+            results[name] = {"label": label, "skipped": str(e)}
+            continue
+        except ImportError as e:
+            results[name] = {"label": label, "skipped": f"import failed: {e}"}
+            continue
+        results[name] = {"label": label, **measure(fn, repeat, min_time)}
+    return results
+
+
+def compare(results: dict, baselines: dict, threshold: float) -> Tuple[list, list]:
+    """Names of the cases more than `threshold` percent slower than their baseline, and of those without one."""
+    regressions, missing = [], []
+    for name, result in results.items():
+        if "best_us" not in result:
+            continue
+        base = baselines.get(name, {}).get("best_us")
+        if not base:
+            missing.append(name)
+            continue
+        result["baseline_us"] = base
+        result["change_pct"] = round((result["best_us"] - base) / base * 100, 1)
+        if result["change_pct"] > threshold:
+            regressions.append(name)
+    return regressions, missing
+
+
+def print_report(results: dict, regressions: list, threshold: float):
+    print("| Case | What | Best µs | Median µs | Baseline µs | Change |")
+    print("|------|------|---------|-----------|-------------|--------|")
+    for name, r in results.items():
+        if "skipped" in r:
+            print(f"| {name} | {r['label']} | skipped: {r['skipped']} | | | |")
+            continue
+        change = f"{r['change_pct']:+.1f}%" if "change_pct" in r else "no baseline"
+        if name in regressions:
+            change += f" ❌ (> {threshold:g}%)"
+        print(f"| {name} | {r['label']} | {r['best_us']} | {r['median_us']} | {r.get('baseline_us', '')} | {change} |")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", help=f"comma-separated cases, from {', '.join(CASES)}")
+    parser.add_argument("--threshold", type=float, default=20.0, help="allowed slowdown in percent")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per round")
+    parser.add_argument("--baselines", default=BASELINE_FILE)
+    parser.add_argument("--save", action="store_true", help="store this run as the baselines")
+    parser.add_argument("--json-out", help="also write the result as JSON")
+    args = parser.parse_args()
+
+    names = [n.strip() for n in args.only.split(",")] if args.only else list(CASES)
+    unknown = [n for n in names if n not in CASES]
+    if unknown:
+        sys.exit(f"Unknown cases: {', '.join(unknown)}")
+
+    results = run(names, args.repeat, args.min_time)
+
+    baselines = {}
+    if os.path.exists(args.baselines):
+        with open(args.baselines) as f:
+            baselines = json.load(f).get("cases", {})
+    regressions, missing = ([], []) if args.save else compare(results, baselines, args.threshold)
+    print_report(results, regressions, args.threshold)
+
+    if args.save:
+        kept = {name: r for name, r in baselines.items() if name not in results or "skipped" in results[name]}
+        measured = {name: {"best_us": r["best_us"], "median_us": r["median_us"]}
+                    for name, r in results.items() if "best_us" in r}
+        with open(args.baselines, "w") as f:
+            json.dump({
+                "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                            "processor": platform.processor(), "pandas": pd.__version__},
+                "cases": {**kept, **measured},
+            }, f, indent=2)
+        print(f"Saved baselines for {len(measured)} cases to {args.baselines}")
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump({"threshold_pct": args.threshold, "regressions": regressions, "missing_baselines": missing,
+                       "cases": results}, f, indent=2)
+    if regressions:
+        print(f"Slower than baseline by more than {args.threshold:g}%: {', '.join(regressions)}")
+    if missing:
+        # An unchecked case must not pass as "no regression"
+        print(f"❌ No baseline in {args.baselines} for: {', '.join(missing)}. "
+              f"Record them on this machine with --save and commit the file.")
+    if regressions or missing:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
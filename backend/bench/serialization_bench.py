@@ -0,0 +1,142 @@
+"""
+Serialization / compression benchmark for representative signal_live payloads.
+
+Compares the old response path (jsonable_encoder + json.dumps, as
+Starlette's JSONResponse does) with fast_json.dumps, and gzip vs brotli
+for the resulting body. Prints a markdown table.
+
+Usage (from backend/):
+    python bench/serialization_bench.py
+    python bench/serialization_bench.py --candles 200 --iterations 500
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fast_json  # noqa: E402
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from fastapi.encoders import jsonable_encoder
+except ImportError:
+    jsonable_encoder = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def _num(x: float):
+    """numpy scalar when numpy is available (as pandas rows produce)."""
+    return np.float64(x) if np is not None else x
+
+
+def build_payload(candles: int = 80, headlines: int = 10) -> dict:
+    """signal_live-shaped payload with realistic sizes."""
+    rnd = random.Random(42)
+    price = 24350.0
+    out_candles = []
+    t = 1_701_200_000
+    for _ in range(candles):
+        o = price
+        price += rnd.uniform(-15, 15)
+        out_candles.append({
+            "time": t, "open": round(o, 2), "high": round(max(o, price) + rnd.uniform(0, 5), 2),
+            "low": round(min(o, price) - rnd.uniform(0, 5), 2), "close": round(price, 2),
+        })
+        t += 60
+    closes = [c["close"] for c in out_candles]
+    indicators = {k: _num(price * rnd.uniform(0.98, 1.02)) for k in (
+        "ema9", "ema21", "ema50", "ema200", "bb_upper", "bb_lower", "supertrend")}
+    indicators.update({"rsi14": _num(55.2), "macd": _num(3.1), "macd_signal": _num(2.4),
+                       "macd_hist": _num(0.7), "atr14": _num(18.4), "bb_width": _num(0.012),
+                       "bb_percent": float("nan")})
+    return {
+        "symbol": "NIFTY",
+        "interval_sec": 60,
+        "price": price,
+        "candles": out_candles,
+        "indicators": indicators,
+        "indicators_available": True,
+        "signal": {"action": "BUY", "confidence": 0.72, "reasons": ["Price above EMA21"] * 6,
+                   "mtf": {"tf1": 1, "tf15": 0}},
+        "series": {name: [c * rnd.uniform(0.995, 1.005) for c in closes] for name in ("ema21", "ema50", "supertrend")},
+        "news": {"sentiment_score": 0.2, "sentiment_summary": "Mildly positive news flow.",
+                 "headlines": [{"title": f"Markets headline number {i} about Nifty and banks", "source": "Example",
+                                "sentiment": 0.1 * i, "link": f"https://example.com/{i}"} for i in range(headlines)]},
+        "sector_view": {"sector_score": 0.3, "sector_comments": ["Banks supportive"] * 4,
+                        "sector_changes": {f"SECTOR{i}": round(rnd.uniform(-2, 2), 2) for i in range(12)}},
+        "global": {"data": {k: {"price": 100.0 + i, "change_pct": 0.4} for i, k in enumerate(
+            ("nifty_spot", "nasdaq", "crude", "usdinr", "gift_nifty", "sgx_nifty"))}, "score": 0.2, "comments": ["Nasdaq up"]},
+        "vix": {"value": 13.4, "label": "Low", "comment": "Calm", "risk_score": 0.2},
+        "fii_dii": {"score": 0.4, "label": "Buying", "comments": "FII net buyers"},
+        "final": {"score": 0.68, "label": "Buy (moderate)", "note": "Bias is bullish.",
+                  "components": {"technical": 0.72, "sector": 0.65, "news": 0.6}},
+        "meta": {"data_source": "live", "deadline_ms": 2500, "elapsed_ms": 120.4, "stale": {}},
+    }
+
+
+def _time(func, iterations: int) -> float:
+    """Median microseconds per call."""
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+def _stdlib(payload):
+    # NaN indicators (e.g. bb_percent on a flat window) must become null, as the app does, or allow_nan=False raises
+    encoded = fast_json._sanitize(jsonable_encoder(payload) if jsonable_encoder else payload)
+    return json.dumps(encoded, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+def run(candles: int, iterations: int):
+    payload = build_payload(candles)
+    rows = []
+
+    baseline_name = "jsonable_encoder + sanitize + json.dumps" if jsonable_encoder else "sanitize + json.dumps (no fastapi)"
+    base_us = _time(lambda: _stdlib(payload), iterations)
+    rows.append((baseline_name, base_us, len(_stdlib(payload)), "baseline"))
+
+    body = fast_json.dumps(payload)
+    fast_name = "fast_json.dumps (orjson)" if fast_json.ORJSON_AVAILABLE else "fast_json.dumps (stdlib fallback)"
+    fast_us = _time(lambda: fast_json.dumps(payload), iterations)
+    rows.append((fast_name, fast_us, len(body), f"{base_us / fast_us:.1f}x faster"))
+
+    gz = gzip.compress(body, 5)
+    rows.append(("gzip level 5", _time(lambda: gzip.compress(body, 5), iterations), len(gz),
+                 f"{len(gz) / len(body):.0%} of body"))
+    if brotli is not None:
+        br = brotli.compress(body, quality=4)
+        rows.append(("brotli quality 4", _time(lambda: brotli.compress(body, quality=4), iterations), len(br),
+                     f"{len(br) / len(body):.0%} of body"))
+
+    print(f"signal_live payload: {candles} candles, numpy={'yes' if np is not None else 'no'}, "
+          f"orjson={'yes' if fast_json.ORJSON_AVAILABLE else 'no'}, brotli={'yes' if brotli else 'no'}")
+    print()
+    print("| Step | Median µs | Bytes | Note |")
+    print("|------|-----------|-------|------|")
+    for name, us, size, note in rows:
+        print(f"| {name} | {us:.1f} | {size} | {note} |")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candles", type=int, default=80)
+    parser.add_argument("--iterations", type=int, default=300)
+    args = parser.parse_args()
+    run(args.candles, args.iterations)
@@ -0,0 +1,249 @@
+"""
+/ws/live load generator.
+
+Opens many simulated WebSocket clients against the app and reports:
+    - connection capacity: connected / failed clients, connect time
+    - frame latency p50/p95/p99 (server tick "ts" -> client receive)
+    - frames received and seq gaps (frames a client never saw, i.e.
+      conflated by the hub or throttled)
+    - server CPU and RSS per connected client (Linux /proc)
+    - the hub's own counters from /api/ws_hub (dropped frames, slow
+      disconnects, bytes sent)
+
+With --start-server the app is started with MARKET_DATA_MODE=standin,
+so no network or market hours are needed and upstream latency is set by
+--upstream-latency-ms. A single generator process handles a few
+thousand clients; for more, run several with --server-pid pointing at
+the server.
+
+Usage (from backend/):
+    python bench/ws_load.py --start-server --clients 2000 --duration 60
+    python bench/ws_load.py --url ws://127.0.0.1:8000/ws/live --server-pid 1234 \\
+        --clients 500 --symbols NIFTY,BANKNIFTY --deltas --format msgpack --json-out ws.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_server import get_json, percentiles, proc_sample, start_server, stop_server  # noqa: E402
+
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class Stats:
+    def __init__(self):
+        self.connected = 0
+        self.failed = 0
+        self.closed_by_server = 0
+        self.connect_ms = []
+        self.latency_ms = []
+        self.frames = 0
+        self.bytes = 0
+        self.seq_gaps = 0
+        self.errors = {}
+
+    def error(self, e: Exception):
+        name = type(e).__name__
+        self.errors[name] = self.errors.get(name, 0) + 1
+
+
+def _frame_info(message):
+    """(seq, ts) of a data frame, or None for protocol replies."""
+    data = msgpack.unpackb(message) if isinstance(message, bytes) else json.loads(message)
+    kind = data.get("type")
+    if kind == "delta":
+        ts = next((op.get("value") for op in data["ops"] if op["path"] == "/ts"), None)
+        return data["seq"], ts
+    if kind is not None:
+        return None
+    return data.get("seq"), data.get("ts")
+
+
+async def run_client(url: str, stats: Stats, stop_at: float, measure_from: float):
+    started = time.perf_counter()
+    try:
+        ws = await websockets.connect(url, open_timeout=30, max_size=None, ping_interval=None)
+    except Exception as e:
+        stats.failed += 1
+        stats.error(e)
+        return
+    stats.connected += 1
+    stats.connect_ms.append((time.perf_counter() - started) * 1000)
+    last_seq = None
+    try:
+        while True:
+            remaining = stop_at - time.time()
+            if remaining <= 0:
+                break
+            try:
+                message = await asyncio.wait_for(ws.recv(), remaining)
+            except asyncio.TimeoutError:
+                break
+            now = time.time()
+            info = _frame_info(message)
+            if info is None:
+                continue
+            seq, ts = info
+            if now < measure_from:
+                last_seq = seq
+                continue
+            stats.frames += 1
+            stats.bytes += len(message)
+            if ts is not None:
+                stats.latency_ms.append((now - ts) * 1000)
+            if last_seq is not None and seq is not None and seq > last_seq + 1:
+                stats.seq_gaps += seq - last_seq - 1
+            last_seq = seq
+    except websockets.ConnectionClosed:
+        stats.closed_by_server += 1
+    except Exception as e:
+        stats.error(e)
+    finally:
+        await ws.close()
+
+
+def _client_url(args, i: int) -> str:
+    symbols = args.symbols.split(",")
+    query = f"symbol={symbols[i % len(symbols)]}&interval={args.interval}"
+    if args.format != "json":
+        query += f"&format={args.format}"
+    if args.deltas:
+        query += "&deltas=1"
+    return f"{args.url}?{query}"
+
+
+async def run(args, server_pid):
+    stats = Stats()
+    http_base = "http" + args.url[2:].split("/ws/")[0] if args.url.startswith("ws") else args.url
+    before = proc_sample(server_pid) if server_pid else None
+
+    start = time.time()
+    ramp_end = start + args.ramp_sec
+    measure_from = ramp_end + args.warmup_sec
+    stop_at = measure_from + args.duration
+    tasks = []
+    for i in range(args.clients):
+        delay = args.ramp_sec * i / max(args.clients, 1)
+        await asyncio.sleep(max(0.0, start + delay - time.time()))
+        tasks.append(asyncio.create_task(run_client(_client_url(args, i), stats, stop_at, measure_from)))
+
+    await asyncio.sleep(max(0.0, measure_from - time.time()))
+    steady = proc_sample(server_pid) if server_pid else None
+    await asyncio.sleep(max(0.0, stop_at - time.time() - 0.5))
+    end = proc_sample(server_pid) if server_pid else None
+    hub = None
+    try:
+        hub = get_json(f"{http_base}/api/ws_hub")
+    except Exception as e:
+        stats.error(e)
+    await asyncio.gather(*tasks)
+
+    result = {
+        "clients": args.clients,
+        "connected": stats.connected,
+        "failed": stats.failed,
+        "closed_by_server": stats.closed_by_server,
+        "connect_ms": percentiles(stats.connect_ms),
+        "frames": stats.frames,
+        "frames_per_client_per_sec": round(stats.frames / max(stats.connected, 1) / args.duration, 3),
+        "bytes_per_frame": round(stats.bytes / max(stats.frames, 1)),
+        "frame_latency_ms": percentiles(stats.latency_ms),
+        "seq_gaps": stats.seq_gaps,
+        "errors": stats.errors,
+        "hub": hub and {**hub.get("totals", {}), **hub.get("clients", {})},
+    }
+    if server_pid and before and steady and end:
+        wall = end["t"] - steady["t"]
+        cpu_pct = (end["cpu_s"] - steady["cpu_s"]) / wall * 100 if wall > 0 else None
+        per = max(stats.connected, 1)
+        result["server"] = {
+            "cpu_pct": round(cpu_pct, 1) if cpu_pct is not None else None,
+            "cpu_pct_per_client": round(cpu_pct / per, 4) if cpu_pct is not None else None,
+            "rss_mb": round(end["rss"] / 2**20, 1),
+            "rss_kb_per_client": round((end["rss"] - before["rss"]) / 1024 / per, 1),
+        }
+    return result
+
+
+def print_report(result: dict):
+    lat = result["frame_latency_ms"]
+    con = result["connect_ms"]
+    rows = [
+        ("Clients connected", f"{result['connected']} / {result['clients']} (failed {result['failed']}, "
+                              f"closed by server {result['closed_by_server']})"),
+        ("Connect ms p50/p95/p99", f"{con['p50']} / {con['p95']} / {con['p99']}"),
+        ("Frame latency ms p50/p95/p99", f"{lat['p50']} / {lat['p95']} / {lat['p99']}"),
+        ("Frames received", f"{result['frames']} ({result['frames_per_client_per_sec']}/client/s, "
+                            f"{result['bytes_per_frame']} B avg)"),
+        ("Seq gaps (frames not seen)", result["seq_gaps"]),
+    ]
+    if result.get("hub"):
+        hub = result["hub"]
+        rows.append(("Hub dropped / slow disconnects", f"{hub.get('frames_dropped')} / {hub.get('slow_disconnects')}"))
+    if result.get("server"):
+        srv = result["server"]
+        rows.append(("Server CPU", f"{srv['cpu_pct']}% ({srv['cpu_pct_per_client']}% per client)"))
+        rows.append(("Server RSS", f"{srv['rss_mb']} MB ({srv['rss_kb_per_client']} KB per client)"))
+    if result["errors"]:
+        rows.append(("Errors", json.dumps(result["errors"])))
+    print("| Metric | Value |")
+    print("|--------|-------|")
+    for name, value in rows:
+        print(f"| {name} | {value} |")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="ws://127.0.0.1:8765/ws/live")
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--symbols", default="NIFTY,BANKNIFTY")
+    parser.add_argument("--interval", type=int, default=5)
+    parser.add_argument("--format", choices=("json", "msgpack"), default="json")
+    parser.add_argument("--deltas", action="store_true")
+    parser.add_argument("--ramp-sec", type=float, default=10.0, help="spread connects over this long")
+    parser.add_argument("--warmup-sec", type=float, default=5.0, help="ignore frames for this long after the ramp")
+    parser.add_argument("--duration", type=float, default=30.0, help="measurement window")
+    parser.add_argument("--start-server", action="store_true", help="run the app locally against the stand-in")
+    parser.add_argument("--upstream-latency-ms", type=float, default=50.0)
+    parser.add_argument("--server-pid", type=int, help="server process to sample (default: the started one)")
+    parser.add_argument("--json-out", help="also write the result as JSON")
+    args = parser.parse_args()
+
+    if websockets is None:
+        sys.exit("websockets is required: pip install websockets")
+    if args.format == "msgpack" and msgpack is None:
+        sys.exit("msgpack is required for --format msgpack: pip install msgpack")
+
+    proc = None
+    if args.start_server:
+        port = urlparse(args.url).port or 8765
+        proc = start_server(port, latency_ms=args.upstream_latency_ms)
+    try:
+        result = asyncio.run(run(args, args.server_pid or (proc.pid if proc else None)))
+    finally:
+        if proc is not None:
+            stop_server(proc)
+
+    result["config"] = {k: v for k, v in vars(args).items() if k not in ("json_out",)}
+    print_report(result)
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,13 @@
 import threading
 import time
 from cache_helper import cache_set, cache_get
+from rate_limit import RateLimited
 
 # Data providers
 from global_cues import get_global_cues
 from vix import get_india_vix
-from fii_dii import get_fii_dii_trend
+from session_data import session_fii_dii_trend, session_upcoming_results
 from news_sentiment import fetch_filtered_news, analyze_sentiment
-from earnings import fetch_upcoming_results
 
 # Optional (only if you added sector heatmap API)
 try:
@@ -77,8 +77,11 @@ def background_cache_loop():
     while True:
         try:
             # ----------- VIX FIRST (for adaptive TTLs) ------------
-            vix_val = get_india_vix()
-            cache_set("india_vix", vix_val, ttl=30)
+            try:
+                vix_val = get_india_vix()
+                cache_set("india_vix", vix_val, ttl=30)
+            except RateLimited:
+                vix_val = cache_get("india_vix")
 
             # ----------- GLOBAL CUES (adaptive) -------------------
             gc_ttl = ttl_for_global(vix_val)
@@ -87,7 +90,7 @@ def background_cache_loop():
 
             # ----------- FII/DII (adaptive) -----------------------
             fii_ttl = ttl_for_fii(vix_val)
-            fii_data = get_fii_dii_trend()
+            fii_data = session_fii_dii_trend()
             cache_set("fii_dii", fii_data, ttl=fii_ttl)
 
             # ----------- NEWS (adaptive) --------------------------
@@ -102,7 +105,7 @@ def background_cache_loop():
             }, ttl=news_ttl)
 
             # ----------- EARNINGS CALENDAR ------------------------
-            earnings_list = fetch_upcoming_results()
+            earnings_list = session_upcoming_results()
             cache_set("earnings", earnings_list, ttl=300)
 
             # ----------- SECTOR HEATMAP (optional) ---------------
@@ -2,7 +2,7 @@
 Simple time-based cache for external API calls.
 """
 import time
-from typing import Any, Callable, Optional
+from typing import Any, Callable, Optional, Tuple
 
 _cache = {}
 
@@ -79,3 +79,11 @@ def clear_cache(key: Optional[str] = None):
         _cache.pop(key, None)
     else:
         _cache.clear()
+
+
+def cache_entry(key: str) -> Optional[Tuple[float, Any]]:
+    """
+    Get (timestamp, value) for key without expiry check.
+    Unlike cache_get, distinguishes a cached None from a missing key.
+    """
+    return _cache.get(key)
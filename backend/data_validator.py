@@ -2,9 +2,12 @@
 Data validation and normalization utilities.
 Ensures consistent, safe data handling across all endpoints.
 """
+import logging
 import math
 from typing import Optional, Tuple, Dict, Any
 
+log = logging.getLogger(__name__)
+
 
 def validate_price(price: float, prev_close: Optional[float] = None) -> Tuple[bool, Optional[str]]:
     """
@@ -62,7 +65,7 @@ def normalize_price_data(
     # Validate last price - ALWAYS required
     if last is None or not math.isfinite(last) or last <= 0:
         result["error"] = f"Invalid last price: {last}"
-        print(f"⚠️ DATA VALIDATION: {symbol} - {result['error']}")
+        log.warning("⚠️ DATA VALIDATION: %s - %s", symbol, result["error"])
         return result
     
     result["lastPrice"] = round(float(last), 2)
@@ -84,7 +87,7 @@ def normalize_price_data(
         result["anomaly"] = True
         result["pctChangeAvailable"] = False
         result["error"] = f"Extreme change detected: {change_pct:.2f}%"
-        print(f"⚠️ ANOMALY: {symbol} - last={last}, prev={prev_close}, change={change_pct:.2f}%")
+        log.warning("⚠️ ANOMALY: %s - last=%s, prev=%s, change=%.2f%%", symbol, last, prev_close, change_pct)
         # Keep lastPrice, but suppress % change
         return result
     
@@ -111,17 +114,17 @@ def validate_indicator(value: float, name: str, min_val: Optional[float] = None)
     try:
         val = float(value)
     except (TypeError, ValueError):
-        print(f"⚠️ INDICATOR: {name} - cannot convert to float: {value}")
+        log.debug("INDICATOR: %s - cannot convert to float: %s", name, value)
         return None
     
     # Check for NaN or infinite
     if not math.isfinite(val):
-        print(f"⚠️ INDICATOR: {name} - not finite: {val}")
+        log.debug("INDICATOR: %s - not finite: %s", name, val)
         return None
     
     # Check minimum value
     if min_val is not None and val < min_val:
-        print(f"⚠️ INDICATOR: {name} - below minimum {min_val}: {val}")
+        log.debug("INDICATOR: %s - below minimum %s: %s", name, min_val, val)
         return None
     
     return val
@@ -1,4 +1,5 @@
-import requests
+from outbound import http_get
+from rate_limit import PRIORITY_NEWS
 from datetime import datetime, timedelta
 
 USER_AGENT = {"User-Agent": "Mozilla/5.0"}
@@ -11,12 +12,14 @@ def fetch_upcoming_results():
         { "company": "TCS", "date": "2024-10-12", "sector": "IT" },
         ...
       ]
+    Raises on an HTTP error.
     """
     url = "https://www.moneycontrol.com/stocks/marketinfo/upcoming_results.php"
-    r = requests.get(url, headers=USER_AGENT, timeout=8)
+    r = http_get(url, PRIORITY_NEWS, headers=USER_AGENT, timeout=8)
 
     if r.status_code != 200:
-        return []
+        # an empty list means "no results scheduled"; a failed scrape must not look like one
+        raise RuntimeError(f"Moneycontrol results calendar returned HTTP {r.status_code}")
 
     from bs4 import BeautifulSoup
     soup = BeautifulSoup(r.text, "html.parser")
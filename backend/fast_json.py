@@ -0,0 +1,95 @@
+"""
+Fast JSON serialization for API responses and WebSocket frames.
+
+Uses orjson when installed (numpy scalars/arrays are serialized natively,
+NaN/Infinity become null); otherwise falls back to the standard json
+module with a pre-pass that does the same conversions. Either way the
+output is strict JSON that browsers' JSON.parse accepts.
+"""
+import datetime
+import json
+import math
+from typing import Any
+
+try:
+    from fastapi.responses import JSONResponse
+except ImportError:  # serializer only (benchmarks, scripts); FastJSONResponse needs fastapi
+    JSONResponse = None
+
+try:
+    import numpy as np
+except ImportError:  # numpy is always present in production; keep this importable without it
+    np = None
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+
+def _default(obj: Any):
+    """Types neither backend serializes natively."""
+    if np is not None:
+        if isinstance(obj, np.generic):
+            return obj.item()
+        if isinstance(obj, np.ndarray):
+            return obj.tolist()
+    if isinstance(obj, (datetime.datetime, datetime.date)):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if hasattr(obj, "isoformat"):  # pandas.Timestamp
+        return obj.isoformat()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def _sanitize(obj: Any):
+    """stdlib fallback: numpy -> Python, NaN/Infinity -> None."""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {k if isinstance(k, str) else str(k): _sanitize(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_sanitize(v) for v in obj]
+    if obj is None or isinstance(obj, (str, bool, int)):
+        return obj
+    return _sanitize(_default(obj))
+
+
+if ORJSON_AVAILABLE:
+    _OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj: Any) -> bytes:
+        try:
+            return orjson.dumps(obj, default=_default, option=_OPTIONS)
+        except orjson.JSONEncodeError:
+            # e.g. non-contiguous or object-dtype arrays
+            return orjson.dumps(_sanitize(obj), option=_OPTIONS)
+else:
+    def dumps(obj: Any) -> bytes:
+        return json.dumps(_sanitize(obj), separators=(",", ":"), allow_nan=False).encode()
+
+
+def dumps_str(obj: Any) -> str:
+    """dumps() as str, for websocket.send_text / SSE frames."""
+    return dumps(obj).decode()
+
+
+def splice(body: bytes, key: str, value: Any) -> bytes:
+    """
+    Append key/value to an already serialized JSON object without
+    re-serializing it (used to add volatile blocks like "meta").
+    """
+    if body == b"{}":
+        return b"{" + dumps(key) + b":" + dumps(value) + b"}"
+    return body[:-1] + b"," + dumps(key) + b":" + dumps(value) + b"}"
+
+
+if JSONResponse is not None:
+    class FastJSONResponse(JSONResponse):
+        """JSONResponse rendered with fast_json.dumps."""
+
+        def render(self, content: Any) -> bytes:
+            return dumps(content)
@@ -1,4 +1,4 @@
-import requests
+from outbound import http_get
 
 def get_fii_dii_trend():
     """
@@ -8,7 +8,7 @@ def get_fii_dii_trend():
     headers = {"User-Agent": "Mozilla/5.0"}
 
     try:
-        data = requests.get(url, headers=headers, timeout=8).json()
+        data = http_get(url, headers=headers, timeout=8).json()
     except:
         return (0, "Unknown", "Could not fetch FII/DII data.")
 
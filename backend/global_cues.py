@@ -1,37 +1,133 @@
-import yfinance as yf
-from api_integrations import get_gift_nifty, get_sgx_nifty, get_usdinr_fx
+import logging
+
+from outbound import yf_download
+import pandas as pd
+from api_integrations import get_gift_nifty, get_sgx_nifty, get_usdinr_fx, GIFT_SYMBOLS
 from data_validator import validate_forex_rate
+from session_data import session_value
+
+log = logging.getLogger(__name__)
+
+# Yahoo tickers for the markets we track directly
+GLOBAL_TICKERS = {
+    "nifty_spot": "^NSEI",
+    "nasdaq": "^NDX",
+    "crude": "CL=F",
+}
 
-def _last_and_change(ticker: str):
+
+def _change_from_history(data):
     """
-    Return (last_price, pct_change_today) for ticker.
+    Return (last_price, pct_change_today) from a daily OHLC frame.
     pct_change_today is % vs previous close.
     """
-    try:
-        data = yf.Ticker(ticker).history(period="5d", interval="1d")
-        if data.empty:
-            return None, None
-        
-        # Flatten MultiIndex columns if they exist
-        if hasattr(data.columns, 'levels'):
-            data.columns = data.columns.get_level_values(0)
-        
-        if len(data) < 2:
-            # Only 1 day of data - return last price with no change
-            last = float(data["Close"].iloc[-1])
-            return last, 0.0
-        
-        prev = float(data["Close"].iloc[-2])
+    if data is None or data.empty:
+        return None, None
+
+    # Flatten MultiIndex columns if they exist
+    if hasattr(data.columns, 'levels'):
+        data.columns = data.columns.get_level_values(0)
+
+    if len(data) < 2:
+        # Only 1 day of data - return last price with no change
         last = float(data["Close"].iloc[-1])
-        
-        if prev == 0:
-            return last, 0.0
-        
-        change_pct = (last - prev) / prev * 100.0
-        return last, change_pct
+        return last, 0.0
+
+    prev = float(data["Close"].iloc[-2])
+    last = float(data["Close"].iloc[-1])
+
+    if prev == 0:
+        return last, 0.0
+
+    change_pct = (last - prev) / prev * 100.0
+    return last, change_pct
+
+
+def _batch_download(tickers, period: str, interval: str):
+    """
+    Download bars for all tickers in one Yahoo round trip.
+    Returns { ticker: DataFrame } for tickers that returned data.
+    """
+    try:
+        data = yf_download(
+            list(tickers),
+            period=period,
+            interval=interval,
+            group_by="ticker",
+            auto_adjust=False,
+            progress=False,
+            threads=True,
+        )
     except Exception as e:
-        print(f"⚠️ Failed to fetch {ticker}: {e}")
-        return None, None
+        log.warning("⚠️ Batched %s download failed: %s", interval, e)
+        return {}
+
+    out = {}
+    for ticker in tickers:
+        try:
+            if isinstance(data.columns, pd.MultiIndex):
+                if ticker not in data.columns.get_level_values(0):
+                    continue
+                frame = data[ticker]
+            else:
+                frame = data
+            frame = frame.dropna(subset=["Close"])
+            if not frame.empty:
+                out[ticker] = frame
+        except Exception as e:
+            log.warning("⚠️ No batched data for %s: %s", ticker, e)
+    return out
+
+
+def fetch_daily_history(tickers, period: str = "5d"):
+    """Daily bars for all tickers in one request."""
+    return _batch_download(tickers, period, "1d")
+
+
+def fetch_live_snapshot(tickers):
+    """
+    Latest intraday close per ticker in one request.
+    Returns { ticker: (last_price, session_date) }.
+    """
+    out = {}
+    for ticker, frame in _batch_download(tickers, "1d", "5m").items():
+        out[ticker] = (float(frame["Close"].iloc[-1]), frame.index[-1].date())
+    return out
+
+
+def _patch_live(daily, live):
+    """
+    Combine session-static daily bars with a live (price, date) point:
+    today's bar gets the live close, or a new bar is appended when the
+    daily history does not include the live session yet.
+    """
+    if daily is None or live is None:
+        return daily
+
+    price, live_date = live
+    patched = daily.copy()
+    if hasattr(patched.columns, 'levels'):
+        patched.columns = patched.columns.get_level_values(0)
+
+    if patched.index[-1].date() >= live_date:
+        patched.iloc[-1, patched.columns.get_loc("Close")] = price
+    else:
+        patched.loc[pd.Timestamp(live_date).tz_localize(patched.index.tz), "Close"] = price
+    return patched
+
+
+def session_daily_history(tickers):
+    """
+    5-day daily history, loaded once per IST session. Reloaded at the
+    Indian open and after the US open so previous closes stay current.
+    """
+    return session_value(
+        "global_daily_history",
+        fetch_daily_history,
+        list(tickers),
+        publish_times=((9, 15), (19, 0)),
+        is_valid=bool,
+    )
 
 
 def get_global_cues():
@@ -44,14 +140,27 @@ def get_global_cues():
       - Crude oil                                  -> CL=F
       - USDINR (Twelve Data / Alpha Vantage)       -> Multi-source FX feed
     Returns dict with last + change_pct for each.
+
+    The direct tickers and the GIFT probe tickers come from one batched
+    Yahoo download; GIFT/SGX fall back to the NIFTY series fetched here
+    rather than downloading ^NSEI again.
+
+    Daily history (previous closes) is session-static; each refresh only
+    downloads a live intraday snapshot and patches it onto that history.
     """
-    nifty_last, nifty_chg = _last_and_change("^NSEI")
-    nasdaq_last, nasdaq_chg = _last_and_change("^NDX")
-    crude_last, crude_chg = _last_and_change("CL=F")
-    
-    # Use dedicated API integrations
-    gift_last, gift_chg = get_gift_nifty()
-    sgx_last, sgx_chg = get_sgx_nifty()
+    tickers = list(GLOBAL_TICKERS.values()) + GIFT_SYMBOLS
+    daily = session_daily_history(tickers)
+    live = fetch_live_snapshot(tickers)
+    history = {t: _patch_live(frame, live.get(t)) for t, frame in daily.items()}
+
+    nifty_last, nifty_chg = _change_from_history(history.get(GLOBAL_TICKERS["nifty_spot"]))
+    nasdaq_last, nasdaq_chg = _change_from_history(history.get(GLOBAL_TICKERS["nasdaq"]))
+    crude_last, crude_chg = _change_from_history(history.get(GLOBAL_TICKERS["crude"]))
+
+    # Use dedicated API integrations, sharing the batched NIFTY series
+    nifty_proxy = (nifty_last, nifty_chg)
+    gift_last, gift_chg = get_gift_nifty(history=history, nifty_proxy=nifty_proxy)
+    sgx_last, sgx_chg = get_sgx_nifty(nifty_proxy=nifty_proxy)
     usdinr_last, usdinr_chg = get_usdinr_fx()
     
     # Validate USD/INR with proper range checking (70-95)
@@ -59,7 +168,7 @@ def get_global_cues():
     usdinr_pct_available = usdinr_valid  # Only show % if within valid range
     
     if not usdinr_valid:
-        print(f"⚠️ USD/INR validation failed: {usdinr_error}")
+        log.warning("⚠️ USD/INR validation failed: %s", usdinr_error)
         # Still send lastPrice, but mark pctChangeAvailable = false
         validated_usdinr = usdinr_last if usdinr_last else None
         usdinr_chg = None
@@ -69,9 +178,9 @@ def get_global_cues():
     sgx_is_proxy = (sgx_last == nifty_last) if (sgx_last and nifty_last) else False
     
     if gift_is_proxy:
-        print(f"⚠️ GIFT Nifty mirroring NIFTY spot - using proxy fallback")
+        log.warning("⚠️ GIFT Nifty mirroring NIFTY spot - using proxy fallback")
     if sgx_is_proxy:
-        print(f"⚠️ SGX Nifty mirroring NIFTY spot - using proxy fallback")
+        log.warning("⚠️ SGX Nifty mirroring NIFTY spot - using proxy fallback")
 
     return {
         "nifty_spot": {
@@ -110,6 +219,22 @@ def get_global_cues():
     }
 
 
+def empty_global_cues():
+    """
+    Same shape as get_global_cues() with every value missing.
+    Used when global cues are unavailable and nothing is cached yet.
+    """
+    missing = {"last": None, "change_pct": None, "pct_change_available": False}
+    return {
+        "nifty_spot": dict(missing),
+        "gift_nifty": dict(missing, proxy=False),
+        "sgx_nifty": dict(missing, proxy=False),
+        "nasdaq": dict(missing),
+        "crude": dict(missing),
+        "usdinr": dict(missing, quality_warning=True),
+    }
+
+
 def compute_global_bias(global_data: dict):
     """
     Convert global % changes into a bias score [-1..1] and comments.
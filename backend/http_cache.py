@@ -0,0 +1,149 @@
+"""
+Conditional GET support (ETag / If-None-Match, Last-Modified / If-Modified-Since).
+
+Polled endpoints return their payload through conditional_json(). The
+ETag is either derived from the content (a hash of the JSON body without
+volatile keys such as "meta") or supplied by the caller from cheap
+version counters, so an unchanged resource costs a 304 with no body.
+
+Last-Modified is the time a resource's current ETag was first seen. It
+only has 1-second resolution, so If-Modified-Since is a fallback for
+clients that send no ETag, and it is not trusted for a version that
+replaced another within the same second.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Iterable, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from fast_json import dumps, splice
+
+MAX_TRACKED = 2048
+CACHE_CONTROL = "no-cache"  # clients may store, but must revalidate
+
+# resource key -> (etag, first seen, same second as the previous version)
+_versions: "OrderedDict[str, tuple]" = OrderedDict()
+_versions_lock = threading.Lock()
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=12).hexdigest()
+
+
+def content_etag(body: bytes) -> str:
+    """Strong ETag over serialized content."""
+    return f'"{_digest(body)}"'
+
+
+def version_etag(*parts) -> str:
+    """Weak ETag from version counters (equivalent content, not byte-identical)."""
+    return f'W/"{_digest(repr(parts).encode())}"'
+
+
+def resource_key(request: Request) -> str:
+    return f"{request.url.path}?{'&'.join(sorted(f'{k}={v}' for k, v in request.query_params.items()))}"
+
+
+def _last_modified(key: str, etag: str) -> tuple:
+    """(first seen, ambiguous): ambiguous when the previous version has the same Last-Modified second."""
+    with _versions_lock:
+        entry = _versions.get(key)
+        if entry is None or entry[0] != etag:
+            now = time.time()
+            entry = (etag, now, entry is not None and int(entry[1]) == int(now))
+            _versions[key] = entry
+        _versions.move_to_end(key)
+        while len(_versions) > MAX_TRACKED:
+            _versions.popitem(last=False)
+        return entry[1], entry[2]
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def is_fresh(request: Request, etag: str, modified: float, use_date: bool = True) -> bool:
+    """
+    True when the client's cached copy is still current (weak comparison).
+
+    If-None-Match takes precedence and If-Modified-Since is then ignored
+    (RFC 9110 13.2.2); the date is only checked when no ETag is sent and
+    use_date allows it.
+    """
+    inm = request.headers.get("if-none-match")
+    if inm is not None:
+        if inm.strip() == "*":
+            return True
+        return _opaque(etag) in {_opaque(t) for t in inm.split(",")}
+
+    ims = request.headers.get("if-modified-since")
+    if ims and use_date:
+        try:
+            return int(modified) <= parsedate_to_datetime(ims).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _validators(etag: str, modified: float) -> dict:
+    return {
+        "ETag": etag,
+        "Last-Modified": formatdate(modified, usegmt=True),
+        "Cache-Control": CACHE_CONTROL,
+    }
+
+
+def _render(payload, volatile: Iterable[str]):
+    """
+    (body, stable_body): the JSON body, and the part of it without the
+    volatile keys that the content ETag is computed from. Volatile keys
+    are spliced on afterwards so nothing is serialized twice.
+    """
+    if not isinstance(payload, dict):
+        body = dumps(payload)
+        return body, body
+    extra = [k for k in volatile if k in payload]
+    if not extra:
+        body = dumps(payload)
+        return body, body
+    stable = dumps({k: v for k, v in payload.items() if k not in extra})
+    body = stable
+    for key in extra:
+        body = splice(body, key, payload[key])
+    return body, stable
+
+
+def conditional_json(
+    request: Request,
+    payload,
+    etag: Optional[str] = None,
+    volatile: Iterable[str] = ("meta",),
+    headers: Optional[dict] = None,
+) -> Response:
+    """
+    JSON response with ETag/Last-Modified, or an empty 304 when the
+    request's If-None-Match / If-Modified-Since still matches.
+
+    With etag=None the ETag is computed from the payload minus volatile keys.
+    """
+    body = None
+    if etag is None:
+        body, stable = _render(payload, volatile)
+        etag = content_etag(stable)
+
+    modified, ambiguous = _last_modified(resource_key(request), etag)
+    response_headers = {**(headers or {}), **_validators(etag, modified)}
+
+    # a date-only client can't tell two versions of the same second apart: send the body
+    if is_fresh(request, etag, modified, use_date=not ambiguous):
+        return Response(status_code=304, headers=response_headers)
+
+    if body is None:
+        body = dumps(payload)
+    return Response(body, media_type="application/json", headers=response_headers)
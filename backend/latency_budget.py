@@ -0,0 +1,145 @@
+"""
+Per-request latency budget for slow upstream stages.
+
+Each stage of /api/signal_live gets a share of the request deadline.
+A stage that misses its share returns its last-known-good value (marked
+stale) while the fetch keeps running in the background and refreshes
+the cache for the next request.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, Optional
+
+from cache_helper import cache_entry, cache_set
+
+log = logging.getLogger(__name__)
+
+DEFAULT_DEADLINE_MS = int(os.environ.get("SIGNAL_DEADLINE_MS", "2500"))
+
+# Background fetches outlive the request that started them, so they run
+# on a dedicated pool rather than the request's worker thread.
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="budget")
+
+# One in-flight fetch per cache key, shared by concurrent requests
+_inflight: Dict[str, Future] = {}
+_inflight_lock = threading.Lock()
+
+
+def _run_and_cache(key: str, func: Callable, accept: Optional[Callable], args, kwargs):
+    try:
+        result = func(*args, **kwargs)
+        if accept is None or accept(result):
+            cache_set(key, result)
+        else:
+            raise ValueError(f"{key}: provider returned unusable data")
+        return result
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+
+def _ensure_inflight(key: str, func: Callable, accept: Optional[Callable], args, kwargs) -> Future:
+    with _inflight_lock:
+        future = _inflight.get(key)
+        if future is None:
+            future = _executor.submit(_run_and_cache, key, func, accept, args, kwargs)
+            _inflight[key] = future
+        return future
+
+
+def _is_fresh(key: str, ttl_seconds: float) -> bool:
+    entry = cache_entry(key)
+    return entry is not None and time.time() - entry[0] < ttl_seconds
+
+
+class LatencyBudget:
+    """
+    Deadline shared by all stages of one request.
+
+    Usage:
+        budget = LatencyBudget()
+        budget.start("news_NIFTY", fetch_filtered_news, 60, q)   # optional prefetch
+        headlines = budget.call("news", "news_NIFTY", fetch_filtered_news, 60, q, default=[])
+        meta = budget.meta()
+    """
+
+    def __init__(self, deadline_ms: Optional[int] = None):
+        self.deadline_ms = deadline_ms or DEFAULT_DEADLINE_MS
+        self.started = time.monotonic()
+        self.deadline = self.started + self.deadline_ms / 1000.0
+        self.stale: Dict[str, Dict[str, Any]] = {}
+
+    def remaining(self) -> float:
+        """Seconds left before the request deadline."""
+        return max(0.0, self.deadline - time.monotonic())
+
+    def start(
+        self,
+        key: str,
+        func: Callable,
+        ttl_seconds: float,
+        *args,
+        accept: Optional[Callable] = None,
+        **kwargs
+    ):
+        """
+        Kick off a fetch early so independent stages overlap.
+        No-op if the cached value is still fresh or a fetch is in flight.
+        """
+        if not _is_fresh(key, ttl_seconds):
+            _ensure_inflight(key, func, accept, args, kwargs)
+
+    def call(
+        self,
+        stage: str,
+        key: str,
+        func: Callable,
+        ttl_seconds: float,
+        *args,
+        share: float = 1.0,
+        default: Any = None,
+        accept: Optional[Callable] = None,
+        **kwargs
+    ) -> Any:
+        """
+        Like cached_call, but waits at most `share` of the total deadline
+        (capped by what is left of it). On timeout or error, returns the
+        last cached value - or `default` if there is none - and records
+        the stage as stale. `accept` rejects error payloads so they never
+        replace a good cached value.
+        """
+        entry = cache_entry(key)
+        if entry is not None and time.time() - entry[0] < ttl_seconds:
+            return entry[1]
+
+        future = _ensure_inflight(key, func, accept, args, kwargs)
+        wait = min(self.remaining(), share * self.deadline_ms / 1000.0)
+
+        try:
+            return future.result(timeout=wait)
+        except FutureTimeout:
+            reason = "timeout"
+        except Exception as e:
+            reason = f"error: {type(e).__name__}"
+            log.warning("⚠️ Stage %s failed: %s", stage, e)
+
+        # Re-read: the background fetch may have refreshed it meanwhile
+        entry = cache_entry(key)
+        if entry is None:
+            self.stale[stage] = {"reason": reason, "age_s": None}
+            return default
+
+        timestamp, value = entry
+        self.stale[stage] = {"reason": reason, "age_s": round(time.time() - timestamp, 1)}
+        return value
+
+    def meta(self) -> Dict[str, Any]:
+        """Summary for the response's meta block."""
+        return {
+            "deadline_ms": self.deadline_ms,
+            "elapsed_ms": round((time.monotonic() - self.started) * 1000, 1),
+            "stale": self.stale,
+        }
@@ -1,6 +1,9 @@
+import logging
 import time
 from collections import deque
-from typing import Dict, Deque, List
+from typing import Callable, Dict, Deque, List
+
+log = logging.getLogger(__name__)
 
 # One OHLC candle structure
 class Candle:
@@ -22,15 +25,16 @@ class Candle:
 
 # Per-symbol state
 class CandleEngine:
-    def __init__(self, interval_sec: int = 60, max_candles: int = 100):
+    def __init__(self, interval_sec: int = 60, max_candles: int = 100, clock: Callable[[], float] = time.time):
         self.interval_sec = interval_sec
         self.max_candles = max_candles
+        self.clock = clock  # market_replay.py injects a simulated clock
         self.current_candle: Candle | None = None
         self.candles: Deque[Candle] = deque()
 
     def update_with_price(self, price: float, now: float | None = None):
         if now is None:
-            now = time.time()
+            now = self.clock()
 
         if self.current_candle is None:
             # first tick -> start new candle
@@ -60,32 +64,41 @@ class CandleEngine:
 # Global registry: one engine per symbol+interval
 _engines: Dict[str, CandleEngine] = {}
 
+def _key(symbol: str, interval_sec: int) -> str:
+    return f"{symbol.upper()}_{interval_sec}"
+
+
 def get_engine(symbol: str, interval_sec: int, max_candles: int = 100) -> CandleEngine:
     """
     Get or create a candle engine for symbol+interval.
     On first creation, pre-populate with historical data from yfinance.
     """
-    key = f"{symbol.upper()}_{interval_sec}"
+    key = _key(symbol, interval_sec)
     if key not in _engines:
-        print(f"🔧 Creating new engine for {key} with max_candles={max_candles}")
+        log.info("🔧 Creating new engine for %s with max_candles=%s", key, max_candles)
         engine = CandleEngine(interval_sec=interval_sec, max_candles=max_candles)
         # Pre-populate with historical data
         _prepopulate_engine(engine, symbol, interval_sec, max_candles)
-        print(f"📊 Engine {key} now has {len(engine.candles)} historical candles")
+        log.info("📊 Engine %s now has %d historical candles", key, len(engine.candles))
         _engines[key] = engine
     else:
-        print(f"♻️ Reusing existing engine for {key} with {len(_engines[key].candles)} candles")
+        log.debug("♻️ Reusing existing engine for %s with %d candles", key, len(_engines[key].candles))
     return _engines[key]
 
 
+def set_engine(symbol: str, interval_sec: int, engine: CandleEngine):
+    """Install a prepared engine (e.g. a replay's) in place of the live one."""
+    _engines[_key(symbol, interval_sec)] = engine
+
+
 def _prepopulate_engine(engine: CandleEngine, symbol: str, interval_sec: int, max_candles: int):
     """
     Pre-populate engine with historical candles from yfinance to provide
     sufficient data for technical indicators (RSI needs 14+, EMA200 needs 200+).
     """
     try:
-        import yfinance as yf
         import pandas as pd
+        from outbound import yf_download
         
         # Map symbol to Yahoo Finance ticker
         ticker_map = {
@@ -113,10 +126,10 @@ def _prepopulate_engine(engine: CandleEngine, symbol: str, interval_sec: int, ma
             period = "max"  # Max daily data
         
         # Download historical data
-        df = yf.download(ticker, period=period, interval=interval_str, auto_adjust=True, progress=False)
+        df = yf_download(ticker, period=period, interval=interval_str, auto_adjust=True, progress=False)
         
         if df.empty:
-            print(f"⚠️ No historical data available for {symbol} from yfinance")
+            log.warning("⚠️ No historical data available for %s from yfinance", symbol)
             return
         
         # Flatten MultiIndex columns if they exist
@@ -141,7 +154,7 @@ def _prepopulate_engine(engine: CandleEngine, symbol: str, interval_sec: int, ma
             candle.close = close_price
             engine.candles.append(candle)
         
-        print(f"✅ Pre-populated {len(engine.candles)} historical candles for {symbol}")
+        log.info("✅ Pre-populated %d historical candles for %s", len(engine.candles), symbol)
         
     except Exception as e:
-        print(f"⚠️ Failed to pre-populate {symbol}: {e}")
+        log.warning("⚠️ Failed to pre-populate %s: %s", symbol, e)
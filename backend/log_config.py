@@ -0,0 +1,77 @@
+"""
+Logging setup: level-gated, sampled, and non-blocking.
+
+setup_logging() routes the root logger through a QueueHandler; a single
+QueueListener thread does the actual stdout writes, so request threads
+only enqueue records.
+
+Environment:
+    LOG_LEVEL         DEBUG / INFO / WARNING / ... (default INFO)
+    LOG_FORMAT        "text" (default) or "json" (one JSON object per line)
+    LOG_DEBUG_SAMPLE  fraction of per-request debug lines to keep (default 0.01)
+
+Hot paths guard expensive debug output with
+    if log.isEnabledFor(logging.DEBUG) and sampled(): ...
+so nothing is formatted unless it will be written.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "text").lower()
+DEBUG_SAMPLE_RATE = float(os.environ.get("LOG_DEBUG_SAMPLE", "0.01"))
+
+TEXT_FORMAT = "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record; extra={"...": ...} fields are included."""
+
+    _RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in self._RESERVED:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def sampled(rate: float = None) -> bool:
+    """True for roughly `rate` (default LOG_DEBUG_SAMPLE) of calls."""
+    rate = DEBUG_SAMPLE_RATE if rate is None else rate
+    return rate >= 1.0 or random.random() < rate
+
+
+def setup_logging():
+    """Install the queue handler on the root logger (idempotent)."""
+    global _listener
+    if _listener is not None:
+        return
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.handlers = [logging.handlers.QueueHandler(log_queue)]
+    root.setLevel(getattr(logging, LOG_LEVEL, logging.INFO))
+
+    _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
@@ -0,0 +1,167 @@
+"""
+Record / replay of upstream market-data responses.
+
+MARKET_DATA_MODE=record wraps every outbound.PROVIDERS call. The live
+call still happens, and its result (or exception) is appended to the
+archive file together with when it was made and how long it took.
+
+MARKET_DATA_MODE=replay serves those results back without touching the
+network:
+    - MARKET_DATA_SPEED=1 (default) replays with the original timing: a
+      call made N seconds into the replay gets the response recorded
+      N seconds into the recording, after the recorded latency.
+    - MARKET_DATA_SPEED=10 runs the same timeline 10x faster.
+    - MARKET_DATA_SPEED=0 ignores time: each call gets the next recorded
+      response for the same request, with no delay. Runs are deterministic.
+
+Calls are matched on provider and arguments (timeouts and headers are
+ignored). A request that was never recorded raises LookupError, which
+the providers' fallback chains treat like any upstream failure.
+
+Environment:
+    MARKET_DATA_ARCHIVE   archive file (default data/market_archive.pkl)
+    MARKET_DATA_SPEED     replay speed, see above (default 1)
+
+Record with a single worker; the archive is one append-only pickle stream.
+
+    python market_archive.py [archive]   # summary of a recorded archive
+"""
+import logging
+import os
+import pickle
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict
+
+log = logging.getLogger(__name__)
+
+ARCHIVE_PATH = os.environ.get(
+    "MARKET_DATA_ARCHIVE", os.path.join(os.path.dirname(__file__), "data", "market_archive.pkl")
+)
+SPEED = float(os.environ.get("MARKET_DATA_SPEED", "1"))
+
+IGNORED_KWARGS = {"timeout", "headers", "progress", "proxies", "verify"}
+
+
+def request_key(provider: str, args: tuple, kwargs: dict) -> str:
+    """Stable identity of a provider call."""
+    kept = sorted((k, v) for k, v in kwargs.items() if k not in IGNORED_KWARGS)
+    return f"{provider}{args!r}{kept!r}"
+
+
+def _picklable_error(e: Exception) -> Exception:
+    try:
+        pickle.dumps(e)
+        return e
+    except Exception:
+        return RuntimeError(f"{type(e).__name__}: {e}")
+
+
+class Recorder:
+    def __init__(self, path: str):
+        if os.path.exists(path):
+            log.warning("⚠️ Overwriting market data archive %s", path)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._file = open(path, "wb")
+        self._lock = threading.Lock()
+        self._start = time.time()
+        self.records = 0
+
+    def wrap(self, provider: str, fn: Callable) -> Callable:
+        def recorded(*args, **kwargs):
+            started = time.time()
+            try:
+                result, error = fn(*args, **kwargs), None
+            except Exception as e:
+                result, error = None, e
+            record = {
+                "key": request_key(provider, args, kwargs),
+                "t": started - self._start,
+                "elapsed": time.time() - started,
+                "result": result,
+                "error": error and _picklable_error(error),
+            }
+            with self._lock:
+                pickle.dump(record, self._file, protocol=pickle.HIGHEST_PROTOCOL)
+                self._file.flush()
+                self.records += 1
+            if error is not None:
+                raise error
+            return result
+        return recorded
+
+
+def load(path: str) -> Dict[str, list]:
+    """Archive records grouped by request key, in recorded order."""
+    by_key = defaultdict(list)
+    with open(path, "rb") as f:
+        while True:
+            try:
+                record = pickle.load(f)
+            except EOFError:
+                break
+            by_key[record["key"]].append(record)
+    return by_key
+
+
+class Replayer:
+    def __init__(self, path: str, speed: float = SPEED):
+        self.records = load(path)
+        self.speed = speed
+        self._cursor = defaultdict(int)
+        self._lock = threading.Lock()
+        self._start = time.time()
+        self._missing = set()
+        log.info("▶️ Replaying %d responses from %s at speed %s", sum(map(len, self.records.values())), path, speed)
+
+    def _pick(self, key: str) -> dict:
+        recorded = self.records.get(key)
+        if not recorded:
+            if key not in self._missing:
+                self._missing.add(key)
+                log.warning("⚠️ No recorded response for %s", key)
+            raise LookupError(f"no recorded response for {key}")
+        if self.speed <= 0:
+            with self._lock:
+                i = self._cursor[key]
+                self._cursor[key] = i + 1
+            return recorded[min(i, len(recorded) - 1)]
+        # latest response recorded at or before the same point of the timeline
+        at = (time.time() - self._start) * self.speed
+        chosen = recorded[0]
+        for record in recorded:
+            if record["t"] > at:
+                break
+            chosen = record
+        return chosen
+
+    def wrap(self, provider: str, fn: Callable) -> Callable:
+        def replayed(*args, **kwargs):
+            record = self._pick(request_key(provider, args, kwargs))
+            if self.speed > 0:
+                time.sleep(record["elapsed"] / self.speed)
+            if record["error"] is not None:
+                raise record["error"]
+            return record["result"]
+        return replayed
+
+
+def wrap_providers(providers: Dict[str, Callable], mode: str, path: str = ARCHIVE_PATH) -> Dict[str, Callable]:
+    """outbound.PROVIDERS wrapped for MARKET_DATA_MODE=record or replay."""
+    layer = Recorder(path) if mode == "record" else Replayer(path)
+    if mode == "record":
+        log.info("⏺️ Recording market data responses to %s", path)
+    return {name: layer.wrap(name, fn) for name, fn in providers.items()}
+
+
+if __name__ == "__main__":
+    by_key = load(sys.argv[1] if len(sys.argv) > 1 else ARCHIVE_PATH)
+    span = max((r["t"] for records in by_key.values() for r in records), default=0)
+    print(f"{sum(map(len, by_key.values()))} responses, {len(by_key)} distinct requests, {span:.0f}s recorded")
+    for key, records in sorted(by_key.items(), key=lambda kv: -len(kv[1])):
+        errors = sum(r["error"] is not None for r in records)
+        avg_ms = sum(r["elapsed"] for r in records) / len(records) * 1000
+        print(f"{len(records):6d}  {avg_ms:8.1f} ms  {errors:4d} err  {key[:100]}")
@@ -0,0 +1,331 @@
+"""
+Historical market replay through the live pipeline.
+
+backtest_signals.py scores decide_signal() on CSV rows. This instead
+replays a candle CSV as a stream of price ticks on a simulated clock and
+runs the same code a live server runs on every tick:
+    - the CandleEngine, fed by update_with_price() through the normal
+      price fallback chain
+    - build_packet(), the /ws/live packet, encoded as full and delta
+      frames the way ws_hub would send them
+    - build_signal(), the full /api/signal_live pipeline (MTF, conflict
+      resolution, options analytics, market mood), every --signal-sec
+    - paper trades opened from the signals and closed on SL/TP or after
+      HOLD_CANDLES_MAX candles
+
+Each candle becomes ticks about every --tick-sec along open -> low/high -> close.
+Spot prices come from the CSV. Everything else (news, VIX, global cues,
+option chain) comes from whatever MARKET_DATA_MODE is set. The default
+is the local stand-in with no latency. Use MARKET_DATA_MODE=replay for a
+recorded session. Upstream rate limits are scaled by --speed.
+
+--speed 0 runs as fast as possible and reports pipeline throughput.
+--speed N plays N seconds of market time per second. Overnight gaps are
+skipped.
+
+Usage:
+    python market_replay.py --symbol NIFTY --speed 0 --candles 300
+    python market_replay.py --symbol BANKNIFTY --speed 60 --tick-sec 5 --frames-out frames.jsonl
+    python market_replay.py --csv data/nifty_5m.csv --json-out replay.json
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+
+os.environ.setdefault("MARKET_DATA_MODE", "standin")
+os.environ.setdefault("MARKET_DATA_LATENCY_MS", "0")
+os.environ.setdefault("MARKET_DATA_JITTER_MS", "0")
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+import outbound  # noqa: E402
+import rate_limit  # noqa: E402
+from backtest_signals import HOLD_CANDLES_MAX, STOP_LOSS_PCT, TAKE_PROFIT_PCT  # noqa: E402
+from fast_json import dumps  # noqa: E402
+from latency_budget import LatencyBudget  # noqa: E402
+from live_candles import Candle, CandleEngine, set_engine  # noqa: E402
+from paper_trading import PaperTradingEngine  # noqa: E402
+from price_helper import INDEX_MAP  # noqa: E402
+from signal_pipeline import build_signal  # noqa: E402
+from stage_timing import StageTimer, stage_percentiles  # noqa: E402
+from ws_codec import diff  # noqa: E402
+from ws_live import build_packet  # noqa: E402
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+CSV_FILES = {"NIFTY": "nifty_5m.csv", "BANKNIFTY": "banknifty_5m.csv"}
+
+
+class ReplayClock:
+    """Simulated time; CandleEngine and PaperTradingEngine call it like time.time."""
+
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class ReplayFeed:
+    """Spot price providers that answer from the replay for its symbol."""
+
+    def __init__(self, symbol: str, providers: dict):
+        self.symbol = symbol.upper()
+        self.index_name = INDEX_MAP.get(self.symbol)
+        self.price = None
+        self._nse_fetch = providers["nse_fetch"]
+        self._nse_ltp = providers["nse_ltp"]
+
+    def nse_fetch(self, url: str):
+        data = self._nse_fetch(url)
+        if url.endswith("/allIndices") and self.index_name:
+            rows = [row for row in data.get("data", []) if row.get("index") != self.index_name]
+            data = {**data, "data": rows + [{"index": self.index_name, "last": self.price}]}
+        return data
+
+    def nse_ltp(self, symbol: str):
+        if symbol.upper() == self.symbol:
+            return self.price
+        return self._nse_ltp(symbol)
+
+
+def load_candles(path: str) -> list:
+    """CSV (timestamp in UTC, open, high, low, close) -> [{start_ts, open, high, low, close}]"""
+    df = pd.read_csv(path)
+    df.columns = [c.lower() for c in df.columns]
+    df = df[pd.to_numeric(df["close"], errors="coerce").notna()]  # yfinance exports carry a ticker row
+    ts = pd.to_datetime(df["timestamp"], utc=True)
+    return [
+        {"start_ts": t.timestamp(), "open": float(o), "high": float(h), "low": float(lo), "close": float(c)}
+        for t, o, h, lo, c in zip(ts, df["open"], df["high"], df["low"], df["close"])
+    ]
+
+
+def tick_path(candle: dict, interval_sec: int, tick_sec: float):
+    """(offset, price) ticks along open -> low -> high -> close (high first on down candles)."""
+    o, h, lo, c = candle["open"], candle["high"], candle["low"], candle["close"]
+    points = [o, lo, h, c] if c >= o else [o, h, lo, c]
+    per_leg = max(1, round((interval_sec / tick_sec - 1) / 3))  # so the high and low are hit exactly
+    n = 3 * per_leg + 1
+    for i in range(n):
+        seg = min(i // per_leg, 2)
+        step = i - seg * per_leg
+        yield i * interval_sec / n, round(points[seg] + (points[seg + 1] - points[seg]) * step / per_leg, 2)
+
+
+def scale_rate_limits(speed: float):
+    """Upstream budgets are per wall second; give the replay `speed` times as many."""
+    factor = 1e6 if speed <= 0 else max(speed, 1.0)
+    for host, (rate, burst) in list(rate_limit.LIMITS.items()):
+        rate_limit.LIMITS[host] = (rate * factor, int(burst * factor))
+
+
+class Replay:
+    def __init__(self, args):
+        self.args = args
+        self.symbol = args.symbol.upper()
+        candles = load_candles(args.csv or os.path.join(DATA_DIR, CSV_FILES[self.symbol]))
+        self.interval = args.interval or int(np.median(np.diff([c["start_ts"] for c in candles[:50]])))
+        warm, rest = candles[:args.warmup], candles[args.warmup:]
+        self.candles = rest[:args.candles] if args.candles else rest
+        if not self.candles:
+            raise ValueError(f"No candles left to replay after {args.warmup} warmup candles")
+
+        self.clock = ReplayClock(self.candles[0]["start_ts"])
+        self.engine = CandleEngine(interval_sec=self.interval, max_candles=args.limit, clock=self.clock)
+        for row in warm[-args.limit:]:
+            candle = Candle(start_ts=row["start_ts"], price=row["open"])
+            candle.high, candle.low, candle.close = row["high"], row["low"], row["close"]
+            self.engine.candles.append(candle)
+        set_engine(self.symbol, self.interval, self.engine)
+
+        self.feed = ReplayFeed(self.symbol, outbound.PROVIDERS)
+        outbound.PROVIDERS.update({"nse_fetch": self.feed.nse_fetch, "nse_ltp": self.feed.nse_ltp})
+        scale_rate_limits(args.speed)
+
+        paper_dir = args.paper_dir or tempfile.mkdtemp(prefix="replay-paper-")
+        self.paper = PaperTradingEngine(initial_capital=args.capital, state_dir=paper_dir, clock=self.clock)
+        self.paper.reset()
+        self.entry_ts = {}  # position id -> simulated entry time
+
+        self.timer = StageTimer("replay")
+        self.ticks = 0
+        self.signals = Counter()
+        self.frames = 0
+        self.full_bytes = 0
+        self.sent_bytes = 0
+        self.last_price = None
+        self.previous = None
+        self.frames_out = open(args.frames_out, "w") if args.frames_out else None
+
+    def set_price(self, price: float):
+        self.feed.price = price
+        if outbound.MARKET_DATA_MODE == "standin":
+            from market_standin import set_price
+            set_price(self.symbol, price)  # keeps the stand-in option chain around spot
+
+    def ws_frame(self):
+        with self.timer.stage("packet"):
+            packet, self.last_price = build_packet(self.symbol, self.engine, self.last_price)
+        if packet is None:
+            return
+        packet["stream"] = f"{self.symbol}_{self.interval}"
+        packet["seq"] = self.frames + 1
+        packet["ts"] = self.clock.now
+        with self.timer.stage("encode"):
+            full = dumps(packet)
+            frame = full
+            if self.previous is not None:
+                ops = [op for op in diff(self.previous, packet) if op["path"] != "/seq"]
+                delta = dumps({"type": "delta", "stream": packet["stream"], "seq": packet["seq"],
+                               "base": packet["seq"] - 1, "ops": ops})
+                if len(delta) < len(full):
+                    frame = delta
+        self.previous = packet
+        self.frames += 1
+        self.full_bytes += len(full)
+        self.sent_bytes += len(frame)
+        if self.frames_out:
+            self.frames_out.write(frame.decode() + "\n")
+
+    def signal(self, price: float):
+        with self.timer.stage("signal"):
+            payload = build_signal(self.symbol, self.interval, self.args.limit, LatencyBudget(), StageTimer("signal_replay"))
+        if "error" in payload:
+            self.signals["ERROR"] += 1
+            return
+        signal = payload.get("signal", {})
+        action = signal.get("action", "WAIT")
+        self.signals[action] += 1
+        score = payload.get("final", {}).get("score", 0)
+        if action not in ("BUY", "SELL") or score < self.args.min_score:
+            return
+        if any(p["symbol"] == self.symbol for p in self.paper.positions):
+            return
+        direction = 1 if action == "BUY" else -1
+        result = self.paper.open_position(
+            self.symbol, action, price, self.args.qty,
+            stop_loss=round(price * (1 - direction * STOP_LOSS_PCT), 2),
+            take_profit=round(price * (1 + direction * TAKE_PROFIT_PCT), 2),
+            signal_confidence=signal.get("confidence", 0.0),
+            ml_score=payload.get("ml_view", {}).get("final_ml_score"),
+        )
+        if result.get("success"):
+            self.entry_ts[result["position"]["id"]] = self.clock.now
+
+    def manage_positions(self, price: float):
+        with self.timer.stage("paper"):
+            self.paper.update_positions(price, self.symbol)
+            max_hold = HOLD_CANDLES_MAX * self.interval
+            for pos in list(self.paper.positions):
+                if self.clock.now - self.entry_ts.get(pos["id"], self.clock.now) >= max_hold:
+                    self.paper.close_position(pos["id"], price, "TIME_EXIT")
+
+    def run(self) -> dict:
+        args = self.args
+        started = time.perf_counter()
+        market_sec = 0.0
+        next_signal = self.clock.now
+        price = None
+        for candle in self.candles:
+            for offset, price in tick_path(candle, self.interval, args.tick_sec):
+                self.clock.now = candle["start_ts"] + offset
+                if args.speed > 0:
+                    ahead = (market_sec + offset) / args.speed - (time.perf_counter() - started)
+                    if ahead > 0:
+                        time.sleep(ahead)
+                self.set_price(price)
+                self.ws_frame()
+                self.manage_positions(price)
+                if self.clock.now >= next_signal:
+                    self.signal(price)
+                    next_signal = self.clock.now + args.signal_sec
+                self.ticks += 1
+            market_sec += self.interval
+
+        for pos in list(self.paper.positions):
+            self.paper.close_position(pos["id"], price, "REPLAY_END")
+        if self.frames_out:
+            self.frames_out.close()
+        wall = time.perf_counter() - started
+        return self.report(wall, market_sec)
+
+    def report(self, wall: float, market_sec: float) -> dict:
+        stages = stage_percentiles()
+        return {
+            "symbol": self.symbol,
+            "interval_sec": self.interval,
+            "candles": len(self.candles),
+            "ticks": self.ticks,
+            "signals": dict(self.signals),
+            "frames": self.frames,
+            "wall_sec": round(wall, 2),
+            "market_sec": market_sec,
+            "speedup": round(market_sec / wall, 1) if wall else None,
+            "ticks_per_sec": round(self.ticks / wall, 1) if wall else None,
+            "signals_per_sec": round(sum(self.signals.values()) / wall, 2) if wall else None,
+            "frame_bytes_full": round(self.full_bytes / max(self.frames, 1)),
+            "frame_bytes_sent": round(self.sent_bytes / max(self.frames, 1)),
+            "stages_ms": {k: v for k, v in stages.items() if k.startswith(("replay.", "signal_replay."))},
+            "paper": self.paper.get_stats(),
+            "paper_dir": str(self.paper.state_dir),
+        }
+
+
+def print_report(result: dict):
+    stages = result["stages_ms"]
+    paper = result["paper"]
+    rows = [
+        ("Replayed", f"{result['candles']} candles, {result['ticks']} ticks, {result['market_sec'] / 3600:.1f} h of market time"),
+        ("Wall time", f"{result['wall_sec']} s ({result['speedup']}x real time)"),
+        ("Throughput", f"{result['ticks_per_sec']} ticks/s, {result['signals_per_sec']} signals/s"),
+        ("Signals", json.dumps(result["signals"])),
+        ("WS frame bytes full / sent", f"{result['frame_bytes_full']} / {result['frame_bytes_sent']}"),
+    ]
+    for stage in ("replay.packet", "replay.signal", "replay.encode", "replay.paper"):
+        if stage in stages:
+            s = stages[stage]
+            rows.append((f"{stage.split('.')[1]} ms p50/p95/p99", f"{s['p50']} / {s['p95']} / {s['p99']}"))
+    rows.append(("Paper trades", f"{paper['total_trades']} trades, win rate {paper['win_rate']:.1f}%, "
+                                 f"P&L {paper['total_pnl']:.2f}, ROI {paper['roi']:.2f}%"))
+    print("| Metric | Value |")
+    print("|--------|-------|")
+    for name, value in rows:
+        print(f"| {name} | {value} |")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbol", default="NIFTY")
+    parser.add_argument("--csv", help="candle CSV (default: data/<symbol>_5m.csv)")
+    parser.add_argument("--interval", type=int, help="candle seconds (default: from the CSV)")
+    parser.add_argument("--limit", type=int, default=100, help="candles kept by the engine / signal_live limit")
+    parser.add_argument("--warmup", type=int, default=100, help="leading candles preloaded, not replayed")
+    parser.add_argument("--candles", type=int, help="replay at most this many candles")
+    parser.add_argument("--tick-sec", type=float, default=15.0, help="market seconds between ticks")
+    parser.add_argument("--signal-sec", type=float, default=60.0, help="market seconds between signal_live runs")
+    parser.add_argument("--speed", type=float, default=0.0, help="market seconds per wall second (0 = unthrottled)")
+    parser.add_argument("--min-score", type=float, default=0.6, help="final score needed to open a paper trade")
+    parser.add_argument("--qty", type=int, default=1)
+    parser.add_argument("--capital", type=float, default=100000)
+    parser.add_argument("--paper-dir", help="paper trading state directory, reset at start (default: a temp dir)")
+    parser.add_argument("--frames-out", help="write every WS frame sent to this JSONL file")
+    parser.add_argument("--json-out", help="also write the result as JSON")
+    args = parser.parse_args()
+
+    if args.symbol.upper() not in CSV_FILES and not args.csv:
+        sys.exit(f"No bundled CSV for {args.symbol}; pass --csv")
+
+    result = Replay(args).run()
+    print_report(result)
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            f.write(dumps(result).decode())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+"""
+Local market-data stand-in for load tests and benchmarks.
+
+With MARKET_DATA_MODE=standin, outbound.py sends every provider call here
+instead of to NSE, Yahoo, Google News or Moneycontrol. Payloads have the
+same shape as the real ones. Prices follow a seeded random walk, starting
+from the last close in the bundled data/*_5m.csv files. Nothing touches
+the network, so the app can be loaded at any hour.
+
+Environment:
+    MARKET_DATA_LATENCY_MS   mean latency added to every call (default 50)
+    MARKET_DATA_JITTER_MS    uniform +/- jitter around it (default 20)
+    MARKET_DATA_SEED         random walk seed (default 7)
+"""
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+LATENCY_MS = float(os.environ.get("MARKET_DATA_LATENCY_MS", "50"))
+JITTER_MS = float(os.environ.get("MARKET_DATA_JITTER_MS", "20"))
+SEED = int(os.environ.get("MARKET_DATA_SEED", "7"))
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+
+# Yahoo ticker -> bundled 5-minute history
+CSV_TICKERS = {"^NSEI": "nifty_5m.csv", "^NSEBANK": "banknifty_5m.csv"}
+
+# NSE index name / symbol -> Yahoo ticker, so both sources walk together
+INDEX_TICKERS = {"NIFTY 50": "^NSEI", "NIFTY": "^NSEI", "NIFTY BANK": "^NSEBANK", "BANKNIFTY": "^NSEBANK"}
+
+START_PRICES = {
+    "^INDIAVIX": 13.5, "^NDX": 20500.0, "CL=F": 78.0, "USDINR=X": 83.2,
+    "NIFTY FIN SERVICE": 22800.0, "NIFTY IT": 36500.0, "NIFTY PHARMA": 21000.0,
+    "NIFTY AUTO": 23500.0, "NIFTY FMCG": 56000.0, "NIFTY ENERGY": 38000.0,
+    "NIFTY METAL": 8900.0, "NIFTY TELECOM": 2900.0, "NIFTY INFRASTRUCTURE": 8800.0,
+    "NIFTY MIDCAP 100": 56000.0, "SENSEX": 80500.0,
+}
+
+STEP_VOL = 0.0004   # per-step standard deviation of the walk (relative)
+
+HEADLINES = [
+    "Nifty ends higher as banks and IT stocks gain",
+    "Sensex, Nifty slip on profit booking in financial stocks",
+    "FII inflows support Indian equity market rally",
+    "Bank Nifty hits record as private lenders surge",
+    "Markets trade flat ahead of RBI policy decision",
+    "Rupee steadies; stock market awaits US inflation data",
+    "IT shares lead gains on strong earnings outlook",
+    "Metal stocks drag Nifty lower amid weak global cues",
+    "Auto stocks rise on robust monthly sales numbers",
+    "Investors book profits as Sensex falls from record high",
+]
+
+EARNINGS_COMPANIES = ["TCS", "INFY", "HDFCBANK", "ICICIBANK", "RELIANCE", "ITC", "LT", "SBIN"]
+
+_rng = random.Random(SEED)
+_prices = {}
+_prices_lock = threading.Lock()
+_csv_cache = {}
+
+
+def _delay():
+    ms = LATENCY_MS + _rng.uniform(-JITTER_MS, JITTER_MS)
+    if ms > 0:
+        time.sleep(ms / 1000.0)
+
+
+def _load_csv(ticker: str):
+    if ticker not in _csv_cache:
+        df = pd.read_csv(os.path.join(DATA_DIR, CSV_TICKERS[ticker]), skiprows=[1])
+        df = df.dropna(subset=["close"])
+        _csv_cache[ticker] = df.rename(columns=str.capitalize)
+    return _csv_cache[ticker]
+
+
+def _start_price(name: str) -> float:
+    ticker = INDEX_TICKERS.get(name, name)
+    if ticker in CSV_TICKERS:
+        return float(_load_csv(ticker)["Close"].iloc[-1])
+    if name in START_PRICES:
+        return START_PRICES[name]
+    # stable per-name price for stocks (e.g. RELIANCE.NS)
+    return 200.0 + zlib.crc32(name.encode()) % 3000
+
+
+def _state(name: str) -> dict:
+    key = INDEX_TICKERS.get(name, name.replace(".NS", ""))
+    with _prices_lock:
+        if key not in _prices:
+            start = _start_price(name)
+            _prices[key] = {"last": start, "prev_close": start * (1 - _rng.uniform(-0.01, 0.01))}
+        return _prices[key]
+
+
+def price(name: str) -> float:
+    """Current walk price of a ticker, index name or symbol; advances one step per call."""
+    state = _state(name)
+    with _prices_lock:
+        state["last"] = round(state["last"] * math.exp(_rng.gauss(0, STEP_VOL)), 2)
+        return state["last"]
+
+
+def set_price(name: str, value: float):
+    """Move the walk to an externally supplied price (market_replay.py)."""
+    state = _state(name)
+    with _prices_lock:
+        state["last"] = float(value)
+
+
+# -----------------------------------------
+# Yahoo
+# -----------------------------------------
+
+_PERIOD_DAYS = {"1d": 1, "2d": 2, "5d": 5, "60d": 60, "730d": 730, "max": 3650}
+_INTERVAL_SEC = {"1m": 60, "5m": 300, "15m": 900, "1h": 3600, "1d": 86400}
+MAX_BARS = 1000
+
+
+def _frame(ticker: str, period: str = "5d", interval: str = "1d") -> pd.DataFrame:
+    step = _INTERVAL_SEC.get(interval, 86400)
+    bars = min(MAX_BARS, max(2, int(_PERIOD_DAYS.get(period, 5) * 86400 * 0.26 / step) if step < 86400
+                             else _PERIOD_DAYS.get(period, 5)))
+    last = price(ticker)
+    end = pd.Timestamp.now(tz="Asia/Kolkata").floor(f"{step}s")
+    index = pd.date_range(end=end, periods=bars, freq=f"{step}s")
+
+    if ticker in CSV_TICKERS and step == 300:
+        # real intraday shape, rescaled to end at the current walk price
+        df = _load_csv(ticker)[["Open", "High", "Low", "Close", "Volume"]].tail(bars).copy()
+        df[["Open", "High", "Low", "Close"]] *= last / df["Close"].iloc[-1]
+        df.index = index[-len(df):]
+        return df
+
+    rnd = random.Random(zlib.crc32(f"{ticker}{interval}".encode()))
+    closes = [last]
+    for _ in range(bars - 1):
+        closes.append(closes[-1] * math.exp(-rnd.gauss(0, STEP_VOL * math.sqrt(step / 60))))
+    closes.reverse()
+    rows = []
+    for i, close in enumerate(closes):
+        open_ = closes[i - 1] if i else close
+        spread = abs(close - open_) + close * 0.0005
+        rows.append((open_, max(open_, close) + spread * rnd.random(), min(open_, close) - spread * rnd.random(),
+                     close, float(rnd.randint(1000, 50000))))
+    return pd.DataFrame(rows, index=index, columns=["Open", "High", "Low", "Close", "Volume"])
+
+
+def yf_history(ticker: str, **kwargs) -> pd.DataFrame:
+    _delay()
+    return _frame(ticker, kwargs.get("period", "1mo"), kwargs.get("interval", "1d"))
+
+
+def yf_download(tickers, **kwargs) -> pd.DataFrame:
+    _delay()
+    period, interval = kwargs.get("period", "1mo"), kwargs.get("interval", "1d")
+    if isinstance(tickers, str):
+        tickers = tickers.split()
+    frames = {t: _frame(t, period, interval) for t in tickers}
+    if len(frames) == 1 and kwargs.get("group_by") != "ticker":
+        return next(iter(frames.values()))
+    return pd.concat(frames, axis=1)
+
+
+# -----------------------------------------
+# NSE
+# -----------------------------------------
+
+def _all_indices() -> dict:
+    rows = []
+    for name in ["NIFTY 50", "NIFTY BANK"] + [n for n in START_PRICES if n.startswith(("NIFTY", "SENSEX"))]:
+        last, prev = price(name), _state(name)["prev_close"]
+        rows.append({
+            "index": name, "last": last, "previousClose": round(prev, 2),
+            "variation": round(last - prev, 2), "percentChange": round((last - prev) / prev * 100, 2),
+        })
+    return {"data": rows}
+
+
+def _option_chain(symbol: str) -> dict:
+    spot = price(symbol)
+    step = 100 if symbol == "BANKNIFTY" else 50
+    atm = round(spot / step) * step
+    expiry = (datetime.now() + timedelta(days=(3 - datetime.now().weekday()) % 7 or 7)).strftime("%d-%b-%Y")
+    rnd = random.Random(int(time.time() // 60))  # chain changes once a minute
+    data = []
+    for k in range(-20, 21):
+        strike = atm + k * step
+        moneyness = abs(strike - spot) / spot
+        leg = lambda intrinsic: {  # noqa: E731
+            "strikePrice": strike, "expiryDate": expiry, "underlyingValue": spot,
+            "openInterest": rnd.randint(5_000, 150_000), "changeinOpenInterest": rnd.randint(-20_000, 20_000),
+            "totalTradedVolume": rnd.randint(1_000, 400_000),
+            "impliedVolatility": round(12 + moneyness * 200 + rnd.uniform(-1, 1), 2),
+            "lastPrice": round(max(intrinsic, 0) + spot * 0.004 * math.exp(-moneyness * 40) + 0.05, 2),
+        }
+        data.append({"strikePrice": strike, "expiryDate": expiry, "CE": leg(spot - strike), "PE": leg(strike - spot)})
+    return {"records": {"data": data, "underlyingValue": spot, "expiryDates": [expiry]}, "filtered": {"data": data}}
+
+
+def nse_fetch(url: str):
+    _delay()
+    parsed = urlparse(url)
+    if parsed.path.endswith("/allIndices"):
+        return _all_indices()
+    if "option-chain" in parsed.path:
+        return _option_chain(parse_qs(parsed.query).get("symbol", ["NIFTY"])[0].upper())
+    return {}
+
+
+def nse_ltp(symbol: str) -> float:
+    _delay()
+    return price(symbol)
+
+
+# -----------------------------------------
+# HTTP (news, FII/DII, earnings)
+# -----------------------------------------
+
+class StandinResponse:
+    """The subset of requests.Response the providers use."""
+
+    def __init__(self, status_code: int, text: str, content_type: str = "text/plain"):
+        self.status_code = status_code
+        self.text = text
+        self.content = text.encode()
+        self.headers = {"Content-Type": content_type}
+        self.ok = status_code < 400
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise RuntimeError(f"stand-in HTTP {self.status_code}")
+
+
+def _news_rss(query: str) -> str:
+    rnd = random.Random(f"{query}{int(time.time() // 300)}")  # new headlines every 5 minutes
+    items = "".join(
+        f"<item><title>{title}</title><link>https://news.example.com/{zlib.crc32(title.encode())}</link></item>"
+        for title in rnd.sample(HEADLINES, 8)
+    )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>{query}</title>{items}</channel></rss>'
+
+
+def _fii_dii() -> str:
+    rnd = random.Random(datetime.now().strftime("%Y-%m-%d"))
+    today = datetime.now().strftime("%d-%b-%Y")
+    return json.dumps({"data": [{"date": today, "FII": round(rnd.uniform(-3000, 3000), 2),
+                                 "DII": round(rnd.uniform(-2000, 3500), 2)}]})
+
+
+def _upcoming_results() -> str:
+    start = datetime.now()
+    rows = "".join(
+        f"<tr><td>{company}</td><td>Q2</td><td>{(start + timedelta(days=2 + 3 * i)).strftime('%d %b %Y')}</td></tr>"
+        for i, company in enumerate(EARNINGS_COMPANIES)
+    )
+    return f"<html><body><table><tbody>{rows}</tbody></table></body></html>"
+
+
+def http_get(url: str, **kwargs) -> StandinResponse:
+    _delay()
+    parsed = urlparse(url)
+    if parsed.hostname == "news.google.com":
+        query = re.sub(r"\s*when:\S+$", "", parse_qs(parsed.query).get("q", [""])[0])
+        return StandinResponse(200, _news_rss(query), "application/rss+xml")
+    if parsed.path.endswith("/fiidiiCashFlow"):
+        return StandinResponse(200, _fii_dii(), "application/json")
+    if "upcoming_results" in parsed.path:
+        return StandinResponse(200, _upcoming_results(), "text/html")
+    return StandinResponse(404, "", "text/plain")
+
+
+# Replacements for outbound.PROVIDERS
+PROVIDERS = {
+    "nse_fetch": nse_fetch,
+    "nse_ltp": nse_ltp,
+    "http_get": http_get,
+    "yf_history": yf_history,
+    "yf_download": yf_download,
+}
@@ -1,4 +1,5 @@
-import requests
+from outbound import http_get
+from rate_limit import PRIORITY_NEWS
 from textblob import TextBlob
 import re
 
@@ -36,7 +37,7 @@ def fetch_google_news_raw(query: str):
         f"https://news.google.com/rss/search?"
         f"q={query}+when:1d&hl=en-IN&gl=IN&ceid=IN:en"
     )
-    r = requests.get(url, headers=USER_AGENT, timeout=7)
+    r = http_get(url, PRIORITY_NEWS, headers=USER_AGENT, timeout=7)
     if r.status_code != 200:
         return []
 
@@ -1,10 +1,10 @@
-import requests
-from nsepython import nsefetch
+from outbound import nse_fetch
+from rate_limit import PRIORITY_OPTIONS
 
 def get_option_chain(symbol="NIFTY"):
     url = f"https://www.nseindia.com/api/option-chain-indices?symbol={symbol.upper()}"
     try:
-        data = nsefetch(url)
+        data = nse_fetch(url, PRIORITY_OPTIONS)
         return data
     except Exception as e:
         return {"error": str(e)}
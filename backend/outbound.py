@@ -0,0 +1,78 @@
+"""
+Single entry point for outbound market-data calls.
+
+Every provider goes through these wrappers so the per-host rate limiter
+(rate_limit.py) sees all upstream traffic.
+
+The wrappers call the network through PROVIDERS. MARKET_DATA_MODE=standin
+swaps in market_standin.py (a local fake of the same payloads) for load
+tests and benchmarks; the default "live" mode uses the real libraries.
+"record" and "replay" (market_archive.py) capture live responses to a
+file and serve them back offline.
+"""
+import os
+from urllib.parse import urlparse
+
+import requests
+import yfinance as yf
+from nsepython import nsefetch, nse_quote_ltp
+
+from rate_limit import acquire, PRIORITY_MARKET, PRIORITY_PRICE
+
+NSE_HOST = "www.nseindia.com"
+YAHOO_HOST = "finance.yahoo.com"
+
+MARKET_DATA_MODE = os.environ.get("MARKET_DATA_MODE", "live").lower()
+
+
+def _ticker_history(ticker: str, **kwargs):
+    return yf.Ticker(ticker).history(**kwargs)
+
+
+# Network calls behind the wrappers, by name
+PROVIDERS = {
+    "nse_fetch": nsefetch,
+    "nse_ltp": nse_quote_ltp,
+    "http_get": requests.get,
+    "yf_history": _ticker_history,
+    "yf_download": yf.download,
+}
+
+if MARKET_DATA_MODE == "standin":
+    from market_standin import PROVIDERS as _STANDIN
+    PROVIDERS.update(_STANDIN)
+elif MARKET_DATA_MODE in ("record", "replay"):
+    from market_archive import wrap_providers
+    PROVIDERS.update(wrap_providers(PROVIDERS, MARKET_DATA_MODE))
+elif MARKET_DATA_MODE != "live":
+    raise ValueError(f"Unknown MARKET_DATA_MODE: {MARKET_DATA_MODE!r}")
+
+
+def nse_fetch(url: str, priority: int = PRIORITY_MARKET):
+    """nsepython.nsefetch behind the NSE token bucket."""
+    acquire(NSE_HOST, priority)
+    return PROVIDERS["nse_fetch"](url)
+
+
+def nse_ltp(symbol: str, priority: int = PRIORITY_PRICE):
+    """nsepython.nse_quote_ltp behind the NSE token bucket."""
+    acquire(NSE_HOST, priority)
+    return PROVIDERS["nse_ltp"](symbol)
+
+
+def http_get(url: str, priority: int = PRIORITY_MARKET, **kwargs) -> requests.Response:
+    """requests.get behind the token bucket of the URL's host."""
+    acquire(urlparse(url).hostname or url, priority)
+    return PROVIDERS["http_get"](url, **kwargs)
+
+
+def yf_history(ticker: str, priority: int = PRIORITY_MARKET, **kwargs):
+    """yf.Ticker(ticker).history(**kwargs) behind the Yahoo token bucket."""
+    acquire(YAHOO_HOST, priority)
+    return PROVIDERS["yf_history"](ticker, **kwargs)
+
+
+def yf_download(tickers, priority: int = PRIORITY_MARKET, **kwargs):
+    """yf.download(tickers, **kwargs) behind the Yahoo token bucket."""
+    acquire(YAHOO_HOST, priority)
+    return PROVIDERS["yf_download"](tickers, **kwargs)
@@ -5,13 +5,14 @@ Simulates live trading with virtual money
 
 import json
 import os
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 import pandas as pd
 
 
-PAPER_TRADING_DIR = Path(__file__).parent / "paper_trading"
+PAPER_TRADING_DIR = Path(os.environ.get("PAPER_TRADING_DIR", Path(__file__).parent / "paper_trading"))
 HISTORY_FILE = PAPER_TRADING_DIR / "history.json"
 POSITIONS_FILE = PAPER_TRADING_DIR / "positions.json"
 
@@ -19,40 +20,53 @@ POSITIONS_FILE = PAPER_TRADING_DIR / "positions.json"
 class PaperTradingEngine:
     """Manages virtual positions with SL/TP"""
     
-    def __init__(self, initial_capital: float = 100000):
+    def __init__(
+        self,
+        initial_capital: float = 100000,
+        state_dir: Path = PAPER_TRADING_DIR,
+        clock: Callable[[], float] = time.time
+    ):
         self.initial_capital = initial_capital
         self.capital = initial_capital
         self.positions: List[Dict] = []
         self.history: List[Dict] = []
+        # market_replay.py keeps its own state and simulated clock
+        self.state_dir = Path(state_dir)
+        self.positions_file = self.state_dir / POSITIONS_FILE.name
+        self.history_file = self.state_dir / HISTORY_FILE.name
+        self.clock = clock
         
         # Create directory if not exists
-        PAPER_TRADING_DIR.mkdir(exist_ok=True)
+        self.state_dir.mkdir(parents=True, exist_ok=True)
         
         # Load existing data
         self._load_state()
     
+    def _now(self) -> str:
+        return datetime.fromtimestamp(self.clock()).isoformat()
+    
     def _load_state(self):
         """Load positions and history from disk"""
-        if POSITIONS_FILE.exists():
-            with open(POSITIONS_FILE, 'r') as f:
+        if self.positions_file.exists():
+            with open(self.positions_file, 'r') as f:
                 data = json.load(f)
                 self.positions = data.get('positions', [])
                 self.capital = data.get('capital', self.initial_capital)
         
-        if HISTORY_FILE.exists():
-            with open(HISTORY_FILE, 'r') as f:
+        if self.history_file.exists():
+            with open(self.history_file, 'r') as f:
                 self.history = json.load(f)
     
     def _save_state(self):
         """Save positions and history to disk"""
-        with open(POSITIONS_FILE, 'w') as f:
+        with open(self.positions_file, 'w') as f:
             json.dump({
                 'capital': self.capital,
                 'positions': self.positions,
-                'last_updated': datetime.now().isoformat()
+                'last_updated': self._now()
             }, f, indent=2)
         
-        with open(HISTORY_FILE, 'w') as f:
+        with open(self.history_file, 'w') as f:
             json.dump(self.history, f, indent=2)
     
     def open_position(
@@ -86,7 +100,7 @@ class PaperTradingEngine:
             "quantity": quantity,
             "stop_loss": stop_loss,
             "take_profit": take_profit,
-            "entry_time": datetime.now().isoformat(),
+            "entry_time": self._now(),
             "signal_confidence": signal_confidence,
             "ml_score": ml_score,
             "status": "OPEN"
@@ -144,7 +158,7 @@ class PaperTradingEngine:
                 pnl_pct = (exit_price - entry) / entry * direction * 100
                 
                 pos["exit_price"] = exit_price
-                pos["exit_time"] = datetime.now().isoformat()
+                pos["exit_time"] = self._now()
                 pos["exit_reason"] = exit_reason
                 pos["pnl"] = pnl
                 pos["pnl_pct"] = pnl_pct
@@ -172,7 +186,7 @@ class PaperTradingEngine:
                 pnl_pct = (current_price - entry) / entry * direction * 100
                 
                 pos["exit_price"] = current_price
-                pos["exit_time"] = datetime.now().isoformat()
+                pos["exit_time"] = self._now()
                 pos["exit_reason"] = reason
                 pos["pnl"] = pnl
                 pos["pnl_pct"] = pnl_pct
@@ -1,60 +1,68 @@
-from nsepython import nsefetch, nse_quote_ltp
-import yfinance as yf
+import logging
+
+from outbound import nse_fetch, nse_ltp, yf_history
+from rate_limit import PRIORITY_PRICE
+from resilience import hedged_call, AllSourcesFailed, NoData
+
+log = logging.getLogger(__name__)
+
+# NSE index names used by the allIndices API
+INDEX_MAP = {
+    "NIFTY": "NIFTY 50",
+    "NIFTY50": "NIFTY 50",
+    "BANKNIFTY": "NIFTY BANK",
+    "FINNIFTY": "NIFTY FIN SERVICE",
+    "MIDCAP": "NIFTY MIDCAP 100",
+    "SENSEX": "SENSEX"
+}
+
+
+def _price_from_all_indices(index_name: str) -> float:
+    url = "https://www.nseindia.com/api/allIndices"
+    data = nse_fetch(url, PRIORITY_PRICE)
+    for index in data["data"]:
+        if index["index"] == index_name:
+            return float(index["last"])
+    raise NoData(f"Index {index_name} not found in allIndices")
+
+
+def _price_from_quote_ltp(symbol: str) -> float:
+    price = nse_ltp(symbol, PRIORITY_PRICE)
+    if not price or price <= 0:
+        raise NoData(f"Invalid NSE price for {symbol}: {price}")
+    return float(price)
+
+
+def _price_from_yfinance(symbol: str) -> float:
+    # yfinance fallback (1-minute delayed data)
+    ticker_symbol = f"{symbol}.NS" if not symbol.startswith("^") else symbol
+    hist = yf_history(ticker_symbol, PRIORITY_PRICE, period="1d", interval="1m")
+    if hist.empty:
+        raise NoData(f"No yfinance data for {symbol}")
+    return float(hist['Close'].iloc[-1])
+
 
 def get_nse_spot_price(symbol: str) -> float:
     """
     Fetch live NSE spot price for indices or stocks.
     Supports: NIFTY, BANKNIFTY, FINNIFTY, MIDCAP, SENSEX (indices)
     And all NSE stocks (e.g., RELIANCE, HDFCBANK, TCS, etc.)
+
+    Sources (allIndices for indices, then nse_quote_ltp, then yfinance)
+    run through a hedged fallback chain: each upstream has a circuit
+    breaker, and a source slower than its p95 is raced by the next one.
     """
     symbol_upper = symbol.upper()
-    
-    # Check if it's an index
-    index_map = {
-        "NIFTY": "NIFTY 50",
-        "NIFTY50": "NIFTY 50",
-        "BANKNIFTY": "NIFTY BANK",
-        "FINNIFTY": "NIFTY FIN SERVICE",
-        "MIDCAP": "NIFTY MIDCAP 100",
-        "SENSEX": "SENSEX"
-    }
-
-    # If it's an index, fetch from allIndices API
-    if symbol_upper in index_map:
-        index_name = index_map[symbol_upper]
-        try:
-            url = "https://www.nseindia.com/api/allIndices"
-            data = nsefetch(url)
-            for index in data["data"]:
-                if index["index"] == index_name:
-                    return float(index["last"])
-            print(f"⚠️ Index {index_name} not found, trying yfinance fallback")
-        except Exception as e:
-            print(f"⚠️ NSE API error for {symbol}: {e}, trying yfinance fallback")
-    
-    # If it's a stock, fetch using nse_quote_ltp
-    try:
-        price = nse_quote_ltp(symbol_upper)
-        if price and price > 0:
-            print(f"✅ NSE live price for {symbol_upper}: ₹{price}")
-            return float(price)
-        else:
-            print(f"⚠️ Invalid NSE price for {symbol_upper}: {price}, trying yfinance")
-    except Exception as e:
-        print(f"⚠️ NSE API error for stock {symbol_upper}: {e}, trying yfinance")
-    
-    # Fallback to yfinance (1-minute delayed data)
+
+    sources = []
+    if symbol_upper in INDEX_MAP:
+        index_name = INDEX_MAP[symbol_upper]
+        sources.append(("nse_all_indices", lambda: _price_from_all_indices(index_name)))
+    sources.append(("nse_quote_ltp", lambda: _price_from_quote_ltp(symbol_upper)))
+    sources.append(("yfinance_price", lambda: _price_from_yfinance(symbol_upper)))
+
     try:
-        ticker_symbol = f"{symbol_upper}.NS" if not symbol_upper.startswith("^") else symbol_upper
-        ticker = yf.Ticker(ticker_symbol)
-        hist = ticker.history(period="1d", interval="1m")
-        if not hist.empty:
-            price = float(hist['Close'].iloc[-1])
-            print(f"📊 yfinance fallback price for {symbol_upper}: ₹{price}")
-            return price
-        else:
-            print(f"❌ No yfinance data for {symbol_upper}, returning 0")
-            return 0.0
-    except Exception as e:
-        print(f"❌ yfinance fallback failed for {symbol_upper}: {e}")
+        return hedged_call(sources, is_valid=lambda p: p is not None and p > 0)
+    except AllSourcesFailed as e:
+        log.error("❌ All price sources failed for %s, returning 0: %s", symbol_upper, e)
         return 0.0
@@ -0,0 +1,151 @@
+"""
+Outbound rate limiter: one token bucket per upstream host.
+
+NSE, Google News and Moneycontrol block clients that poll too hard, so all
+provider calls acquire a token for their host first. Waiters are served
+in priority order (live price > option chain > market data > news); each
+priority class also has a maximum queueing time, after which the caller
+gets RateLimited and falls back to its cached value.
+
+Limits can be overridden with RATE_LIMITS="host=rate_per_sec:burst,...".
+"""
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Tuple
+
+log = logging.getLogger(__name__)
+
+# Priority classes (lower value is served first)
+PRIORITY_PRICE = 0
+PRIORITY_OPTIONS = 1
+PRIORITY_MARKET = 2
+PRIORITY_NEWS = 3
+
+# How long each class may queue for a token before giving up (seconds)
+MAX_WAIT = {
+    PRIORITY_PRICE: 2.0,
+    PRIORITY_OPTIONS: 1.0,
+    PRIORITY_MARKET: 0.5,
+    PRIORITY_NEWS: 0.0,
+}
+
+# Sustained requests/second and burst size each host tolerates
+DEFAULT_LIMITS: Dict[str, Tuple[float, int]] = {
+    "www.nseindia.com": (3.0, 5),
+    "news.google.com": (0.5, 3),
+    "www.moneycontrol.com": (0.2, 2),
+    "finance.yahoo.com": (5.0, 10),
+    "api.twelvedata.com": (8 / 60, 2),
+    "www.alphavantage.co": (1 / 60, 1),
+}
+FALLBACK_LIMIT = (5.0, 10)
+
+
+class RateLimited(Exception):
+    """Raised when a host's budget is exhausted for the caller's priority."""
+
+
+def _parse_overrides(spec: str) -> Dict[str, Tuple[float, int]]:
+    out = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        try:
+            host, limit = item.split("=")
+            rate, burst = limit.split(":")
+            out[host.strip()] = (float(rate), int(burst))
+        except ValueError:
+            log.warning("⚠️ Ignoring malformed RATE_LIMITS entry: %s", item)
+    return out
+
+
+LIMITS = {**DEFAULT_LIMITS, **_parse_overrides(os.environ.get("RATE_LIMITS", ""))}
+
+
+class HostLimiter:
+    """Token bucket with a priority-ordered wait queue."""
+
+    def __init__(self, host: str, rate: float, burst: int):
+        self.host = host
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._cond = threading.Condition()
+        self._waiters: List[Tuple[int, int]] = []
+        self._seq = itertools.count()
+        self.granted = 0
+        self.rejected = 0
+        self.queued = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, priority: int, max_wait: float) -> bool:
+        deadline = time.monotonic() + max_wait
+        with self._cond:
+            ticket = (priority, next(self._seq))
+            heapq.heappush(self._waiters, ticket)
+            waited = False
+            try:
+                while True:
+                    self._refill()
+                    if self._waiters[0] == ticket and self.tokens >= 1:
+                        self.tokens -= 1
+                        self.granted += 1
+                        self.queued += waited
+                        return True
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.rejected += 1
+                        return False
+
+                    waited = True
+                    shortfall = max(0.0, 1 - self.tokens)
+                    self._cond.wait(min(remaining, max(shortfall / self.rate, 0.01)))
+            finally:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+    def status(self) -> Dict:
+        with self._cond:
+            self._refill()
+            return {
+                "rate_per_sec": round(self.rate, 4),
+                "burst": self.burst,
+                "tokens": round(self.tokens, 2),
+                "waiting": len(self._waiters),
+                "granted": self.granted,
+                "queued": self.queued,
+                "rejected": self.rejected,
+            }
+
+
+# Global registry: one limiter per host
+_limiters: Dict[str, HostLimiter] = {}
+_registry_lock = threading.Lock()
+
+
+def get_limiter(host: str) -> HostLimiter:
+    with _registry_lock:
+        if host not in _limiters:
+            rate, burst = LIMITS.get(host, FALLBACK_LIMIT)
+            _limiters[host] = HostLimiter(host, rate, burst)
+        return _limiters[host]
+
+
+def acquire(host: str, priority: int = PRIORITY_MARKET):
+    """Block (up to the priority's MAX_WAIT) for a token, or raise RateLimited."""
+    if not get_limiter(host).acquire(priority, MAX_WAIT.get(priority, 0.0)):
+        raise RateLimited(f"{host} over budget (priority {priority})")
+
+
+def limiter_status() -> Dict[str, Dict]:
+    """Token bucket state and counters per host."""
+    return {host: limiter.status() for host, limiter in list(_limiters.items())}
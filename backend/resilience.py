@@ -0,0 +1,218 @@
+"""
+Circuit breakers and hedged requests for upstream fallback chains.
+
+A fallback chain is an ordered list of (name, func) sources. Sources whose
+breaker is open are skipped. The primary starts immediately; if it has not
+answered within its observed p95 latency, the next source is started too
+and whichever returns a valid result first wins. Slower attempts finish in
+the background and still update their breaker and latency stats.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from rate_limit import RateLimited
+
+log = logging.getLogger(__name__)
+
+# Hedge delay used until a source has enough latency samples
+DEFAULT_HEDGE_SEC = 1.0
+MIN_SAMPLES = 5
+
+_executor = ThreadPoolExecutor(max_workers=12, thread_name_prefix="hedge")
+
+
+class AllSourcesFailed(Exception):
+    """Raised when every source in a fallback chain failed."""
+
+
+class NoData(LookupError):
+    """
+    The source answered but had nothing usable for this request (e.g. an
+    unknown symbol). A miss, not an upstream failure: the breaker is untouched.
+    """
+
+
+class CircuitBreaker:
+    """
+    closed    -> calls allowed; opens after `failure_threshold` consecutive failures
+    open      -> calls skipped until `cooldown_sec` has passed
+    half_open -> one trial call allowed; success closes, failure re-opens
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 3, cooldown_sec: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown_sec = cooldown_sec
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.time() - self.opened_at >= self.cooldown_sec:
+                self.state = "half_open"
+                return True
+            return False
+
+    def available(self) -> bool:
+        """Whether allow() would let a call through, without taking the half-open trial."""
+        with self._lock:
+            if self.state == "closed":
+                return True
+            return self.state == "open" and time.time() - self.opened_at >= self.cooldown_sec
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+
+    def record_skipped(self):
+        """The call said nothing about upstream health (rate limited, a miss): hand back a half-open trial."""
+        with self._lock:
+            if self.state == "half_open":
+                self.state = "open"
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    log.warning("🔌 Circuit open for %s after %d failures", self.name, self.failures)
+                self.state = "open"
+                self.opened_at = time.time()
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies (seconds)."""
+
+    def __init__(self, window: int = 100):
+        self.samples: Deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+
+    def p95(self, default: float = DEFAULT_HEDGE_SEC) -> float:
+        if len(self.samples) < MIN_SAMPLES:
+            return default
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+# Global registries: one breaker and latency tracker per upstream
+_breakers: Dict[str, CircuitBreaker] = {}
+_latency: Dict[str, LatencyTracker] = {}
+_registry_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    with _registry_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
+
+
+def get_latency(name: str) -> LatencyTracker:
+    with _registry_lock:
+        if name not in _latency:
+            _latency[name] = LatencyTracker()
+        return _latency[name]
+
+
+def upstream_status() -> Dict[str, Dict[str, Any]]:
+    """Breaker state and p95 latency for every upstream seen so far."""
+    out = {}
+    for name, breaker in list(_breakers.items()):
+        tracker = get_latency(name)
+        out[name] = {
+            "state": breaker.state,
+            "consecutive_failures": breaker.failures,
+            "p95_ms": round(tracker.p95() * 1000, 1) if len(tracker.samples) >= MIN_SAMPLES else None,
+            "samples": len(tracker.samples),
+        }
+    return out
+
+
+def _attempt(name: str, func: Callable, is_valid: Optional[Callable]):
+    """Run one source, feeding its breaker and latency tracker."""
+    breaker = get_breaker(name)
+    start = time.monotonic()
+    try:
+        result = func()
+    except (RateLimited, NoData):
+        # Our token bucket said no, or this request has no data there - not a sign the upstream is unhealthy
+        breaker.record_skipped()
+        raise
+    except Exception:
+        breaker.record_failure()
+        raise
+    if is_valid is not None and not is_valid(result):
+        # breakers are shared by every symbol: one bad ticker must not open them for all
+        breaker.record_skipped()
+        raise NoData(f"{name} returned invalid data: {result!r}")
+    get_latency(name).record(time.monotonic() - start)
+    breaker.record_success()
+    return result
+
+
+def hedged_call(
+    sources: List[Tuple[str, Callable]],
+    is_valid: Optional[Callable] = None,
+    default_hedge_sec: float = DEFAULT_HEDGE_SEC
+) -> Any:
+    """
+    Return the first valid result from an ordered fallback chain.
+
+    A failed source immediately hands over to the next one; a slow source
+    is hedged once it exceeds its p95. Raises AllSourcesFailed if nothing
+    in the chain produced a valid result.
+    """
+    candidates = [(name, func) for name, func in sources if get_breaker(name).available()]
+    probe_all = not candidates
+    if probe_all:
+        # Every breaker is open - nothing to lose by probing the whole chain
+        candidates = list(sources)
+
+    pending = {}
+    errors = []
+    next_idx = 0
+
+    def launch():
+        nonlocal next_idx
+        while next_idx < len(candidates):
+            name, func = candidates[next_idx]
+            next_idx += 1
+            # Only a source that actually runs takes its breaker's half-open trial
+            if probe_all or get_breaker(name).allow():
+                pending[_executor.submit(_attempt, name, func, is_valid)] = name
+                return name
+        return None
+
+    newest = launch()
+    while pending:
+        hedge_after = None
+        if next_idx < len(candidates):
+            hedge_after = get_latency(newest).p95(default_hedge_sec)
+
+        done, _ = wait(list(pending), timeout=hedge_after, return_when=FIRST_COMPLETED)
+        if not done:
+            # Slowest-case primary: race the next source against it
+            newest = launch() or newest
+            continue
+
+        for future in done:
+            name = pending.pop(future)
+            try:
+                return future.result()
+            except Exception as e:
+                errors.append(f"{name}: {e}")
+                if next_idx < len(candidates):
+                    newest = launch() or newest
+
+    raise AllSourcesFailed("; ".join(errors) or "no sources available")
@@ -1,4 +1,4 @@
-from nsepython import nsefetch
+from outbound import nse_fetch
 from data_validator import normalize_price_data
 
 # -----------------------------------
@@ -59,7 +59,7 @@ def get_sector_index_changes():
     """
     url = "https://www.nseindia.com/api/allIndices"
     try:
-        data = nsefetch(url)
+        data = nse_fetch(url)
     except Exception as exc:
         print(f"⚠️ Sector index fetch failed: {exc}")
         return {}
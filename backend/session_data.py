@@ -0,0 +1,128 @@
+"""
+Session-static market facts.
+
+Previous closes, daily history, FII/DII cash flow and the earnings
+calendar change at most once per trading day. Instead of re-fetching them
+on every cache expiry, they are loaded once per IST session and reloaded
+only when a known publication time passes.
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+from fii_dii import get_fii_dii_trend
+from earnings import fetch_upcoming_results
+
+log = logging.getLogger(__name__)
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+# Publication times (IST hour, minute) after which a fresh load is due
+FII_DII_PUBLISH = ((18, 0), (20, 0))   # NSE posts provisional figures in the evening
+EARNINGS_PUBLISH = ((8, 0),)           # calendar refreshed before the open
+
+# name -> (session_key, loaded_at, value, valid)
+_store: Dict[str, Tuple[str, float, Any, bool]] = {}
+_last_good: Dict[str, Any] = {}
+_locks: Dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+def session_key(publish_times: Sequence[Tuple[int, int]] = (), now: Optional[datetime] = None) -> str:
+    """
+    IST trading date plus the number of publication times already passed.
+    The key changes exactly when a reload is due.
+    """
+    now = now or datetime.now(IST)
+    slot = sum(1 for hm in publish_times if (now.hour, now.minute) >= hm)
+    return f"{now.date().isoformat()}#{slot}"
+
+
+def _lock_for(name: str) -> threading.Lock:
+    with _locks_guard:
+        if name not in _locks:
+            _locks[name] = threading.Lock()
+        return _locks[name]
+
+
+def session_value(
+    name: str,
+    loader: Callable,
+    *args,
+    publish_times: Sequence[Tuple[int, int]] = (),
+    is_valid: Optional[Callable] = None,
+    retry_sec: float = 120,
+    **kwargs
+) -> Any:
+    """
+    Return loader(*args, **kwargs) as loaded for the current session.
+
+    The value is reloaded when the session key changes. A load that fails
+    or is rejected by is_valid keeps serving the previous value and is
+    retried after retry_sec, so a transient outage is not pinned for the
+    whole day. Concurrent callers never trigger duplicate loads: while
+    one thread loads, others get the previous value (or wait if there is
+    none yet).
+    """
+    key = session_key(publish_times)
+    entry = _store.get(name)
+    if entry is not None:
+        entry_key, loaded_at, value, valid = entry
+        if entry_key == key and (valid or time.time() - loaded_at < retry_sec):
+            return value
+
+    lock = _lock_for(name)
+    if not lock.acquire(blocking=entry is None):
+        return entry[2]
+
+    try:
+        # Another thread may have finished the load while we waited
+        current = _store.get(name)
+        if current is not None and current is not entry:
+            return current[2]
+
+        try:
+            value = loader(*args, **kwargs)
+            valid = is_valid is None or is_valid(value)
+        except Exception as e:
+            log.warning("⚠️ Session load failed for %s: %s", name, e)
+            if entry is None:
+                raise
+            value, valid = entry[2], False
+
+        if valid:
+            _last_good[name] = value
+        elif name in _last_good:
+            # Keep serving the last good value; only the retry timer restarts
+            value = _last_good[name]
+
+        _store[name] = (key, time.time(), value, valid)
+        if valid:
+            log.info("📅 Loaded session data: %s (%s)", name, key)
+        return value
+    finally:
+        lock.release()
+
+
+def session_fii_dii_trend():
+    """FII/DII trend, reloaded after each evening publication."""
+    return session_value(
+        "fii_dii",
+        get_fii_dii_trend,
+        publish_times=FII_DII_PUBLISH,
+        is_valid=lambda r: r[1] != "Unknown",
+        retry_sec=300,
+    )
+
+
+def session_upcoming_results():
+    """Earnings calendar, loaded once per trading day."""
+    return session_value(
+        "earnings",
+        fetch_upcoming_results,
+        publish_times=EARNINGS_PUBLISH,
+        is_valid=lambda r: r is not None,  # an empty calendar is a normal day, not a failed load
+        retry_sec=600,
+    )
@@ -0,0 +1,160 @@
+"""
+Multi-symbol compact signals for the stocks grid (/api/signal_batch).
+
+Per symbol: live price, change over the returned candles, a short close
+history and the technical action. Symbols are processed concurrently.
+With include=market, market-wide inputs (global cues, VIX, FII/DII, NIFTY
+news) are added, fetched once per batch under one latency budget. The
+stocks grid doesn't use them, so they are off by default.
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from signal_logic import decide_signal
+from technical import compute_all_indicators
+from signal_pipeline import (
+    load_live_candles, prefetch_context, fetch_global, fetch_news, fetch_vix, fetch_fii, compute_mood,
+)
+from stage_timing import StageTimer
+
+log = logging.getLogger(__name__)
+
+MAX_SYMBOLS = 60
+HISTORY_POINTS = 10
+# Symbols are not bound by the latency budget: a cold engine has to download
+# its history first. Whatever is not done by then is reported in "errors".
+SYMBOLS_TIMEOUT_SEC = 15.0
+MARKET_STAGES = frozenset({"news", "global", "vix", "fii_dii"})
+SECTIONS = ("market",)  # optional blocks, requested with include=
+
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="batch")
+
+
+def parse_symbols(symbols: str) -> list:
+    """Comma-separated symbols -> unique upper-case list (order kept)."""
+    out = []
+    for s in (part.strip().upper() for part in symbols.split(",")):
+        if s and s not in out:
+            out.append(s)
+    if not out:
+        raise ValueError("No symbols given")
+    if len(out) > MAX_SYMBOLS:
+        raise ValueError(f"At most {MAX_SYMBOLS} symbols per batch")
+    return out
+
+
+def parse_include(include: str) -> frozenset:
+    """Comma-separated optional sections -> set (empty when not given)."""
+    sections = frozenset(part.strip().lower() for part in (include or "").split(",") if part.strip())
+    unknown = sections - set(SECTIONS)
+    if unknown:
+        raise ValueError(f"Unknown include section(s): {', '.join(sorted(unknown))}; available: {', '.join(SECTIONS)}")
+    return sections
+
+
+def _change(candles: list):
+    """Absolute and % change from the first candle's open to the last close."""
+    if len(candles) < 2:
+        return 0.0, 0.0
+    first_open = float(candles[0]["open"])
+    last_close = float(candles[-1]["close"])
+    if first_open <= 0 or last_close <= 0:
+        return 0.0, 0.0
+    change = last_close - first_open
+    change_pct = change / first_open * 100
+    # > 100% is almost certainly a data error: fall back to the previous close
+    if abs(change_pct) > 100:
+        prev_close = float(candles[-2]["close"])
+        if prev_close > 0:
+            change = last_close - prev_close
+            change_pct = change / prev_close * 100
+    return round(change, 2), round(change_pct, 2)
+
+
+def _technical_action(candles: list):
+    """Technical BUY/SELL/WAIT on the symbol's own candles (no ML, no context)."""
+    df = compute_all_indicators(pd.DataFrame(candles))
+    signal = decide_signal(df.iloc[-1].to_dict())
+    return signal["action"], round(float(signal["confidence"]), 2)
+
+
+def symbol_summary(symbol: str, interval: int, limit: int) -> dict:
+    timer = StageTimer("signal_batch.symbol")
+    live = load_live_candles(symbol, interval, limit, timer)
+    if "error" in live:
+        return live
+
+    candles = live["candles"]
+    change, change_pct = _change(candles)
+    try:
+        with timer.stage("indicators"):
+            action, confidence = _technical_action(candles)
+    except Exception as e:
+        log.warning("⚠️ Batch signal failed for %s: %s", symbol, e)
+        action, confidence = "WAIT", 0.0
+    timer.server_timing()  # records the per-symbol total
+
+    return {
+        "price": float(live["price"]),
+        "change": change,
+        "change_pct": change_pct,
+        "action": action,
+        "confidence": confidence,
+        "history": [float(c["close"]) for c in candles[-HISTORY_POINTS:]],
+        "data_source": "fallback" if live["using_fallback"] else "live",
+    }
+
+
+def market_summary(budget, timer) -> dict:
+    """Market-wide context, shared by every symbol in the batch."""
+    news = fetch_news("NIFTY", budget, timer)
+    global_view = fetch_global(budget, timer)
+    vix = fetch_vix(budget, timer)
+    fii = fetch_fii(budget, timer)
+    return {
+        "market_mood": compute_mood(global_view, news, vix, fii),
+        "global_score": global_view["score"],
+        "vix": vix["value"],
+        "vix_label": vix["label"],
+        "fii_dii": fii["label"],
+    }
+
+
+def build_batch(symbols: list, interval: int, limit: int, budget, timer, sections: frozenset = frozenset()) -> dict:
+    with_market = "market" in sections
+    if with_market:
+        prefetch_context("NIFTY", budget, MARKET_STAGES)
+    deadline = time.monotonic() + SYMBOLS_TIMEOUT_SEC
+    futures = {s: _executor.submit(symbol_summary, s, interval, limit) for s in symbols}
+
+    market = None
+    if with_market:
+        # market context resolves while the symbols are being processed
+        with timer.stage("market"):
+            market = market_summary(budget, timer)
+
+    with timer.stage("symbols"):
+        stocks, errors = {}, {}
+        for symbol, future in futures.items():
+            try:
+                result = future.result(timeout=max(deadline - time.monotonic(), 0.0))
+            except Exception as e:
+                result = {"error": str(e) or type(e).__name__}
+            if "error" in result:
+                errors[symbol] = result["error"]
+            else:
+                stocks[symbol] = result
+
+    payload = {
+        "interval_sec": interval,
+        "count": len(stocks),
+        "stocks": stocks,
+        "errors": errors,
+    }
+    if with_market:
+        payload["market"] = market
+    payload["meta"] = budget.meta()
+    return payload
@@ -0,0 +1,989 @@
+"""
+Signal pipeline behind /api/signal_live.
+
+The computation is split into stages so the endpoint and the background
+snapshot producer run exactly the same code:
+
+    load_live_candles -> compute_technical -> market_context
+        -> final_recommendation -> options_analysis -> resolve_signal
+        -> assemble_payload
+
+build_signal() runs them all in order.
+"""
+import logging
+
+import pandas as pd
+
+from live_candles import get_engine
+from signal_logic import decide_signal
+from technical import compute_all_indicators
+from news_sentiment import fetch_filtered_news, analyze_sentiment
+from sectors import sector_score_for_symbol, SECTOR_STOCKS
+from options_helper import suggest_option_strikes
+from earnings import sector_event_risk
+from global_cues import get_global_cues, compute_global_bias, empty_global_cues
+from vix import get_india_vix, vix_risk_level
+from volume_logic import detect_volume_anomaly, detect_fake_breakout
+from cache_helper import cache_get, cache_set
+from fallback_data import load_sample_candles
+from reversal import detect_reversal
+from market_mood import compute_market_mood
+from conflict import resolve_conflicts
+from price_helper import get_nse_spot_price
+from options_fetcher import get_option_chain
+from strike_engine import choose_strike
+from option_signal import option_signal
+from iv_engine import iv_trend
+from oi_engine import analyze_oi
+from greeks import bs_greeks
+from ml_ensemble import ensemble_ml
+from expected_move import expected_move
+from orderflow import classify_orderflow
+from regime import detect_regime
+from reversal_ai import reversal_probability
+from data_validator import validate_indicators, can_generate_reasoning
+from session_data import session_fii_dii_trend, session_upcoming_results
+from log_config import sampled
+
+log = logging.getLogger(__name__)
+
+
+# Import ML prediction pipeline
+ML_ENABLED = False
+
+try:
+    from ml.ml_model import predict_next
+    ML_ENABLED = True
+    log.info("✅ ML models loaded successfully")
+except Exception as e:
+    log.warning("⚠️ ML pipeline unavailable: %s (run 'python train_models.py' to train models)", e)
+
+    def predict_next(df):
+        return {"enabled": False, "reason": "ML models not trained yet"}
+
+
+QUERY_MAP = {
+    "NIFTY": "Nifty 50 India stock market",
+    "BANKNIFTY": "Bank Nifty Indian banking stocks",
+}
+
+# Cache TTLs (seconds) for market-context inputs
+SECTOR_TTL = 30
+NEWS_TTL = 60
+GLOBAL_TTL = 30
+VIX_TTL = 30
+FII_TTL = 60
+EARNINGS_TTL = 300
+OPTION_CHAIN_TTL = 0
+
+
+def news_query(symbol: str) -> str:
+    return QUERY_MAP.get(symbol, f"{symbol} India stock market")
+
+
+def option_chain_ok(oc) -> bool:
+    """get_option_chain reports failures as {"error": ...} instead of raising."""
+    return isinstance(oc, dict) and "error" not in oc
+
+
+def context_inputs(symbol: str, action: str):
+    """(cache key, ttl) of every upstream input a signal for symbol depends on."""
+    return [
+        (f"sector_{symbol}_{action}", SECTOR_TTL),
+        (f"news_{symbol}", NEWS_TTL),
+        ("global_cues", GLOBAL_TTL),
+        ("india_vix", VIX_TTL),
+        ("fii_dii", FII_TTL),
+        ("earnings", EARNINGS_TTL),
+        (f"option_chain_{symbol}", OPTION_CHAIN_TTL),
+    ]
+
+
+# -----------------------------------------
+# FIELD SELECTION
+# -----------------------------------------
+
+# Pipeline stages and the stages they need
+STAGE_DEPS = {
+    "live": (),
+    "technical": ("live",),
+    "sector": ("technical",),  # sector confirmation depends on the technical action
+    "news": (),
+    "global": (),
+    "vix": (),
+    "fii_dii": (),
+    "event_risk": (),
+    "mood": ("global", "news", "vix", "fii_dii"),
+    "final": ("technical", "sector", "news", "global", "vix", "fii_dii", "event_risk"),
+    "options": ("technical", "mood", "sector"),
+    "resolve": ("technical", "mood", "sector"),
+}
+ALL_STAGES = frozenset(STAGE_DEPS)
+
+# Top-level payload key -> stages needed to produce it
+FIELD_STAGES = {
+    "symbol": (),
+    "interval_sec": (),
+    "price": ("live",),
+    "candles": ("live",),
+    "indicators": ("technical",),
+    "indicators_available": ("technical",),
+    "signal": ("resolve",),
+    "series": ("technical",),
+    "news": ("news",),
+    "sector_view": ("sector",),
+    "global": ("global",),
+    "vix": ("vix",),
+    "fii_dii": ("fii_dii",),
+    "volume_analysis": ("technical",),
+    "fake_breakout": ("technical",),
+    "reversal_signals": ("technical",),
+    "reversal_prob": ("technical",),
+    "event_risk": ("event_risk",),
+    "market_mood": ("mood",),
+    "regime": ("technical",),
+    "ml_view": ("technical",),
+    "final": ("final",),
+    "ml_predict": ("technical",),
+    "options": ("options",),
+    "options_suggestion": ("options",),
+}
+
+# include= section names -> top-level keys
+SECTIONS = {
+    "price": ("symbol", "interval_sec", "price"),
+    "live": ("symbol", "interval_sec", "price", "candles"),
+    "technical": (
+        "symbol", "interval_sec", "price", "candles", "indicators", "indicators_available",
+        "series", "volume_analysis", "fake_breakout", "reversal_signals", "reversal_prob",
+        "regime", "ml_view", "ml_predict",
+    ),
+    "signal": ("symbol", "interval_sec", "price", "signal"),
+    "context": ("news", "sector_view", "global", "vix", "fii_dii", "event_risk", "market_mood"),
+    "options": ("options", "options_suggestion"),
+    "final": ("final",),
+}
+
+
+def select_fields(fields: str = None, include: str = None):
+    """
+    Parse fields= (top-level keys) and include= (section names) into the
+    set of requested keys, or None for the full payload. Raises ValueError
+    on unknown names.
+    """
+    if not fields and not include:
+        return None
+    keys = set()
+    unknown = []
+    for name in filter(None, (f.strip() for f in (fields or "").split(","))):
+        if name in FIELD_STAGES:
+            keys.add(name)
+        elif name != "meta":
+            unknown.append(name)
+    for name in filter(None, (f.strip() for f in (include or "").split(","))):
+        if name in SECTIONS:
+            keys.update(SECTIONS[name])
+        else:
+            unknown.append(name)
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+    return keys
+
+
+def required_stages(keys=None) -> frozenset:
+    """Stages needed for the requested keys (all stages when keys is None)."""
+    if keys is None:
+        return ALL_STAGES
+    needed = {"live"}
+    pending = [stage for key in keys for stage in FIELD_STAGES[key]]
+    while pending:
+        stage = pending.pop()
+        if stage not in needed:
+            needed.add(stage)
+            pending.extend(STAGE_DEPS[stage])
+    return frozenset(needed)
+
+
+def filter_payload(payload: dict, keys=None) -> dict:
+    """Keep only the requested top-level keys (meta is always kept)."""
+    if keys is None:
+        return payload
+    return {k: v for k, v in payload.items() if k in keys or k == "meta"}
+
+
+def prefetch_context(symbol: str, budget, stages=ALL_STAGES):
+    """Start the independent upstream stages in parallel."""
+    if "news" in stages:
+        budget.start(f"news_{symbol}", fetch_filtered_news, NEWS_TTL, news_query(symbol))
+    if "global" in stages:
+        budget.start("global_cues", get_global_cues, GLOBAL_TTL)
+    if "vix" in stages:
+        budget.start("india_vix", get_india_vix, VIX_TTL)
+    if "fii_dii" in stages:
+        budget.start("fii_dii", session_fii_dii_trend, FII_TTL)
+    if "event_risk" in stages:
+        budget.start("earnings", session_upcoming_results, EARNINGS_TTL)
+    if "options" in stages:
+        budget.start(f"option_chain_{symbol}", get_option_chain, OPTION_CHAIN_TTL, symbol, accept=option_chain_ok)
+
+
+# -----------------------------------------
+# LIVE PRICE / CANDLES
+# -----------------------------------------
+
+def load_live_candles(symbol: str, interval: int, limit: int, timer) -> dict:
+    """
+    Update the candle engine with a fresh spot price and return
+    {"price", "candles", "using_fallback"} or {"error": ...}.
+    """
+    # --- live price / candles --- (cache price for 1 second to avoid repeated NSE calls)
+    with timer.stage("engine"):
+        engine = get_engine(symbol, interval_sec=interval, max_candles=limit)
+    candles: list[dict] = []
+    using_fallback = False
+
+    # Try to get fresh price from NSE (not cached)
+    price = None
+    price_cache_key = f"nse_price_{symbol}"
+
+    try:
+        # Check if we already have a cached price from within this interval
+        # to avoid multiple update_with_price calls for the same price
+        existing_candles = engine.get_candles(include_current=True)
+        last_update_ts = existing_candles[-1]["start_ts"] if existing_candles else 0
+        time_since_last_update = engine.clock() - last_update_ts
+
+        # Only fetch and update if enough time has passed (at least half the interval)
+        should_update = time_since_last_update >= (interval / 2)
+
+        if should_update:
+            # Try to get fresh price
+            with timer.stage("price"):
+                price = get_nse_spot_price(symbol)
+            # Cache it for 1 second for other simultaneous requests
+            cache_set(price_cache_key, price, ttl=1)
+            price = float(price)
+            # Update engine with fresh price
+            with timer.stage("engine"):
+                engine.update_with_price(price)
+        else:
+            # Too soon to update - just use existing data
+            price = existing_candles[-1]["close"] if existing_candles else None
+
+    except Exception as price_error:
+        # NSE API failed - use fallback strategies
+        cached_price = cache_get(price_cache_key)
+        if cached_price is not None:
+            price = cached_price
+        else:
+            # Use pre-populated historical candles
+            candles = engine.get_candles()[-limit:]
+            if candles:
+                price = candles[-1]["close"]
+                using_fallback = False  # We're using real historical data
+            else:
+                # Last resort: sample candles
+                sample_candles = load_sample_candles(symbol, limit)
+                if sample_candles:
+                    candles = sample_candles
+                    price = sample_candles[-1]["close"]
+                    using_fallback = True
+                else:
+                    return {"error": f"Failed to fetch spot price: {price_error}"}
+
+    # Get candles from engine if we haven't already
+    if not candles:
+        candles = engine.get_candles()[-limit:]
+
+    # If still no candles, try fallback data
+    if not candles:
+        sample_candles = load_sample_candles(symbol, limit)
+        if sample_candles:
+            candles = sample_candles
+            price = price if price is not None else sample_candles[-1]["close"]
+            using_fallback = True
+        else:
+            # Generate synthetic candles as last resort
+            from fallback_data import generate_synthetic_candles
+            if price:
+                candles = generate_synthetic_candles(price, limit, interval)
+                using_fallback = True
+            else:
+                return {"error": "No candles available"}
+
+    # Validate price data
+    if price is None:
+        log.warning("⚠️ ERROR: %s has None price", symbol)
+        return {"error": f"Price data unavailable for {symbol}", "symbol": symbol}
+
+    price = float(price)
+    if price <= 0 or pd.isna(price):
+        log.warning("⚠️ ANOMALY: %s has invalid price: %s", symbol, price)
+        return {"error": f"Invalid price data for {symbol}", "symbol": symbol}
+
+    return {"price": price, "candles": candles, "using_fallback": using_fallback}
+
+
+# -----------------------------------------
+# TECHNICAL CORE
+# -----------------------------------------
+
+def _trend(ema9, ema21, close):
+    """Returns 1 (uptrend), -1 (downtrend), or 0 (no clear trend)"""
+    # Handle None/NaN values
+    if ema9 is None or ema21 is None or close is None:
+        return 0
+    if pd.isna(ema9) or pd.isna(ema21) or pd.isna(close):
+        return 0
+    if close > ema9 > ema21:
+        return 1
+    if close < ema9 < ema21:
+        return -1
+    return 0
+
+
+def compute_technical(symbol: str, interval: int, candles: list, price: float, timer) -> dict:
+    """Indicators, multi-timeframe trend, ML view and the technical signal."""
+    # Convert candles to DataFrame and compute indicators
+    # Note: We can't easily cache this since candles change frequently
+    # But the engine itself maintains state efficiently in memory
+    with timer.stage("indicators"):
+        df = pd.DataFrame(candles)
+        df = compute_all_indicators(df)
+
+    # --- Multi-Timeframe Trend Analysis ---
+    # Current timeframe trend (1m, 3m, or 5m)
+    tf1 = _trend(df.iloc[-1]["ema9"], df.iloc[-1]["ema21"], df.iloc[-1]["close"])
+
+    with timer.stage("mtf"):
+        # Higher timeframe trend (3x current interval, e.g., 15m if current is 5m)
+        engine15 = get_engine(symbol, interval_sec=interval * 3, max_candles=40)
+        engine15.update_with_price(price)
+        candles15 = engine15.get_candles()
+
+        tf15 = 0  # default neutral
+        if candles15 and len(candles15) > 0:
+            df15 = pd.DataFrame(candles15)
+            df15 = compute_all_indicators(df15)
+            if len(df15) > 0:
+                tf15 = _trend(df15.iloc[-1]["ema9"], df15.iloc[-1]["ema21"], df15.iloc[-1]["close"])
+
+    with timer.stage("indicators"):
+        # --- Reversal Detection ---
+        reversal = detect_reversal(df)
+
+        # Extract series for charting
+        series = {
+            "ema21": df["ema21"].bfill().fillna(df["close"]).tolist(),
+            "ema50": df["ema50"].bfill().fillna(df["close"]).tolist(),
+            "supertrend": df["supertrend"].bfill().fillna(df["close"]).tolist(),
+        }
+
+        last = df.iloc[-1].to_dict()
+
+    with timer.stage("ml"):
+        # --- ML Prediction (before signal decision) ---
+        if ML_ENABLED:
+            try:
+                ml_pred = predict_next(df) or {}
+                if "enabled" not in ml_pred:
+                    ml_pred["enabled"] = True
+            except Exception as e:
+                ml_pred = {
+                    "enabled": False,
+                    "error": str(e)
+                }
+        else:
+            ml_pred = {"enabled": False, "reason": "ML models not loaded"}
+
+        # --- 1) ML Ensemble View ---
+        ml_view = ensemble_ml(ml_pred if isinstance(ml_pred, dict) else {})
+
+        # --- 2) Reversal Probability AI ---
+        rev_prob = reversal_probability(df)
+
+        # --- 3) Market Regime Detection ---
+        regime = detect_regime(last, ml_view.get("trend_label", "neutral"))
+
+    # Debug: Check what's in the last row (sampled; nothing is formatted unless written)
+    debug_sample = log.isEnabledFor(logging.DEBUG) and sampled()
+    if debug_sample:
+        log.debug("last row keys: %s", list(last.keys()))
+        log.debug("last row sample: close=%s, rsi14=%s, ema21=%s", last.get("close"), last.get("rsi14"), last.get("ema21"))
+        log.debug("DataFrame shape: %s, columns: %s", df.shape, list(df.columns))
+
+    # Build raw indicators dict
+    raw_indicators = {
+        "ema9": last.get("ema9"),
+        "ema21": last.get("ema21"),
+        "ema50": last.get("ema50"),
+        "ema200": last.get("ema200"),
+        "rsi14": last.get("rsi14"),
+        "macd": last.get("macd"),
+        "macd_signal": last.get("macd_signal"),
+        "macd_hist": last.get("macd_hist"),
+        "atr14": last.get("atr14"),
+        "bb_upper": last.get("bb_upper"),
+        "bb_lower": last.get("bb_lower"),
+        "bb_width": last.get("bb_width"),
+        "bb_percent": last.get("bb_percent"),
+        "supertrend": last.get("supertrend"),
+    }
+
+    # Validate indicators (returns None for invalid/insufficient data)
+    indicators = validate_indicators(raw_indicators)
+    if debug_sample:
+        log.debug("validated indicators: %s", indicators)
+
+    # Check if we can generate reasoning with current data
+    can_reason, reason_msg = can_generate_reasoning(indicators)
+    if not can_reason:
+        log.debug("Cannot generate reasoning: %s", reason_msg)
+
+    with timer.stage("signal"):
+        # --- technical signal (with ML influence) ---
+        signal = decide_signal(last, ml_pred=ml_pred)
+
+        # --- Volume & Fake breakout ---
+        vol_score, vol_comment = detect_volume_anomaly(df)
+        brk_score, brk_comment = detect_fake_breakout(df)
+
+    # --- Add Multi-Timeframe data to signal ---
+    signal["mtf"] = {
+        "tf1": tf1,      # Current timeframe (1m, 3m, or 5m)
+        "tf15": tf15     # Higher timeframe (3x current interval)
+    }
+
+    return {
+        "df": df,
+        "last": last,
+        "series": series,
+        "indicators": indicators,
+        "indicators_available": can_reason,  # Flag for frontend
+        "signal": signal,
+        "action": signal["action"],  # BUY / SELL / WAIT (before conflict resolution)
+        "tech_component": signal["confidence"],  # 0..1
+        "ml_pred": ml_pred,
+        "ml_view": ml_view,
+        "rev_prob": rev_prob,
+        "regime": regime,
+        "reversal": reversal,
+        "volume": (vol_score, vol_comment),
+        "breakout": (brk_score, brk_comment),
+    }
+
+
+# -----------------------------------------
+# MARKET CONTEXT
+# -----------------------------------------
+
+def fetch_sector(symbol: str, action: str, budget, timer) -> dict:
+    # --- sector confirmation --- (cache for 30 seconds)
+    with timer.stage("sector"):
+        sector_score, sector_comments, sector_changes = budget.call(
+            "sector", f"sector_{symbol}_{action}", sector_score_for_symbol, SECTOR_TTL, symbol, action,
+            share=0.3, default=(0.0, [], {})
+        )
+    return {
+        "sector_score": sector_score,
+        "sector_comments": sector_comments,
+        "sector_changes": sector_changes,
+    }
+
+
+def fetch_news(symbol: str, budget, timer) -> dict:
+    # --- news sentiment --- (cache for 60 seconds)
+    with timer.stage("news"):
+        try:
+            headlines = budget.call(
+                "news", f"news_{symbol}", fetch_filtered_news, NEWS_TTL, news_query(symbol),
+                share=0.3, default=[]
+            )
+            sentiment_raw, sentiment_summary = analyze_sentiment(headlines)
+        except Exception as news_error:
+            log.warning("⚠️ News fetch failed: %s", news_error)
+            headlines = []
+            sentiment_raw, sentiment_summary = 0.0, "News data unavailable."
+    return {
+        "sentiment_score": sentiment_raw,
+        "sentiment_summary": sentiment_summary,
+        "headlines": headlines,
+    }
+
+
+def fetch_global(budget, timer) -> dict:
+    # --- global cues --- (cache for 30 seconds)
+    with timer.stage("global"):
+        global_data = budget.call(
+            "global", "global_cues", get_global_cues, GLOBAL_TTL,
+            share=0.3, default=empty_global_cues()
+        )
+        global_score, global_comments = compute_global_bias(global_data)
+    return {
+        "data": global_data,
+        "score": global_score,
+        "comments": global_comments,
+    }
+
+
+def fetch_vix(budget, timer) -> dict:
+    # --- VIX regime --- (cache for 30 seconds)
+    with timer.stage("vix"):
+        vix_val = budget.call("vix", "india_vix", get_india_vix, VIX_TTL, share=0.2)
+        vix_risk_score, vix_label, vix_comment = vix_risk_level(vix_val)
+    return {
+        "value": vix_val,
+        "label": vix_label,
+        "comment": vix_comment,
+        "risk_score": vix_risk_score,
+    }
+
+
+def fetch_fii(budget, timer) -> dict:
+    # --- FII/DII --- (cache for 60 seconds)
+    with timer.stage("fii_dii"):
+        fii_score_raw, fii_label, fii_comments = budget.call(
+            "fii_dii", "fii_dii", session_fii_dii_trend, FII_TTL,
+            share=0.2, default=(0, "Unknown", "FII/DII data pending.")
+        )
+    return {
+        "score": fii_score_raw,
+        "label": fii_label,
+        "comments": fii_comments,
+    }
+
+
+def fetch_event_risk(symbol: str, budget, timer) -> dict:
+    # --- Event / Earnings risk --- (cache for 300 seconds = 5 minutes)
+    with timer.stage("earnings"):
+        earnings = budget.call(
+            "earnings", "earnings", session_upcoming_results, EARNINGS_TTL,
+            share=0.2, default=[]
+        )
+        # decide which sectors to look at for this symbol
+        if symbol in ("NIFTY", "NIFTY50"):
+            sectors_list = list(SECTOR_STOCKS.keys())
+        elif symbol == "BANKNIFTY":
+            sectors_list = ["BANKS", "FINANCIAL"]
+        else:
+            sectors_list = list(SECTOR_STOCKS.keys())
+
+        risk_total = 0.0
+        risk_dates = {}
+        risk_reasons = []
+
+        for sec in sectors_list:
+            r, dt, reasons = sector_event_risk(SECTOR_STOCKS[sec], earnings)
+            risk_total += r
+            if dt:
+                risk_dates[sec] = dt
+            risk_reasons.extend(reasons)
+
+    return {
+        "score": min(risk_total, 1.0),  # 0..1
+        "next_results": risk_dates,
+        "reasons": risk_reasons,
+    }
+
+
+def compute_mood(global_view: dict, news: dict, vix: dict, fii: dict) -> int:
+    # --- Market Mood ---
+    try:
+        return compute_market_mood(
+            global_view["data"],
+            {"sentiment_raw": news["sentiment_score"]},
+            vix["value"],
+            {"fii_net": fii["score"] * 1000}
+        )
+    except Exception as e:
+        log.warning("⚠️ Market mood computation failed: %s", e)
+        return 50  # neutral fallback
+
+
+def market_context(symbol: str, action, budget, timer, stages=ALL_STAGES) -> dict:
+    """Sector, news, global cues, VIX, FII/DII, event risk and market mood (requested stages only)."""
+    ctx = {}
+    if "sector" in stages:
+        ctx["sector_view"] = fetch_sector(symbol, action, budget, timer)
+    if "news" in stages:
+        ctx["news"] = fetch_news(symbol, budget, timer)
+    if "global" in stages:
+        ctx["global"] = fetch_global(budget, timer)
+    if "vix" in stages:
+        ctx["vix"] = fetch_vix(budget, timer)
+    if "fii_dii" in stages:
+        ctx["fii_dii"] = fetch_fii(budget, timer)
+    if "event_risk" in stages:
+        ctx["event_risk"] = fetch_event_risk(symbol, budget, timer)
+    if "mood" in stages:
+        ctx["market_mood"] = compute_mood(ctx["global"], ctx["news"], ctx["vix"], ctx["fii_dii"])
+    return ctx
+
+
+# -----------------------------------------
+# FINAL SCORE
+# -----------------------------------------
+
+def final_recommendation(tech: dict, ctx: dict) -> dict:
+    """Weighted combination of technical and context components."""
+    action = tech["action"]
+    tech_component = tech["tech_component"]
+    sector_component = (ctx["sector_view"]["sector_score"] + 1) / 2  # -1..1 -> 0..1
+    sentiment_component = (ctx["news"]["sentiment_score"] + 1) / 2  # -1..1 -> 0..1
+    global_component = (ctx["global"]["score"] + 1) / 2  # -1..1 -> 0..1
+    vix_component = 1 - ctx["vix"]["risk_score"]  # high risk => lower confidence
+    fii_component = (ctx["fii_dii"]["score"] + 1) / 2  # -1..1 -> 0..1
+    vol_component = (tech["volume"][0] + 1) / 2
+    brk_component = (tech["breakout"][0] + 1) / 2
+    event_risk_score = ctx["event_risk"]["score"]
+
+    # --- final combined score ---
+    base_score = (
+        0.35 * tech_component +
+        0.15 * sector_component +
+        0.15 * sentiment_component +
+        0.10 * global_component +
+        0.10 * fii_component +
+        0.10 * vol_component +
+        0.05 * brk_component
+    )
+
+    ml_score = tech["ml_view"].get("final_ml_score")
+    if isinstance(ml_score, (int, float)):
+        if action == "BUY" and ml_score > 0.60:
+            base_score += 0.07
+        elif action == "SELL" and ml_score < 0.40:
+            base_score += 0.07
+
+    # reduce confidence for high VIX + high event risk
+    # Apply reductions separately to avoid over-penalizing (max 30% for VIX + max 20% for events)
+    vix_reduction = (1 - vix_component) * 0.3  # VIX reduces by max 30%
+    event_reduction = event_risk_score * 0.2   # Events reduce by max 20%
+    base_score *= (1 - vix_reduction - event_reduction)
+
+    final_score = round(min(max(base_score, 0.0), 1.0), 2)
+
+    if action == "BUY":
+        if final_score >= 0.75:
+            final_label = "Strong Buy"
+            final_note = "Technicals, sectors, global cues and news strongly favour longs."
+        elif final_score >= 0.6:
+            final_label = "Buy (moderate)"
+            final_note = "Bias is bullish but manage position size."
+        else:
+            final_label = "Cautious / Small Buy"
+            final_note = "Bullish bias but setup is not very strong."
+    elif action == "SELL":
+        if final_score >= 0.75:
+            final_label = "Strong Sell"
+            final_note = "Multiple factors align for downside – suitable for experienced traders."
+        elif final_score >= 0.6:
+            final_label = "Sell (moderate)"
+            final_note = "Bearish bias; use strict risk management."
+        else:
+            final_label = "Cautious / Hedge Only"
+            final_note = "Bearish hints but not a very strong short."
+    else:
+        final_label = "No Trade / Wait"
+        final_note = "Signals, sectors or news are not aligned. Better to stay out."
+
+    return {
+        "score": final_score,
+        "label": final_label,
+        "note": final_note,
+        "components": {
+            "technical": tech_component,
+            "sector": sector_component,
+            "news": sentiment_component,
+            "global": global_component,
+            "fii_dii": fii_component,
+            "volume": vol_component,
+            "breakout": brk_component,
+            "vix_factor": vix_component,
+            "event_risk": event_risk_score,
+        },
+    }
+
+
+# -----------------------------------------
+# OPTIONS
+# -----------------------------------------
+
+def options_analysis(symbol: str, price: float, tech: dict, market_mood, sector_score, budget, timer):
+    """Returns (options_analysis, options_idea)."""
+    last = tech["last"]
+    ml_pred = tech["ml_pred"]
+    ml_view = tech["ml_view"]
+
+    with timer.stage("options"):
+        # --- options suggestion ---
+        options_idea = suggest_option_strikes(symbol, float(last["close"]), tech["action"])
+
+        # --- Advanced Options Analysis ---
+        analysis = {}
+        try:
+            # 1) Fetch Option Chain
+            oc = budget.call(
+                "options", f"option_chain_{symbol}", get_option_chain, OPTION_CHAIN_TTL, symbol,
+                share=0.4, default={"error": "Option chain fetch exceeded latency budget"},
+                accept=option_chain_ok
+            )
+
+            # Check if options fetcher returned an error
+            if "error" in oc:
+                # Provide fallback values for better UX
+                analysis = {
+                    "pcr": 1.0,
+                    "oi_trend": "Neutral",
+                    "iv_trend": "Stable",
+                    "note": "Options data temporarily unavailable - using neutral values",
+                    "error": f"Option chain fetch failed: {oc['error']}"
+                }
+            else:
+                records = oc.get("records", {}).get("data", [])
+
+                if not records:
+                    # Provide fallback values when no records available
+                    analysis = {
+                        "pcr": 1.0,
+                        "oi_trend": "Neutral",
+                        "iv_trend": "Stable",
+                        "note": "Options data temporarily unavailable - using neutral values",
+                        "error": "No option chain data available from NSE"
+                    }
+                else:
+                    # 2) Choose strike set
+                    strikes = [x["strikePrice"] for x in records]
+                    strike_info = choose_strike(price, strikes)
+
+                    # ATM data
+                    atm_strike = strike_info["atm"]
+                    atm_data = next((item for item in records if item["strikePrice"] == atm_strike), None)
+
+                    if atm_data:
+                        ce = atm_data.get("CE", {})
+                        pe = atm_data.get("PE", {})
+
+                        # 3) IV Analysis
+                        iv_info = iv_trend(ce, pe)
+
+                        # 4) OI Analysis
+                        oi_info = analyze_oi(ce, pe)
+
+                        # 5) Greeks (using CE IV for ATM, 1 day to expiry as default)
+                        ce_iv = ce.get("impliedVolatility", 20.0)
+                        greeks = bs_greeks(price, atm_strike, ce_iv, 1)
+
+                        # 6) Final Option Signal
+                        # Prepare ML data with defaults if not available
+                        def _ml_prob(new_key: str, legacy_key: str) -> float:
+                            if not ml_pred or ml_pred.get("enabled") is False:
+                                return 0.5
+                            value = ml_pred.get(new_key)
+                            if value is None:
+                                value = ml_pred.get(legacy_key, 0.5)
+                            try:
+                                return float(value)
+                            except (TypeError, ValueError):
+                                return 0.5
+
+                        ml_for_options = {
+                            "next_1_up": _ml_prob("p1", "next_1_up"),
+                            "next_3_up": _ml_prob("p3", "next_3_up"),
+                            "next_5_up": _ml_prob("p5", "next_5_up"),
+                        }
+
+                        opt_signal = option_signal(
+                            ml_for_options,
+                            iv_info,
+                            oi_info,
+                            market_mood,
+                            sector_score
+                        )
+
+                        # 7) Order Flow Classification
+                        order_flow = classify_orderflow(ce, pe)
+
+                        # 8) Expected Move Calculation
+                        exp_move = expected_move(
+                            price,
+                            last["atr14"],
+                            ml_view.get("final_ml_score", 0.5)
+                        )
+
+                        analysis = {
+                            "strike": strike_info,
+                            "iv": iv_info,
+                            "oi": oi_info,
+                            "greeks": greeks,
+                            "order_flow": order_flow,
+                            "exp_move": exp_move,
+                            "signal": opt_signal
+                        }
+                    else:
+                        analysis = {"error": "ATM strike data not found"}
+
+        except Exception as e:
+            analysis = {"error": f"Option analysis failed: {str(e)}"}
+
+    return analysis, options_idea
+
+
+# -----------------------------------------
+# CONFLICT RESOLUTION / PAYLOAD
+# -----------------------------------------
+
+def resolve_signal(tech: dict, ctx: dict, timer):
+    """Resolve conflicts between signal, ML, indicators, market mood and sector."""
+    signal = tech["signal"]
+    with timer.stage("conflict"):
+        final_action, updated_reasons = resolve_conflicts(
+            signal,
+            tech["ml_pred"],
+            tech["indicators"],
+            ctx["market_mood"],
+            ctx["sector_view"]
+        )
+
+    # Update signal with resolved action and reasons
+    signal["action"] = final_action
+    signal["reasons"] = updated_reasons
+
+
+def candles_to_chart(candles: list) -> list:
+    """Convert engine candles to Lightweight Charts format."""
+    candles_out = []
+    for c in candles:
+        # c is e.g. {"start_ts": ..., "open":..., "high":..., "low":..., "close":...}
+        ts = int(c.get("start_ts", 0))
+        candles_out.append({
+            "time": ts,
+            "open": float(c["open"]),
+            "high": float(c["high"]),
+            "low": float(c["low"]),
+            "close": float(c["close"]),
+        })
+    return candles_out
+
+
+def apply_since(payload: dict, since: int = None) -> dict:
+    """
+    Delta-encode candles and series for a client that already has candles
+    up to `since` (the time of its last candle).
+
+    Returns a copy with only the candles (and series points) from `since`
+    onward; that candle is included because it may still be forming. When
+    the window does not contain `since` the full arrays are returned.
+    In both cases payload["delta"] says which one it is.
+    """
+    candles = payload.get("candles")
+    if since is None or candles is None:
+        return payload
+
+    times = [c["time"] for c in candles]
+    out = dict(payload)
+    if not times or since not in times:
+        reason = "since is older than the server window" if times and since < times[0] else "unknown since"
+        out["delta"] = {"since": since, "full": True, "reason": reason, "count": len(candles)}
+        return out
+
+    keep = len(times) - times.index(since)
+    out["candles"] = candles[-keep:]
+    if "series" in payload:
+        out["series"] = {name: values[-keep:] for name, values in payload["series"].items()}
+    out["delta"] = {"since": since, "full": False, "count": keep, "window_start": times[0]}
+    return out
+
+
+def assemble_payload(symbol, interval, live, tech, ctx, final, options, options_idea, budget, timer) -> dict:
+    """Payload from whichever stages ran (tech, final and options may be None)."""
+    with timer.stage("serialize"):
+        candles_out = candles_to_chart(live["candles"])
+
+    # Log candle data being sent
+    if candles_out and log.isEnabledFor(logging.DEBUG) and sampled():
+        latest_candle = candles_out[-1]
+        log.debug("📤 Sending %d candles for %s, latest: time=%s, close=%s",
+                  len(candles_out), symbol, latest_candle["time"], latest_candle["close"])
+
+    payload = {
+        "symbol": symbol,
+        "interval_sec": interval,
+        "price": float(tech["last"]["close"]) if tech else float(live["price"]),
+        "candles": candles_out,
+    }
+
+    if tech:
+        series = tech["series"]
+        vol_score, vol_comment = tech["volume"]
+        brk_score, brk_comment = tech["breakout"]
+        payload.update({
+            "indicators": tech["indicators"],
+            "indicators_available": tech["indicators_available"],  # NEW: Flag if indicators valid
+            "signal": tech["signal"],
+            "series": {
+                name: values[-len(candles_out):] if len(values) > 0 else []
+                for name, values in series.items()
+            },
+            "volume_analysis": {
+                "score": vol_score,
+                "comment": vol_comment,
+            },
+            "fake_breakout": {
+                "score": brk_score,
+                "comment": brk_comment,
+            },
+            "reversal_signals": tech["reversal"],
+            "reversal_prob": tech["rev_prob"].get("prob", 0.5),  # NEW: AI reversal probability
+            "regime": tech["regime"],  # NEW: Market regime (trending/ranging/volatile)
+            "ml_view": tech["ml_view"],  # NEW: ML ensemble view with trend labels
+            "ml_predict": tech["ml_pred"],
+        })
+
+    payload.update(ctx)
+
+    if final is not None:
+        payload["final"] = final
+    if options_idea is not None:
+        payload["options"] = options if options else options_idea
+        payload["options_suggestion"] = options_idea  # Keep simple suggestion for backward compatibility
+
+    payload["meta"] = {
+        "data_source": "fallback" if live["using_fallback"] else "live",
+        **budget.meta(),
+    }
+    return payload
+
+
+def build_signal(symbol: str, interval: int, limit: int, budget, timer, keys=None) -> dict:
+    """
+    Run the pipeline. Returns the signal_live payload or {"error": ...}.
+
+    keys (from select_fields) limits the payload to those top-level keys;
+    stages none of them need are skipped entirely.
+    """
+    stages = required_stages(keys)
+    prefetch_context(symbol, budget, stages)
+
+    live = load_live_candles(symbol, interval, limit, timer)
+    if "error" in live:
+        return live
+
+    tech = None
+    if "technical" in stages:
+        tech = compute_technical(symbol, interval, live["candles"], live["price"], timer)
+
+    ctx = market_context(symbol, tech["action"] if tech else None, budget, timer, stages)
+
+    final = final_recommendation(tech, ctx) if "final" in stages else None
+
+    options, options_idea = None, None
+    if "options" in stages:
+        options, options_idea = options_analysis(
+            symbol, live["price"], tech, ctx["market_mood"], ctx["sector_view"]["sector_score"], budget, timer
+        )
+    if "resolve" in stages:
+        resolve_signal(tech, ctx, timer)
+
+    payload = assemble_payload(symbol, interval, live, tech, ctx, final, options, options_idea, budget, timer)
+    return filter_payload(payload, keys)
@@ -0,0 +1,137 @@
+"""
+Progressive signal delivery (/api/signal_stream, Server-Sent Events).
+
+The technical core (price, candles, indicators, technical signal) is
+emitted as soon as it is computed; the slow context stages follow as
+separate events in the order they complete:
+
+    core -> news / global / vix / fii_dii / event_risk / sector_view (any order)
+         -> market_mood -> options -> final -> done
+
+Every event's data is an object of top-level signal_live keys, so a client
+can merge them into one payload. "final" carries the combined score and
+the conflict-resolved signal.
+A context stage that raises is reported as a "stage_error" event and
+replaced by a neutral value, so the stream still completes. "error" is
+only sent when the stream ends.
+When a snapshot is already running, every event is sent from it at once.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from fast_json import dumps_str
+from global_cues import compute_global_bias, empty_global_cues
+from signal_pipeline import (
+    load_live_candles, compute_technical, prefetch_context, fetch_sector, fetch_news, fetch_global,
+    fetch_vix, fetch_fii, fetch_event_risk, compute_mood, final_recommendation, options_analysis,
+    resolve_signal, assemble_payload,
+)
+from vix import vix_risk_level
+
+log = logging.getLogger(__name__)
+
+CONTEXT_EVENTS = ("news", "global", "vix", "fii_dii", "event_risk", "sector_view")
+CORE_EXCLUDE = set(CONTEXT_EVENTS) | {"market_mood", "options", "options_suggestion", "final", "meta"}
+
+_executor = ThreadPoolExecutor(max_workers=12, thread_name_prefix="sse")
+
+
+def sse_event(event: str, data, event_id: int = None) -> str:
+    """One text/event-stream frame."""
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {dumps_str(data)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def _unavailable(name: str) -> dict:
+    """Neutral value of a context section (what its fetcher returns on budget defaults)."""
+    if name == "sector_view":
+        return {"sector_score": 0.0, "sector_comments": [], "sector_changes": {}}
+    if name == "news":
+        return {"sentiment_score": 0.0, "sentiment_summary": "News data unavailable.", "headlines": []}
+    if name == "global":
+        data = empty_global_cues()
+        score, comments = compute_global_bias(data)
+        return {"data": data, "score": score, "comments": comments}
+    if name == "vix":
+        risk_score, label, comment = vix_risk_level(None)
+        return {"value": None, "label": label, "comment": comment, "risk_score": risk_score}
+    if name == "fii_dii":
+        return {"score": 0, "label": "Unknown", "comments": "FII/DII data pending."}
+    return {"score": 0.0, "next_results": {}, "reasons": []}  # event_risk
+
+
+def _core(payload: dict) -> dict:
+    return {k: v for k, v in payload.items() if k not in CORE_EXCLUDE}
+
+
+def events_from_payload(payload: dict):
+    """All events of a complete signal_live payload (snapshot path)."""
+    yield "core", _core(payload)
+    for name in CONTEXT_EVENTS:
+        if name in payload:
+            yield name, {name: payload[name]}
+    yield "market_mood", {"market_mood": payload.get("market_mood")}
+    yield "options", {"options": payload.get("options"), "options_suggestion": payload.get("options_suggestion")}
+    yield "final", {"final": payload.get("final"), "signal": payload.get("signal")}
+    yield "done", {"meta": payload.get("meta", {})}
+
+
+def stream_events(symbol: str, interval: int, limit: int, budget, timer):
+    """Run the pipeline, yielding (event, data) as each stage completes."""
+    prefetch_context(symbol, budget)
+
+    live = load_live_candles(symbol, interval, limit, timer)
+    if "error" in live:
+        yield "error", live
+        return
+
+    tech = compute_technical(symbol, interval, live["candles"], live["price"], timer)
+    core = assemble_payload(symbol, interval, live, tech, {}, None, None, None, budget, timer)
+    # the signal is re-sent with "final" after conflict resolution
+    core["signal"] = dict(tech["signal"])
+    yield "core", _core(core)
+
+    fetchers = {
+        "sector_view": (fetch_sector, (symbol, tech["action"], budget, timer)),
+        "news": (fetch_news, (symbol, budget, timer)),
+        "global": (fetch_global, (budget, timer)),
+        "vix": (fetch_vix, (budget, timer)),
+        "fii_dii": (fetch_fii, (budget, timer)),
+        "event_risk": (fetch_event_risk, (symbol, budget, timer)),
+    }
+    futures = {_executor.submit(func, *args): name for name, (func, args) in fetchers.items()}
+    ctx = {}
+    for future in as_completed(futures):
+        name = futures[future]
+        try:
+            ctx[name] = future.result()
+        except Exception as e:
+            # one failed section must not cost the client the rest of the signal
+            log.warning("⚠️ Signal stream stage %s failed for %s: %s", name, symbol, e)
+            yield "stage_error", {"stage": name, "error": str(e)}
+            ctx[name] = _unavailable(name)
+        yield name, {name: ctx[name]}
+
+    ctx["market_mood"] = compute_mood(ctx["global"], ctx["news"], ctx["vix"], ctx["fii_dii"])
+    yield "market_mood", {"market_mood": ctx["market_mood"]}
+
+    final = final_recommendation(tech, ctx)
+    options, options_idea = options_analysis(
+        symbol, live["price"], tech, ctx["market_mood"], ctx["sector_view"]["sector_score"], budget, timer
+    )
+    yield "options", {"options": options if options else options_idea, "options_suggestion": options_idea}
+
+    resolve_signal(tech, ctx, timer)
+    yield "final", {"final": final, "signal": tech["signal"]}
+
+    yield "done", {"meta": {"data_source": core["meta"]["data_source"], **budget.meta()}}
+
+
+def sse_frames(events, timer):
+    """Encode (event, data) pairs as SSE frames; records the stream's total time at the end."""
+    for event_id, (event, data) in enumerate(events):
+        yield sse_event(event, data, event_id)
+    timer.server_timing()
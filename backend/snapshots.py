@@ -0,0 +1,228 @@
+"""
+Precomputed /api/signal_live snapshots.
+
+The full signal pipeline (indicators, ML, context, options) only changes
+meaningfully when a candle closes or an upstream input refreshes, so one
+background producer per (symbol, interval, limit) rebuilds the payload
+on those events. Requests serve the latest snapshot with the live price
+and forming candle patched in instead of recomputing everything.
+
+Producers exist only for the candle limits the dashboards request
+(SNAPSHOT_LIMITS); other limits reuse the snapshot of the next larger one
+when it is running, and are computed inline otherwise. A producer stops,
+and is dropped, after IDLE_SEC without readers.
+Set SIGNAL_SNAPSHOTS=0 to compute every request inline.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from cache_helper import cache_entry
+from latency_budget import LatencyBudget
+from live_candles import get_engine
+from signal_pipeline import build_signal, candles_to_chart, context_inputs
+from stage_timing import StageTimer
+
+log = logging.getLogger(__name__)
+
+SNAPSHOTS_ENABLED = os.environ.get("SIGNAL_SNAPSHOTS", "1") != "0"
+
+POLL_SEC = 1.0
+MIN_REBUILD_SEC = 5.0   # input-driven rebuilds are throttled to this
+MAX_AGE_SEC = 30.0      # rebuild regardless after this long
+IDLE_SEC = 120.0
+SNAPSHOT_LIMITS = (50, 80, 100, 200)
+
+
+class Snapshot:
+    def __init__(self, payload: dict, version: int, closed_marker):
+        self.payload = payload
+        self.version = version
+        self.closed_marker = closed_marker
+        self.built_at = time.time()
+
+    def age_ms(self) -> float:
+        return (time.time() - self.built_at) * 1000
+
+
+def closed_marker(symbol: str, interval: int, limit: int):
+    """Changes whenever the engine closes a candle."""
+    engine = get_engine(symbol, interval_sec=interval, max_candles=limit)
+    if not engine.candles:
+        return None
+    return engine.candles[-1].start_ts
+
+
+class SnapshotProducer:
+    """Background rebuilder for one (symbol, interval, limit)."""
+
+    def __init__(self, symbol: str, interval: int, limit: int):
+        self.symbol = symbol
+        self.interval = interval
+        self.limit = limit
+        self.snapshot: Optional[Snapshot] = None
+        self.version = 0
+        self.builds = 0
+        self.last_read = time.time()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    # --- readers ---
+
+    def latest(self) -> Optional[Snapshot]:
+        """
+        Latest snapshot, keeping the producer alive. With no snapshot yet
+        the caller builds inline and publish() seeds and starts the
+        producer, so a cold start builds once.
+        """
+        self.last_read = time.time()
+        if self.snapshot is not None:
+            self._ensure_running()
+        return self.snapshot
+
+    def publish(self, payload: dict, closed_marker=None) -> Snapshot:
+        """Store a payload built elsewhere (e.g. a cold-start request)."""
+        with self._lock:
+            self.version += 1
+            self.snapshot = Snapshot(payload, self.version, closed_marker)
+            snapshot = self.snapshot
+        self._ensure_running()
+        return snapshot
+
+    # --- producer loop ---
+
+    def _ensure_running(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name=f"snapshot-{self.symbol}-{self.interval}", daemon=True
+                )
+                self._thread.start()
+
+    def _inputs_due(self, snap: Snapshot) -> bool:
+        action = snap.payload.get("signal", {}).get("action", "WAIT")
+        now = time.time()
+        for key, ttl in context_inputs(self.symbol, action):
+            if ttl <= 0:
+                continue  # fetched fresh on every build (option chain); never a rebuild trigger
+            entry = cache_entry(key)
+            if entry is None:
+                return True
+            ts = entry[0]
+            # refreshed by another caller since the build, or expired
+            if ts > snap.built_at or now - ts >= ttl:
+                return True
+        return False
+
+    def _needs_rebuild(self) -> bool:
+        snap = self.snapshot
+        if snap is None:
+            return True
+        if closed_marker(self.symbol, self.interval, self.limit) != snap.closed_marker:
+            return True
+        age = time.time() - snap.built_at
+        if age >= MAX_AGE_SEC:
+            return True
+        return age >= MIN_REBUILD_SEC and self._inputs_due(snap)
+
+    def rebuild(self):
+        timer = StageTimer("signal_snapshot")
+        payload = build_signal(self.symbol, self.interval, self.limit, LatencyBudget(), timer)
+        self.builds += 1
+        if "error" in payload:
+            log.warning("⚠️ Snapshot build failed for %s: %s", self.symbol, payload["error"])
+            return
+        timer.server_timing()  # records the build's total
+        self.publish(payload, closed_marker(self.symbol, self.interval, self.limit))
+
+    def _run(self):
+        log.info("📸 Snapshot producer started for %s (%ss)", self.symbol, self.interval)
+        while time.time() - self.last_read < IDLE_SEC:
+            try:
+                if self._needs_rebuild():
+                    self.rebuild()
+            except Exception as e:
+                log.exception("⚠️ Snapshot producer error for %s: %s", self.symbol, e)
+            time.sleep(POLL_SEC)
+        with _registry_lock:
+            key = (self.symbol, self.interval, self.limit)
+            if _producers.get(key) is self and time.time() - self.last_read >= IDLE_SEC:
+                del _producers[key]
+        log.info("💤 Snapshot producer idle, stopping %s (%ss)", self.symbol, self.interval)
+
+    def status(self) -> Dict:
+        snap = self.snapshot
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "version": snap.version if snap else 0,
+            "age_ms": round(snap.age_ms(), 1) if snap else None,
+            "builds": self.builds,
+        }
+
+
+# Global registry: one producer per symbol+interval+limit
+_producers: Dict[Tuple[str, int, int], SnapshotProducer] = {}
+_registry_lock = threading.Lock()
+
+
+def snapshot_limit(limit: int) -> Optional[int]:
+    """Smallest snapshot limit covering `limit` (None above the largest)."""
+    return next((allowed for allowed in SNAPSHOT_LIMITS if allowed >= limit), None)
+
+
+def get_producer(symbol: str, interval: int, limit: int) -> Optional[SnapshotProducer]:
+    """Producer for the key, created on demand; None for limits outside SNAPSHOT_LIMITS."""
+    if limit not in SNAPSHOT_LIMITS:
+        return None
+    key = (symbol.upper(), interval, limit)
+    with _registry_lock:
+        if key not in _producers:
+            _producers[key] = SnapshotProducer(*key)
+        return _producers[key]
+
+
+def peek_snapshot(symbol: str, interval: int, limit: int) -> Optional[Snapshot]:
+    """
+    Latest snapshot of a running producer covering `limit`, without
+    starting one or counting as a reader.
+    """
+    covering = snapshot_limit(limit)
+    if covering is None:
+        return None
+    producer = _producers.get((symbol.upper(), interval, covering))
+    if producer is None or not producer.status()["running"]:
+        return None
+    return producer.snapshot
+
+
+def _align(values: list, n: int) -> list:
+    """Trim or pad (repeating the last value) a series to n points."""
+    if not values:
+        return []
+    if len(values) >= n:
+        return values[-n:]
+    return values + [values[-1]] * (n - len(values))
+
+
+def patch_live(snapshot: Snapshot, live: dict) -> dict:
+    """Snapshot payload with the live price and candles patched in."""
+    payload = dict(snapshot.payload)
+    candles_out = candles_to_chart(live["candles"])
+    payload["price"] = float(live["price"])
+    payload["candles"] = candles_out
+    payload["series"] = {
+        name: _align(values, len(candles_out))
+        for name, values in snapshot.payload.get("series", {}).items()
+    }
+    payload["meta"] = {
+        **snapshot.payload.get("meta", {}),
+        "data_source": "fallback" if live["using_fallback"] else "live",
+        "snapshot": {"version": snapshot.version, "age_ms": round(snapshot.age_ms(), 1)},
+    }
+    return payload
+
+
+def snapshot_status() -> Dict[str, Dict]:
+    return {f"{s}_{i}_{l}": p.status() for (s, i, l), p in list(_producers.items())}
@@ -0,0 +1,85 @@
+"""
+Per-stage request timing.
+
+StageTimer measures named stages of one request and renders them as a
+Server-Timing header. Every measurement also feeds a rolling window per
+(endpoint, stage) so /api/metrics/timings can report percentiles.
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict
+
+WINDOW = 1000
+
+# "endpoint.stage" -> recent durations in ms
+_samples: Dict[str, Deque[float]] = {}
+_samples_lock = threading.Lock()
+
+
+def record(endpoint: str, stage: str, ms: float):
+    key = f"{endpoint}.{stage}"
+    with _samples_lock:
+        if key not in _samples:
+            _samples[key] = deque(maxlen=WINDOW)
+        _samples[key].append(ms)
+
+
+def _percentile(ordered, pct: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def stage_percentiles() -> Dict[str, Dict[str, float]]:
+    """p50/p95/p99 (ms) and sample count per endpoint stage."""
+    with _samples_lock:
+        snapshot = {key: sorted(values) for key, values in _samples.items() if values}
+    return {
+        key: {
+            "p50": round(_percentile(values, 0.50), 2),
+            "p95": round(_percentile(values, 0.95), 2),
+            "p99": round(_percentile(values, 0.99), 2),
+            "count": len(values),
+        }
+        for key, values in sorted(snapshot.items())
+    }
+
+
+class StageTimer:
+    """
+    Usage:
+        timer = StageTimer("signal_live")
+        with timer.stage("news"):
+            ...
+        response.headers["Server-Timing"] = timer.server_timing()
+    """
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.started = time.perf_counter()
+        self.timings: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            ms = (time.perf_counter() - start) * 1000
+            self.timings[name] = self.timings.get(name, 0.0) + ms
+            record(self.endpoint, name, ms)
+
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def meta(self) -> Dict[str, float]:
+        """Stage durations (ms) for the response's meta block."""
+        return {name: round(ms, 2) for name, ms in self.timings.items()}
+
+    def server_timing(self) -> str:
+        """Header value, e.g. 'price;dur=12.3, news;dur=0.4, total;dur=95.1'."""
+        total = self.total_ms()
+        record(self.endpoint, "total", total)
+        parts = [f"{name};dur={ms:.1f}" for name, ms in self.timings.items()]
+        parts.append(f"total;dur={total:.1f}")
+        return ", ".join(parts)
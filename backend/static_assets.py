@@ -0,0 +1,150 @@
+"""
+Frontend static files served from memory with validators and precompression.
+
+Every .html/.css/.js file in frontend/ is loaded once (and reloaded when
+its mtime changes) together with gzip and brotli variants built at
+maximum compression, since the cost is paid once rather than per request.
+
+Caching:
+    - HTML references to local .css/.js files are rewritten to
+      "name?v=<content hash>", so those URLs change whenever the file does.
+    - A request carrying the current ?v= fingerprint gets
+      "public, max-age=31536000, immutable": repeat visits never ask again.
+    - Everything else (HTML, unversioned URLs) gets "no-cache" with a strong
+      ETag and Last-Modified, so a revalidation costs an empty 304.
+"""
+import gzip
+import hashlib
+import os
+import re
+import threading
+from email.utils import formatdate
+from typing import Dict, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from compression import choose_encoding
+from http_cache import is_fresh
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+FRONTEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "frontend"))
+
+MEDIA_TYPES = {
+    ".html": "text/html; charset=utf-8",
+    ".css": "text/css; charset=utf-8",
+    ".js": "application/javascript; charset=utf-8",
+}
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+MIN_PRECOMPRESS = 512  # smaller files are not worth a Content-Encoding
+
+# src="script.js?v=123" / href="styles.css" -> local asset references
+_ASSET_REF = re.compile(r'(src|href)="([\w.-]+\.(?:css|js))(?:\?v=[^"]*)?"')
+
+
+class StaticAsset:
+    """One file: identity bytes, precompressed variants and validators."""
+
+    def __init__(self, name: str, body: bytes, mtime: float):
+        self.name = name
+        self.mtime = mtime
+        self.media_type = MEDIA_TYPES[os.path.splitext(name)[1]]
+        self.set_body(body)
+
+    def set_body(self, body: bytes):
+        self.body = body
+        self.version = hashlib.blake2b(body, digest_size=8).hexdigest()
+        self.etag = f'"{self.version}"'
+        self.variants = {}
+        if len(body) >= MIN_PRECOMPRESS:
+            self.variants["gzip"] = gzip.compress(body, compresslevel=9)
+            if brotli is not None:
+                self.variants["br"] = brotli.compress(body, quality=11)
+
+    def info(self) -> dict:
+        return {
+            "version": self.version,
+            "bytes": len(self.body),
+            **{f"{enc}_bytes": len(data) for enc, data in self.variants.items()},
+        }
+
+
+_assets: Dict[str, StaticAsset] = {}
+_assets_lock = threading.Lock()
+
+
+def _fingerprint_html(html: bytes) -> bytes:
+    """Point local .css/.js references at their content-versioned URLs."""
+    def repl(match):
+        asset = _assets.get(match.group(2))
+        if asset is None:
+            return match.group(0)
+        return f'{match.group(1)}="{asset.name}?v={asset.version}"'
+    return _ASSET_REF.sub(repl, html.decode("utf-8")).encode("utf-8")
+
+
+def load_assets():
+    """(Re)load every servable frontend file; called at startup."""
+    with _assets_lock:
+        names = sorted(n for n in os.listdir(FRONTEND_DIR) if os.path.splitext(n)[1] in MEDIA_TYPES)
+        loaded = {}
+        for name in names:
+            path = os.path.join(FRONTEND_DIR, name)
+            with open(path, "rb") as f:
+                loaded[name] = StaticAsset(name, f.read(), os.path.getmtime(path))
+        _assets.clear()
+        _assets.update(loaded)
+        # HTML last, once the .css/.js versions are known
+        for asset in _assets.values():
+            if asset.name.endswith(".html"):
+                asset.set_body(_fingerprint_html(asset.body))
+
+
+def _current(name: str) -> Optional[StaticAsset]:
+    """Asset by file name, reloading everything if any file changed on disk."""
+    asset = _assets.get(name)
+    if asset is None:
+        return None
+    try:
+        if os.path.getmtime(os.path.join(FRONTEND_DIR, name)) != asset.mtime:
+            load_assets()
+            asset = _assets.get(name)
+    except OSError:
+        pass
+    return asset
+
+
+def asset_response(request: Request, name: str) -> Response:
+    """Serve a frontend file with caching headers and negotiated precompression."""
+    asset = _current(name)
+    if asset is None:
+        return Response(status_code=404)
+
+    versioned = request.query_params.get("v") == asset.version
+    headers = {
+        "ETag": asset.etag,
+        "Last-Modified": formatdate(asset.mtime, usegmt=True),
+        "Cache-Control": IMMUTABLE if versioned else REVALIDATE,
+        "Vary": "Accept-Encoding",
+    }
+    if is_fresh(request, asset.etag, asset.mtime):
+        return Response(status_code=304, headers=headers)
+
+    body = asset.body
+    encoding = choose_encoding(request.headers.get("accept-encoding", ""))
+    if encoding in asset.variants:
+        body = asset.variants[encoding]
+        headers["Content-Encoding"] = encoding
+        # same representation, different bytes
+        headers["ETag"] = f"W/{asset.etag}"
+    return Response(body, media_type=asset.media_type, headers=headers)
+
+
+def assets_status() -> dict:
+    return {name: asset.info() for name, asset in _assets.items()}
@@ -1,11 +1,15 @@
-import yfinance as yf
+from outbound import yf_history
+from rate_limit import RateLimited
 
 def get_india_vix():
     try:
-        data = yf.Ticker("^INDIAVIX").history(period="2d", interval="1d")
+        data = yf_history("^INDIAVIX", period="2d", interval="1d")
         if data.empty:
             return None
         return float(data["Close"].iloc[-1])
+    except RateLimited:
+        # our own throttling: let the cache layer keep serving the last good value
+        raise
     except Exception:
         return None
 
@@ -0,0 +1,113 @@
+"""
+Frame encodings for /ws/live.
+
+diff() produces JSON-patch style operations (RFC 6902 subset: add,
+remove, replace) that turn one packet into the next. Candle lists are
+treated as a sliding window, so a tick costs one replace of the forming
+candle and, on a close, one remove at the front plus one add at the end.
+
+pack() is the optional MessagePack encoding. Candle arrays become
+columns, with prices as little-endian float32 bytes. msgpack is optional:
+without it only JSON is offered.
+"""
+import math
+import sys
+from array import array
+from typing import Any, List
+
+from fast_json import _default
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    msgpack = None
+    MSGPACK_AVAILABLE = False
+
+MAX_SHIFT = 3   # candles a window may slide between two compared packets
+TIME_COLUMNS = ("start_ts", "time", "timestamp")  # kept exact, not float32
+
+
+def _pointer(path: str, key) -> str:
+    return f"{path}/{str(key).replace('~', '~0').replace('/', '~1')}"
+
+
+def _same(a: Any, b: Any) -> bool:
+    if a is b:
+        return True
+    try:
+        if a == b:
+            return True
+    except (TypeError, ValueError):  # e.g. array-valued comparisons
+        return False
+    return isinstance(a, float) and isinstance(b, float) and math.isnan(a) and math.isnan(b)
+
+
+def _diff_list(old: list, new: list, path: str, ops: List[dict]):
+    # sliding window: new == old[shift:] with the last overlapping item updated and items appended
+    for shift in range(min(MAX_SHIFT, len(old) - 1) + 1):
+        overlap = len(old) - shift
+        if overlap > len(new):
+            continue
+        if all(_same(old[shift + i], new[i]) for i in range(overlap - 1)):
+            ops.extend({"op": "remove", "path": f"{path}/0"} for _ in range(shift))
+            _diff(old[-1], new[overlap - 1], f"{path}/{overlap - 1}", ops)
+            ops.extend({"op": "add", "path": f"{path}/-", "value": item} for item in new[overlap:])
+            return
+    ops.append({"op": "replace", "path": path, "value": new})
+
+
+def _diff(old: Any, new: Any, path: str, ops: List[dict]):
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in old.keys() - new.keys():
+            ops.append({"op": "remove", "path": _pointer(path, key)})
+        for key, value in new.items():
+            if key not in old:
+                ops.append({"op": "add", "path": _pointer(path, key), "value": value})
+            else:
+                _diff(old[key], value, _pointer(path, key), ops)
+    elif isinstance(old, list) and isinstance(new, list) and old:
+        _diff_list(old, new, path, ops)
+    elif not _same(old, new):
+        ops.append({"op": "replace", "path": path, "value": new})
+
+
+def diff(old: dict, new: dict) -> List[dict]:
+    """Operations that turn `old` into `new`, applied in order."""
+    ops: List[dict] = []
+    _diff(old, new, "", ops)
+    return ops
+
+
+def _float32(values: list) -> bytes:
+    arr = array("f", (float("nan") if v is None else float(v) for v in values))
+    if sys.byteorder == "big":
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def columnar_candles(candles: list) -> dict:
+    """[{open, high, ...}, ...] -> {"open": <float32 bytes>, ..., "start_ts": [...]}"""
+    if not candles:
+        return {}
+    columns = {}
+    for key in candles[0]:
+        values = [c.get(key) for c in candles]
+        numeric = all(v is None or isinstance(v, (int, float)) or hasattr(v, "__float__") for v in values)
+        if key in TIME_COLUMNS or not numeric:
+            columns[key] = values
+        else:
+            columns[key] = _float32(values)
+    return columns
+
+
+def pack(obj: Any) -> bytes:
+    """MessagePack encoding; numpy and date values as in fast_json."""
+    return msgpack.packb(obj, default=_default, use_bin_type=True)
+
+
+def pack_packet(packet: dict) -> bytes:
+    """A live packet with its candles as float32 columns."""
+    if isinstance(packet.get("candles"), list):
+        packet = {**packet, "candles": columnar_candles(packet["candles"])}
+    return pack(packet)
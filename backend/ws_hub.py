@@ -0,0 +1,478 @@
+"""
+Shared /ws/live broadcast hub.
+
+One LiveStream per (symbol, interval) builds the packet once per tick,
+encodes it once and hands the same frame to every subscribed client,
+so a hundred viewers of NIFTY cost one producer plus a hundred socket
+writes. A stream's task exits when its last subscriber leaves.
+
+Ticks (price fetch, indicators, ML, encoding) run on a thread pool, and
+market context is read from the cache only (see ws_live.build_packet),
+so a slow upstream never stalls the event loop. Subscriber bookkeeping
+runs on the event loop; no locks are needed.
+
+Backpressure: producers never wait on sockets. Each client has its own
+writer task and a conflating queue holding at most one frame per stream
+(a newer frame replaces an unsent one and counts as dropped). A client
+that keeps falling behind (SLOW_DROP_LIMIT consecutive drops) or cannot
+take a frame within SEND_TIMEOUT_SEC is disconnected with code 1013.
+
+Protocol: one socket can carry many streams. Clients send
+    {"op": "subscribe", "symbol": "BANKNIFTY", "interval": 5, "rate_sec": 2}
+    {"op": "unsubscribe", "symbol": "BANKNIFTY", "interval": 5}
+    {"op": "resync", "symbol": "BANKNIFTY", "interval": 5}
+    {"op": "list"}
+and get {"type": "subscribed" | "unsubscribed" | "resync" | "subscriptions" | "error", ...}
+replies. Every data frame carries "stream": "<SYMBOL>_<interval>" and a
+per-stream "seq". rate_sec throttles a stream per client (never faster
+than the producer's PUSH_SEC).
+
+Encodings (negotiated per connection, see ws_codec.py):
+    deltas=1        after a full packet, frames are
+                    {"type": "delta", "stream", "seq", "base", "ops": [...]}
+                    patches against the client's packet `base`. Whenever the
+                    client may not hold `base` (dropped or throttled frames
+                    beyond DELTA_HISTORY, or a {"op": "resync"} request) it
+                    gets a full packet instead.
+    format=msgpack  data frames are binary MessagePack with float32 candle
+                    columns; protocol replies stay JSON text.
+Each (format, base) encoding is built at most once per tick and shared by
+all clients that need it.
+"""
+import asyncio
+import json
+import logging
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Set, Tuple
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from fast_json import dumps_str
+from live_candles import get_engine
+from ws_codec import MSGPACK_AVAILABLE, diff, pack, pack_packet
+from ws_live import build_packet
+
+log = logging.getLogger(__name__)
+
+PUSH_SEC = 1.0
+RETRY_SEC = 2.0   # after a tick without data or an error
+MAX_CANDLES = 80
+
+SEND_TIMEOUT_SEC = 5.0
+SLOW_DROP_LIMIT = 10   # consecutive replaced frames of one stream (~10 s behind at 1 frame/s)
+CLOSE_TRY_AGAIN = 1013
+
+MAX_SUBSCRIPTIONS = 20   # streams per socket
+MAX_RATE_SEC = 60.0
+
+DELTA_HISTORY = 16   # past packets per stream that deltas can be based on
+FORMATS = ("json", "msgpack") if MSGPACK_AVAILABLE else ("json",)
+
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="ws-live")
+
+StreamKey = Tuple[str, int]
+
+
+def stream_name(key: StreamKey) -> str:
+    return f"{key[0]}_{key[1]}"
+
+
+# Hub-wide counters for /api/ws_hub
+_totals = {
+    "connections": 0, "frames_sent": 0, "bytes_sent": 0, "delta_frames": 0,
+    "frames_dropped": 0, "slow_disconnects": 0,
+}
+
+
+def _encode_full(packet: dict, fmt: str):
+    return pack_packet(packet) if fmt == "msgpack" else dumps_str(packet)
+
+
+def _encode_delta(message: dict, fmt: str):
+    return pack(message) if fmt == "msgpack" else dumps_str(message)
+
+
+class Tick:
+    """One produced packet and its encodings, each built on first use."""
+
+    def __init__(self, stream: "LiveStream", seq: int, packet: dict):
+        self.stream = stream
+        self.seq = seq
+        self.packet = packet
+        self._frames: Dict[Tuple[str, Optional[int]], object] = {}
+        self._ops: Dict[int, Optional[list]] = {}
+
+    def ops(self, base: int, old: Optional[dict] = None) -> Optional[list]:
+        if base not in self._ops:
+            old = old if old is not None else self.stream.history.get(base)
+            if old is None:
+                self._ops[base] = None
+            else:
+                self._ops[base] = [op for op in diff(old, self.packet) if op["path"] != "/seq"]
+        return self._ops[base]
+
+    def frame(self, fmt: str, base: Optional[int] = None):
+        """Full packet (base=None), or a delta from `base`; None when no delta is available or it isn't smaller."""
+        key = (fmt, base)
+        if key not in self._frames:
+            if base is None:
+                self._frames[key] = _encode_full(self.packet, fmt)
+            else:
+                ops = self.ops(base)
+                frame = None
+                if ops is not None:
+                    frame = _encode_delta({
+                        "type": "delta", "stream": self.packet["stream"],
+                        "seq": self.seq, "base": base, "ops": ops,
+                    }, fmt)
+                    if len(frame) >= len(self.frame(fmt)):
+                        frame = None
+                self._frames[key] = frame
+        return self._frames[key]
+
+
+class Client:
+    """One WebSocket with its conflating send queue and writer task."""
+
+    def __init__(self, websocket: WebSocket, fmt: str = "json", deltas: bool = False):
+        self.websocket = websocket
+        self.format = fmt
+        self.deltas = deltas
+        self.pending: "OrderedDict[StreamKey, object]" = OrderedDict()  # Tick, or an encoded reply
+        self.sent = 0
+        self.dropped = 0
+        self.drop_streaks: Dict[StreamKey, int] = {}  # per stream, so many streams don't add up
+        self.closed = False
+        self.streams: Dict[StreamKey, "LiveStream"] = {}
+        self.rates: Dict[StreamKey, float] = {}
+        self._next_due: Dict[StreamKey, float] = {}
+        self.sent_seq: Dict[StreamKey, int] = {}  # what a delta for this client must be based on
+        self._control_seq = 0
+        self._wake = asyncio.Event()
+        self._writer: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._writer = asyncio.create_task(self._write_loop())
+
+    def offer(self, key: StreamKey, tick: Tick, force: bool = False):
+        """Queue a tick without waiting; replaces an unsent tick of the same stream."""
+        if self.closed:
+            return
+        rate = self.rates.get(key, 0.0)
+        if rate > PUSH_SEC and not force:
+            now = time.monotonic()
+            if now < self._next_due.get(key, 0.0):
+                return  # throttled by the client's rate_sec, not a drop
+            self._next_due[key] = now + rate
+        if key in self.pending:
+            self.dropped += 1
+            streak = self.drop_streaks[key] = self.drop_streaks.get(key, 0) + 1
+            _totals["frames_dropped"] += 1
+            if streak >= SLOW_DROP_LIMIT:
+                self.disconnect_slow(f"{streak} frames behind on {stream_name(key)}")
+                return
+        self.pending[key] = tick
+        self._wake.set()
+
+    def send_control(self, message: dict):
+        """Queue a protocol reply; replies are never conflated."""
+        if self.closed:
+            return
+        self._control_seq += 1
+        self.pending[("control", -self._control_seq)] = dumps_str(message)
+        self._wake.set()
+
+    async def _write_loop(self):
+        while not self.closed:
+            await self._wake.wait()
+            self._wake.clear()
+            while self.pending and not self.closed:
+                key, item = self.pending.popitem(last=False)
+                frame = self._frame_for(key, item) if isinstance(item, Tick) else item
+                try:
+                    if isinstance(frame, bytes):
+                        await asyncio.wait_for(self.websocket.send_bytes(frame), SEND_TIMEOUT_SEC)
+                    else:
+                        await asyncio.wait_for(self.websocket.send_text(frame), SEND_TIMEOUT_SEC)
+                except asyncio.TimeoutError:
+                    self.disconnect_slow(f"send took over {SEND_TIMEOUT_SEC:g}s")
+                    return
+                except Exception as e:
+                    log.info("WebSocket send failed, dropping client: %s", e)
+                    self.closed = True
+                    return
+                self.sent += 1
+                self.drop_streaks.pop(key, None)
+                _totals["frames_sent"] += 1
+                _totals["bytes_sent"] += len(frame)
+
+    def _frame_for(self, key: StreamKey, tick: Tick):
+        frame = None
+        if self.deltas:
+            base = self.sent_seq.get(key)
+            if base is not None:
+                frame = tick.frame(self.format, base)
+                if frame is not None:
+                    _totals["delta_frames"] += 1
+        if frame is None:
+            frame = tick.frame(self.format)
+        self.sent_seq[key] = tick.seq
+        return frame
+
+    def disconnect_slow(self, reason: str):
+        if self.closed:
+            return
+        self.closed = True
+        self.pending.clear()
+        _totals["slow_disconnects"] += 1
+        log.warning("🐢 Disconnecting slow WebSocket client: %s", reason)
+        asyncio.create_task(self._close(CLOSE_TRY_AGAIN, "slow consumer"))
+
+    async def _close(self, code: int, reason: str):
+        try:
+            await asyncio.wait_for(self.websocket.close(code=code, reason=reason), SEND_TIMEOUT_SEC)
+        except Exception:
+            pass
+
+    def stop(self):
+        self.closed = True
+        self.pending.clear()
+        if self._writer is not None:
+            self._writer.cancel()
+
+
+class LiveStream:
+    """Producer and subscriber set for one (symbol, interval)."""
+
+    def __init__(self, symbol: str, interval: int):
+        self.symbol = symbol
+        self.interval = interval
+        self.key: StreamKey = (symbol, interval)
+        self.subscribers: Set[Client] = set()
+        self.latest: Optional[Tick] = None  # sent to new subscribers
+        self.history: "OrderedDict[int, dict]" = OrderedDict()  # seq -> packet
+        self.seq = 0
+        self.last_price: Optional[float] = None  # build_packet falls back to the sample CSV on the executor
+        self._task: Optional[asyncio.Task] = None
+
+    def add(self, client: Client):
+        self.subscribers.add(client)
+        if self.latest is not None:
+            client.offer(self.key, self.latest, force=True)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name=f"ws-live-{self.symbol}-{self.interval}")
+
+    def discard(self, client: Client):
+        self.subscribers.discard(client)
+
+    def _broadcast(self, tick: Tick):
+        for client in list(self.subscribers):
+            if client.closed:
+                self.subscribers.discard(client)
+            else:
+                client.offer(self.key, tick)
+
+    def _tick(self, engine, seq: int, previous: Optional[Tick], wanted: Set[Tuple[str, bool]]) -> Optional[Tick]:
+        """
+        Build one packet and pre-encode the common frames for the formats
+        subscribers use (runs on the executor).
+        """
+        packet, self.last_price = build_packet(self.symbol, engine, self.last_price)
+        if packet is None:
+            return None
+        packet["stream"] = stream_name(self.key)
+        packet["seq"] = seq
+        packet["ts"] = time.time()  # lets clients (and bench/ws_load.py) measure frame latency
+        tick = Tick(self, seq, packet)
+        for fmt, deltas in wanted:
+            tick.frame(fmt)
+            if deltas and previous is not None:
+                tick.ops(previous.seq, previous.packet)
+                tick.frame(fmt, previous.seq)
+        return tick
+
+    async def _run(self):
+        log.info("📡 Live stream started for %s (%ss)", self.symbol, self.interval)
+        loop = asyncio.get_running_loop()
+        engine = None
+        while self.subscribers:
+            try:
+                if engine is None:
+                    # first use pre-populates from yfinance
+                    engine = await loop.run_in_executor(
+                        _executor, lambda: get_engine(self.symbol, interval_sec=self.interval, max_candles=MAX_CANDLES)
+                    )
+                wanted = {(c.format, c.deltas) for c in self.subscribers}
+                tick = await loop.run_in_executor(_executor, self._tick, engine, self.seq + 1, self.latest, wanted)
+                if tick is None:
+                    await asyncio.sleep(RETRY_SEC)
+                    continue
+                self.seq = tick.seq
+                self.latest = tick
+                self.history[tick.seq] = tick.packet
+                while len(self.history) > DELTA_HISTORY:
+                    self.history.popitem(last=False)
+                self._broadcast(tick)
+                await asyncio.sleep(PUSH_SEC)
+            except Exception as e:
+                log.exception("WebSocket stream error for %s: %s", self.symbol, e)
+                await asyncio.sleep(RETRY_SEC)
+        if _streams.get(self.key) is self:
+            # no await since the loop check: nobody re-subscribed; the next subscribe builds a fresh stream
+            del _streams[self.key]
+        log.info("💤 Live stream has no subscribers, stopping %s (%ss)", self.symbol, self.interval)
+
+    def status(self) -> Dict:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "subscribers": len(self.subscribers),
+            "frames": self.seq,
+            "frame_bytes": len(self.latest.frame("json")) if self.latest else 0,
+        }
+
+
+# Global registries: one stream per symbol+interval, and the connected clients
+_streams: Dict[StreamKey, LiveStream] = {}
+_clients: Set[Client] = set()
+
+
+def subscribe(client: Client, symbol: str, interval: int, rate_sec: float = PUSH_SEC) -> LiveStream:
+    key = (symbol.upper(), interval)
+    stream = _streams.get(key)
+    if stream is None:
+        stream = _streams[key] = LiveStream(*key)
+    client.streams[key] = stream
+    client.rates[key] = rate_sec
+    client._next_due.pop(key, None)
+    stream.add(client)
+    return stream
+
+
+def unsubscribe(client: Client, stream: LiveStream):
+    stream.discard(client)
+    client.streams.pop(stream.key, None)
+    client.rates.pop(stream.key, None)
+    client._next_due.pop(stream.key, None)
+    client.sent_seq.pop(stream.key, None)
+    client.drop_streaks.pop(stream.key, None)
+    client.pending.pop(stream.key, None)
+
+
+def _stream_args(message: dict) -> Tuple[str, int]:
+    symbol = str(message.get("symbol", "")).strip().upper()
+    if not symbol:
+        raise ValueError("symbol is required")
+    try:
+        interval = int(message.get("interval", 5))
+    except (TypeError, ValueError):
+        raise ValueError("interval must be an integer")
+    if interval <= 0:
+        raise ValueError("interval must be positive")
+    return symbol, interval
+
+
+def handle_message(client: Client, text: str) -> dict:
+    """Apply one protocol message; returns the reply."""
+    try:
+        try:
+            message = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"invalid JSON: {e}")
+        if not isinstance(message, dict):
+            raise ValueError("message must be a JSON object")
+        op = message.get("op")
+
+        if op == "subscribe":
+            symbol, interval = _stream_args(message)
+            key = (symbol, interval)
+            if key not in client.streams and len(client.streams) >= MAX_SUBSCRIPTIONS:
+                raise ValueError(f"at most {MAX_SUBSCRIPTIONS} subscriptions per connection")
+            try:
+                rate_sec = float(message.get("rate_sec", PUSH_SEC))
+            except (TypeError, ValueError):
+                raise ValueError("rate_sec must be a number")
+            rate_sec = min(max(rate_sec, PUSH_SEC), MAX_RATE_SEC)
+            subscribe(client, symbol, interval, rate_sec)
+            return {"type": "subscribed", "stream": stream_name(key), "rate_sec": rate_sec}
+
+        if op == "unsubscribe":
+            key = _stream_args(message)
+            stream = client.streams.get(key)
+            if stream is not None:
+                unsubscribe(client, stream)
+            return {"type": "unsubscribed", "stream": stream_name(key)}
+
+        if op == "resync":
+            key = _stream_args(message)
+            stream = client.streams.get(key)
+            if stream is None:
+                raise ValueError(f"not subscribed to {stream_name(key)}")
+            client.sent_seq.pop(key, None)  # next frame is a full packet
+            if stream.latest is not None:
+                client.offer(key, stream.latest, force=True)
+            return {"type": "resync", "stream": stream_name(key)}
+
+        if op == "list":
+            return {"type": "subscriptions", "streams": {stream_name(k): client.rates[k] for k in client.streams}}
+
+        raise ValueError(f"unknown op: {op!r}")
+    except ValueError as e:
+        return {"type": "error", "message": str(e)}
+
+
+async def websocket_loop(websocket: WebSocket, symbol: Optional[str], interval: int,
+                         fmt: str = "json", deltas: bool = False):
+    """
+    Serve one client until it disconnects. symbol (from the query string)
+    is subscribed up front; further streams come from protocol messages.
+    """
+    await websocket.accept()
+    requested = fmt
+    fmt = fmt if fmt in FORMATS else "json"
+    client = Client(websocket, fmt, deltas)
+    client.start()
+    _clients.add(client)
+    _totals["connections"] += 1
+    if requested != "json" or deltas:
+        # plain JSON clients get no hello, so older clients see only packets
+        client.send_control({"type": "hello", "format": fmt, "deltas": deltas, "formats": list(FORMATS)})
+    if symbol:
+        subscribe(client, symbol, interval)
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            text = message.get("text")
+            if text is None:
+                # receive_text() would die with a KeyError (1011); a binary frame is a protocol error
+                client.send_control({"type": "error", "message": "binary frames are not supported; send JSON text"})
+                continue
+            client.send_control(handle_message(client, text))
+    except (WebSocketDisconnect, RuntimeError):
+        # RuntimeError: receive after we closed a slow client
+        pass
+    finally:
+        for stream in list(client.streams.values()):
+            unsubscribe(client, stream)
+        client.stop()
+        _clients.discard(client)
+
+
+def hub_status() -> Dict:
+    clients = list(_clients)
+    depths = [len(c.pending) for c in clients]
+    return {
+        "streams": {stream_name(key): stream.status() for key, stream in list(_streams.items())},
+        "clients": {
+            "connected": len(clients),
+            "subscriptions": sum(len(c.streams) for c in clients),
+            "queue_depth_total": sum(depths),
+            "queue_depth_max": max(depths, default=0),
+            "dropped_frames": sum(c.dropped for c in clients),
+            "formats": dict(Counter(c.format + ("+delta" if c.deltas else "") for c in clients)),
+        },
+        "totals": dict(_totals),
+    }
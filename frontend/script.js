@@ -35,8 +35,8 @@ document.addEventListener('DOMContentLoaded', async () => {
     // Wait a moment for chart to render
     await new Promise(resolve => setTimeout(resolve, 500));
     
-    // Start live data polling (with initial fetch)
-    refreshData();
+    // First paint via SSE (technical core arrives before the slow stages), then poll
+    streamSignal();
     setInterval(refreshData, 3000); // Auto-refresh every 3 seconds
     
     // Start heartbeat monitor to detect stale data feeds
@@ -712,6 +712,31 @@ function updateLiveChart(candles, series) {
 // FETCH AND UPDATE ALL DATA
 // ====================================================================
 
+// Client copy of the candle/series window, so polls only fetch the delta (?since=)
+let liveWindow = { key: null, candles: [], series: {} };
+const LIVE_WINDOW_LIMIT = 80;
+
+function mergeLiveWindow(key, data) {
+    const delta = data.delta;
+    if (!delta || delta.full || liveWindow.key !== key) {
+        liveWindow = { key: key, candles: data.candles || [], series: data.series || {} };
+    } else if (data.candles && data.candles.length > 0) {
+        const firstTime = data.candles[0].time;
+        const kept = liveWindow.candles.filter(c => c.time < firstTime);
+        const dropped = liveWindow.candles.length - kept.length;
+        const candles = kept.concat(data.candles);
+        const trim = Math.max(0, candles.length - LIVE_WINDOW_LIMIT);
+        const series = {};
+        Object.entries(data.series || {}).forEach(([name, values]) => {
+            const old = liveWindow.series[name] || [];
+            series[name] = old.slice(0, old.length - dropped).concat(values).slice(trim);
+        });
+        liveWindow = { key: key, candles: candles.slice(trim), series: series };
+    }
+    data.candles = liveWindow.candles;
+    data.series = liveWindow.series;
+}
+
 async function refreshData() {
     try {
         // Throttle to max 1 request per second
@@ -730,7 +755,10 @@ async function refreshData() {
             : (window.location.hostname === 'localhost' || window.location.hostname === '127.0.0.1')
                 ? 'http://127.0.0.1:8000'
                 : window.location.origin;
-        const url = `${baseUrl}/api/signal_live?symbol=${currentSymbol}&interval=${intervalSeconds}&limit=80`;
+        const windowKey = `${currentSymbol}_${intervalSeconds}`;
+        const lastCandle = liveWindow.key === windowKey ? liveWindow.candles[liveWindow.candles.length - 1] : null;
+        const sinceParam = lastCandle ? `&since=${lastCandle.time}` : '';
+        const url = `${baseUrl}/api/signal_live?symbol=${currentSymbol}&interval=${intervalSeconds}&limit=${LIVE_WINDOW_LIMIT}${sinceParam}`;
         console.log('🔄 Fetching:', url);
         
         const response = await fetch(url);
@@ -739,6 +767,10 @@ async function refreshData() {
         }
         
         const data = await response.json();
+        if (data.error) {
+            throw new Error(data.error);
+        }
+        mergeLiveWindow(windowKey, data);
         
         console.log('='.repeat(60));
         console.log(`✅ Data received for ${currentSymbol}`);
@@ -805,6 +837,78 @@ async function refreshData() {
     }
 }
 
+// ====================================================================
+// PROGRESSIVE FIRST LOAD (Server-Sent Events)
+// ====================================================================
+
+// Renders each section of /api/signal_stream as soon as its event arrives.
+// Falls back to a normal refresh if the stream fails.
+function streamSignal() {
+    if (typeof EventSource === 'undefined') {
+        refreshData();
+        return;
+    }
+    const intervalSeconds = currentInterval * 60;
+    const baseUrl = window.location.protocol === 'file:' 
+        ? 'http://127.0.0.1:8000'
+        : (window.location.hostname === 'localhost' || window.location.hostname === '127.0.0.1')
+            ? 'http://127.0.0.1:8000'
+            : window.location.origin;
+    const url = `${baseUrl}/api/signal_stream?symbol=${currentSymbol}&interval=${intervalSeconds}&limit=80`;
+    console.log('📡 Streaming:', url);
+
+    const symbolAtStart = currentSymbol;
+    const data = {};
+    const source = new EventSource(url);
+    const on = (event, render) => source.addEventListener(event, (e) => {
+        if (currentSymbol !== symbolAtStart) {
+            source.close();
+            return;
+        }
+        Object.assign(data, JSON.parse(e.data));
+        try { render(data); } catch (err) { console.error(`Error rendering ${event}:`, err); }
+    });
+
+    on('core', (d) => {
+        updateActionCard(d);
+        const priceLabel = document.getElementById('priceLabel');
+        if (priceLabel && d.price) {
+            priceLabel.textContent = `₹${d.price.toLocaleString('en-IN', {minimumFractionDigits: 2, maximumFractionDigits: 2})}`;
+        }
+        updateLiveChart(d.candles || [], d.series || {});
+        updatePredictions(d);
+        updateMarketRegime(d);
+        if (currentSymbol === 'NIFTY' && d.price) {
+            updateNiftyMiniInfo(d);
+        }
+    });
+    on('news', updateHeadlines);
+    on('global', updateGlobalMarkets);
+    on('sector_view', updateSectors);
+    on('options', updateOptions);
+    on('final', (d) => {
+        updateActionCard(d);
+        updateReasons(d);
+        updateMarketOverview(d);
+    });
+    on('done', () => source.close());
+
+    // A failed context stage is sent with neutral values; the stream goes on
+    source.addEventListener('stage_error', (e) => {
+        console.warn('⚠️ Signal stream stage failed:', e.data);
+    });
+
+    source.addEventListener('error', (e) => {
+        source.close();
+        if (e.data) {
+            console.error('❌ Signal stream error:', e.data);
+        }
+        if (!data.price) {
+            refreshData();
+        }
+    });
+}
+
 // ====================================================================
 // UPDATE ACTION CARD
 // ====================================================================
@@ -1611,80 +1715,7 @@ function setupSectorTabs() {
     });
 }
 
-// Fetch live price for a single stock
-async function fetchLiveStockPrice(symbol) {
-    try {
-        // Use dynamic base URL to avoid CORS issues
-        const baseUrl = window.location.protocol === 'file:' 
-            ? 'http://127.0.0.1:8000'
-            : (window.location.hostname === 'localhost' || window.location.hostname === '127.0.0.1')
-                ? 'http://127.0.0.1:8000'
-                : window.location.origin;
-        // interval must be in SECONDS (300 = 5 minutes)
-        const url = `${baseUrl}/api/signal_live?symbol=${symbol}&interval=300&limit=10`;
-        console.log(`🔍 Fetching ${symbol} from: ${url}`);
-        const response = await fetch(url, {
-            method: 'GET',
-            mode: 'cors',
-            headers: {
-                'Content-Type': 'application/json'
-            }
-        });
-        if (!response.ok) {
-            console.error(`Failed to fetch ${symbol}: ${response.status}`);
-            return null;
-        }
-        
-        const data = await response.json();
-        
-        // Calculate change from candles
-        let change = 0;
-        let changePct = 0;
-        let history = [];
-        
-        if (data.candles && data.candles.length >= 2) {
-            const latest = data.candles[data.candles.length - 1];
-            const previous = data.candles[0];
-            
-            // Validate previous.open to avoid extreme percentages
-            if (previous.open > 0 && latest.close > 0) {
-                change = latest.close - previous.open;
-                changePct = (change / previous.open) * 100;
-                
-                // Sanity check: cap extreme percentage changes (likely data errors)
-                if (Math.abs(changePct) > 100) {
-                    console.warn(`⚠️ Extreme change detected for ${symbol}: ${changePct.toFixed(2)}% - possible data error`);
-                    // Use more conservative calculation with latest vs previous close
-                    if (data.candles.length > 1) {
-                        const prevClose = data.candles[data.candles.length - 2].close;
-                        if (prevClose > 0) {
-                            change = latest.close - prevClose;
-                            changePct = (change / prevClose) * 100;
-                        }
-                    }
-                }
-            } else {
-                console.warn(`⚠️ Invalid price data for ${symbol}: previous.open=${previous.open}, latest.close=${latest.close}`);
-            }
-            
-            // Build mini history from last 10 candles
-            history = data.candles.slice(-10).map(c => c.close);
-        }
-        
-        return {
-            symbol: symbol,
-            price: data.price || 0,
-            change: change,
-            changePct: changePct,
-            history: history.length > 0 ? history : [data.price || 0]
-        };
-    } catch (error) {
-        console.error(`Failed to fetch ${symbol}:`, error);
-        return null;
-    }
-}
-
-// Fetch live prices for all stocks
+// Fetch live prices for all stocks (one /api/signal_batch call per chunk of symbols)
 async function fetchAllStockPrices() {
     console.log('📊 fetchAllStockPrices CALLED');
     const allSymbols = [];
@@ -1698,22 +1729,46 @@ async function fetchAllStockPrices() {
     
     console.log('🔄 Fetching live prices for', allSymbols.length, 'stocks...', allSymbols.slice(0, 5));
     
-    // Fetch in batches to avoid overwhelming the API
-    const batchSize = 5;
+    // Use dynamic base URL to avoid CORS issues
+    const baseUrl = window.location.protocol === 'file:' 
+        ? 'http://127.0.0.1:8000'
+        : (window.location.hostname === 'localhost' || window.location.hostname === '127.0.0.1')
+            ? 'http://127.0.0.1:8000'
+            : window.location.origin;
+    
+    // Server accepts up to 60 symbols per batch
+    const batchSize = 60;
     for (let i = 0; i < allSymbols.length; i += batchSize) {
         const batch = allSymbols.slice(i, i + batchSize);
-        const promises = batch.map(symbol => fetchLiveStockPrice(symbol));
-        const results = await Promise.all(promises);
-        
-        results.forEach(result => {
-            if (result) {
-                liveStockData[result.symbol] = result;
+        // interval must be in SECONDS (300 = 5 minutes)
+        const url = `${baseUrl}/api/signal_batch?symbols=${batch.join(',')}&interval=300&limit=10`;
+        try {
+            const response = await fetch(url, { method: 'GET', mode: 'cors' });
+            if (!response.ok) {
+                console.error(`Failed to fetch stock batch: ${response.status}`);
+                continue;
             }
-        });
-        
-        // Small delay between batches
-        if (i + batchSize < allSymbols.length) {
-            await new Promise(resolve => setTimeout(resolve, 500));
+            const data = await response.json();
+            if (data.error) {
+                console.error('Stock batch error:', data.error);
+                continue;
+            }
+            
+            Object.entries(data.stocks || {}).forEach(([symbol, s]) => {
+                liveStockData[symbol] = {
+                    symbol: symbol,
+                    price: s.price || 0,
+                    change: s.change,
+                    changePct: s.change_pct,
+                    action: s.action,
+                    history: s.history && s.history.length > 0 ? s.history : [s.price || 0]
+                };
+            });
+            Object.entries(data.errors || {}).forEach(([symbol, err]) => {
+                console.warn(`⚠️ ${symbol}: ${err}`);
+            });
+        } catch (error) {
+            console.error('Failed to fetch stock batch:', error);
         }
     }
     